@@ -0,0 +1,369 @@
+import itertools
+import json
+import os
+import re
+import threading
+import time
+
+from core.benchmark import BenchmarkRunner
+from core.server_process import FINAL_STATES, READY
+
+# Seconds the whole search may take
+DEFAULT_BUDGET = 3600
+# Seconds one configuration gets to load
+LOAD_TIMEOUT = 600
+STOP_TIMEOUT = 10
+AUTOTUNE_KEY = "(autotune)"
+
+OBJECTIVES = ["throughput", "latency", "balanced"]
+
+# Trial outcomes
+OK = "ok"
+OOM = "oom"
+FAILED = "failed"
+PRUNED = "pruned"
+INVALID = "invalid"
+
+# Keys whose values only scale sizes; a non-OOM failure of one value is
+# assumed to fail for every other value along these axes
+NUMERIC_KEYS = ("ub", "parallel", "spec-draft-n-max")
+
+# Relative memory use of KV cache types
+_CACHE_TYPE_RANK = {
+    "q4_0": 0,
+    "q4_1": 1,
+    "iq4_nl": 1,
+    "q5_0": 2,
+    "q5_1": 3,
+    "q8_0": 4,
+    "": 5,
+    "f16": 5,
+    "bf16": 5,
+    "f32": 6,
+}
+
+_OOM_RE = re.compile(
+    r"out of memory|failed to allocate|unable to allocate|cudaMalloc failed"
+    r"|ErrorOutOfDeviceMemory",
+    re.IGNORECASE,
+)
+
+
+def default_search_space(params):
+    """Search space around a profile's parameters."""
+    space = {
+        "ub": [256, 512, 1024, 2048],
+        "ctk": ["f16", "q8_0"],
+        "ctv": ["f16", "q8_0"],
+        "flash-attn": [True, False],
+        "parallel": [1, 2, 4],
+    }
+    if params.get("spec-type", "none") not in ("", "none", None):
+        space["spec-draft-n-max"] = [1, 2, 3, 4]
+    return space
+
+
+def memory_rank(key, value):
+    """Higher means the value needs at least as much memory as lower ones."""
+    if key in ("ctk", "ctv"):
+        return _CACHE_TYPE_RANK.get(value or "", 5)
+    if key == "flash-attn":
+        return 0 if value else 1
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_valid(config):
+    """False for combinations llama-server refuses outright."""
+    # A quantized V cache needs flash attention
+    ctv = config.get("ctv")
+    if (
+        ctv not in (None, "", "f16", "bf16", "f32")
+        and config.get("flash-attn") is False
+    ):
+        return False
+    return True
+
+
+def needs_more_memory(config, than):
+    """True if config needs at least as much memory as than on every axis."""
+    return all(memory_rank(k, config[k]) >= memory_rank(k, than[k]) for k in than)
+
+
+def same_except_numeric(config, other):
+    return all(config[k] == other[k] for k in other if k not in NUMERIC_KEYS)
+
+
+def pareto_front(trials):
+    """Successful trials not beaten on both throughput and latency."""
+    ok = [t for t in trials if t["outcome"] == OK]
+    front = []
+    for t in ok:
+        dominated = any(
+            o["throughput"] >= t["throughput"]
+            and o["latency"] <= t["latency"]
+            and (o["throughput"] > t["throughput"] or o["latency"] < t["latency"])
+            for o in ok
+        )
+        if not dominated:
+            front.append(t)
+    return sorted(front, key=lambda t: -t["throughput"])
+
+
+def pick_best(front, objective="throughput"):
+    """The front member that best fits the objective, or None."""
+    if not front:
+        return None
+    if objective == "latency":
+        return min(front, key=lambda t: t["latency"])
+    if objective == "balanced":
+        top = max(t["throughput"] for t in front) or 1.0
+        slowest = max(t["latency"] for t in front) or 1.0
+        return max(front, key=lambda t: t["throughput"] / top - t["latency"] / slowest)
+    return max(front, key=lambda t: t["throughput"])
+
+
+class Autotuner:
+    """Searches launch parameters of a profile for the best throughput.
+
+    Each configuration of the search space (dict of key -> values) is
+    launched through the supervisor with the profile's other parameters
+    and, once ready, measured with BenchmarkRunner (one prompt length, as
+    many concurrent requests as slots). Throughput is the total generation
+    tok/s, latency the median time to first token.
+
+    Configurations are tried in order of increasing memory use. One that
+    runs out of memory rules out every configuration needing at least as
+    much memory on all axes; one that fails otherwise rules out those that
+    only differ in NUMERIC_KEYS. The search stops when everything has been
+    tried or budget seconds have passed.
+
+    Trials are saved to state_path after each run, so a search interrupted
+    by cancel() or a crash resumes where it stopped when started again with
+    the same profile, parameters and space. When it finishes, the best
+    configuration on the throughput/latency Pareto front (by objective) is
+    saved as profile "<profile> (autotuned)".
+
+    progress(trial, done, total) is called after each trial.
+    """
+
+    def __init__(
+        self,
+        supervisor,
+        profile_manager,
+        profile,
+        params,
+        space=None,
+        budget=DEFAULT_BUDGET,
+        state_path=None,
+        objective="throughput",
+        prompt_length=512,
+        n_predict=64,
+        load_timeout=LOAD_TIMEOUT,
+        progress=None,
+    ):
+        self.supervisor = supervisor
+        self.profile_manager = profile_manager
+        self.profile = profile
+        self.params = dict(params)
+        self.space = space or default_search_space(params)
+        self.budget = budget
+        self.state_path = state_path
+        self.objective = objective
+        self.prompt_length = prompt_length
+        self.n_predict = n_predict
+        self.load_timeout = load_timeout
+        self.progress = progress
+        self.trials = []
+        self._stop = threading.Event()
+        self._runner = None
+        self._load_state()
+
+    def cancel(self):
+        self._stop.set()
+        runner = self._runner
+        if runner is not None:
+            runner.cancel()
+
+    @property
+    def cancelled(self):
+        return self._stop.is_set()
+
+    def _state_key(self):
+        # Round-tripped so it compares equal to what was loaded from JSON
+        return json.loads(json.dumps({"params": self.params, "space": self.space}))
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f).get(self.profile) or {}
+        except (OSError, json.JSONDecodeError):
+            return
+        if state.get("search") == self._state_key():
+            self.trials = state.get("trials", [])
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        states = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r") as f:
+                    states = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                states = {}
+        states[self.profile] = {"search": self._state_key(), "trials": self.trials}
+        try:
+            with open(self.state_path, "w") as f:
+                json.dump(states, f, indent=4)
+        except OSError as e:
+            print(f"Error saving autotune state: {e}")
+
+    def configs(self):
+        """Every configuration of the space, least memory first."""
+        keys = list(self.space)
+        configs = [
+            dict(zip(keys, values))
+            for values in itertools.product(*(self.space[k] for k in keys))
+        ]
+        ranks = {k: sorted({memory_rank(k, v) for v in self.space[k]}) for k in keys}
+        return sorted(
+            configs,
+            key=lambda c: sum(ranks[k].index(memory_rank(k, c[k])) for k in keys),
+        )
+
+    def _skip_reason(self, config):
+        if not is_valid(config):
+            return INVALID
+        for trial in self.trials:
+            if trial["outcome"] == OOM and needs_more_memory(config, trial["config"]):
+                return PRUNED
+            if trial["outcome"] == FAILED and same_except_numeric(
+                config, trial["config"]
+            ):
+                return PRUNED
+        return None
+
+    def measure(self, config):
+        """Launches one configuration and benchmarks it; returns the trial.
+
+        Errors launching or benchmarking it make a FAILED trial with error.
+        """
+        params = dict(self.params, **config)
+        # Restored KV cache slots would skip the prefill being measured
+        params.pop("slot-cache", None)
+        trial = {"config": config, "outcome": FAILED, "time": time.time()}
+        try:
+            inst = self.supervisor.start(AUTOTUNE_KEY, params)
+        except Exception as e:
+            print(f"Error launching autotune trial {config}: {e}")
+            trial["error"] = str(e)
+            return trial
+        try:
+            deadline = time.monotonic() + self.load_timeout
+            while inst.state != READY:
+                if inst.state in FINAL_STATES or self._stop.is_set():
+                    break
+                if time.monotonic() > deadline:
+                    break
+                time.sleep(0.1)
+            if inst.state != READY:
+                log = "\n".join(inst.process.tail(50))
+                if _OOM_RE.search(log):
+                    trial["outcome"] = OOM
+                trial["error"] = log.splitlines()[-1] if log else ""
+                return trial
+
+            trial["load_seconds"] = inst.process.time_to_ready
+            self._runner = BenchmarkRunner(
+                inst.port,
+                prompt_lengths=[self.prompt_length],
+                concurrency=[max(int(params.get("parallel") or 1), 1)],
+                n_predict=self.n_predict,
+            )
+            try:
+                results = self._runner.run()
+            except Exception as e:
+                print(f"Error benchmarking autotune trial {config}: {e}")
+                trial["error"] = str(e)
+                return trial
+            finally:
+                self._runner = None
+            if not results or not results[0]["requests"]:
+                trial["error"] = "no successful benchmark requests"
+                return trial
+            result = results[0]
+            trial.update(
+                {
+                    "outcome": OK,
+                    "throughput": result["total_gen_tps"],
+                    "latency": result["ttft_p50"],
+                    "prompt_tps": result["prompt_tps"],
+                    "gen_tps": result["gen_tps"],
+                }
+            )
+            return trial
+        finally:
+            self.supervisor.stop(AUTOTUNE_KEY)
+            self.supervisor.wait_stopped(inst, STOP_TIMEOUT)
+            self.supervisor.remove(AUTOTUNE_KEY)
+
+    def run(self):
+        """Runs the search; blocks until done, out of time or cancelled.
+
+        Returns {"trials", "front", "best", "profile" (name of the saved
+        profile or None), "cancelled", "out_of_time"}.
+        """
+        started = time.monotonic()
+        configs = self.configs()
+        done = {json.dumps(t["config"], sort_keys=True) for t in self.trials}
+        out_of_time = False
+        for config in configs:
+            if self._stop.is_set():
+                break
+            if json.dumps(config, sort_keys=True) in done:
+                continue
+            if time.monotonic() - started > self.budget:
+                out_of_time = True
+                break
+            reason = self._skip_reason(config)
+            trial = (
+                {"config": config, "outcome": reason}
+                if reason
+                else self.measure(config)
+            )
+            if self._stop.is_set() and trial["outcome"] != OK:
+                # Interrupted mid-trial; try it again on resume
+                break
+            self.trials.append(trial)
+            self._save_state()
+            if self.progress is not None:
+                self.progress(trial, len(self.trials), len(configs))
+
+        front = pareto_front(self.trials)
+        best = pick_best(front, self.objective)
+        saved = None
+        if best is not None and not self._stop.is_set():
+            saved = self.save_profile(best)
+        return {
+            "trials": self.trials,
+            "front": front,
+            "best": best,
+            "profile": saved,
+            "cancelled": self.cancelled,
+            "out_of_time": out_of_time,
+        }
+
+    def save_profile(self, trial):
+        name = f"{self.profile} (autotuned)"
+        params = dict(self.params, **trial["config"])
+        data = {"name": name, "parameters": params}
+        source = self.profile_manager.get_profile(self.profile) or {}
+        if source.get("warmup_prompts"):
+            data["warmup_prompts"] = source["warmup_prompts"]
+        self.profile_manager.save_profile(name, data)
+        return name
@@ -0,0 +1,306 @@
+import http.client
+import itertools
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PROMPT_LENGTHS = [128, 512, 2048]
+DEFAULT_N_PREDICT = 128
+# Seconds a single benchmark request may take
+REQUEST_TIMEOUT = 600
+
+# Common words that are one token each in most vocabularies, so a prompt of
+# n words is roughly n tokens; the server's own prompt_n is what's reported
+_WORDS = (
+    "the of and to in is was for on that with as by at from it this be are "
+    "or an have not which but they one had all were when there can we more"
+).split()
+
+# version: 4589 (a4417ddd)
+_VERSION_RE = re.compile(r"version:\s*(\d+)\s*\((\w+)\)")
+
+
+def percentile(values, p):
+    """p-th percentile (0-100) by linear interpolation, or None if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def concurrency_levels(parallel):
+    """1, 2, 4, ... up to and including parallel."""
+    parallel = max(int(parallel or 1), 1)
+    levels = []
+    n = 1
+    while n < parallel:
+        levels.append(n)
+        n *= 2
+    levels.append(parallel)
+    return levels
+
+
+def synthetic_prompt(n_words, salt=0):
+    """A prompt of n_words words; salt makes it unique so no cache is reused."""
+    words = [f"{salt}"]
+    words += [_WORDS[(i * 7 + salt) % len(_WORDS)] for i in range(max(n_words - 1, 0))]
+    return " ".join(words)
+
+
+def server_binary_id(executable):
+    """Identifies a llama-server build, e.g. "b4589-a4417ddd".
+
+    Uses the build number and commit from --version; falls back to the
+    file name and modification time when that doesn't work.
+    """
+    try:
+        out = subprocess.run(
+            [executable, "--version"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        m = _VERSION_RE.search(out.stdout + out.stderr)
+        if m:
+            return f"b{m.group(1)}-{m.group(2)}"
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        mtime = int(os.path.getmtime(executable))
+    except OSError:
+        mtime = 0
+    return f"{os.path.basename(executable)}@{mtime}"
+
+
+def stream_completion(host, port, prompt, n_predict, timeout=REQUEST_TIMEOUT):
+    """Runs one streamed /completion request and times it.
+
+    Returns {"ttft", "itl" (list of gaps between tokens), "tokens",
+    "prompt_tokens", "prompt_tps", "gen_tps", "seconds"}; times are in
+    seconds. The server's own timings are used for the rates when it
+    sends them.
+    """
+    body = json.dumps(
+        {
+            "prompt": prompt,
+            "n_predict": n_predict,
+            "stream": True,
+            "cache_prompt": False,
+            "ignore_eos": True,
+        }
+    )
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        started = time.perf_counter()
+        conn.request("POST", "/completion", body, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}: {resp.read()[:200]!r}")
+        token_times = []
+        timings = {}
+        while True:
+            line = resp.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line.startswith(b"data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == b"[DONE]":
+                break
+            chunk = json.loads(payload)
+            if chunk.get("content"):
+                token_times.append(time.perf_counter())
+            if chunk.get("timings"):
+                timings = chunk["timings"]
+            if chunk.get("stop"):
+                break
+        finished = time.perf_counter()
+    finally:
+        conn.close()
+
+    if not token_times:
+        raise RuntimeError("No tokens received")
+    ttft = token_times[0] - started
+    itl = [b - a for a, b in zip(token_times, token_times[1:])]
+    tokens = timings.get("predicted_n") or len(token_times)
+    gen_seconds = token_times[-1] - token_times[0]
+    return {
+        "ttft": ttft,
+        "itl": itl,
+        "tokens": tokens,
+        "prompt_tokens": timings.get("prompt_n"),
+        "prompt_tps": timings.get("prompt_per_second"),
+        "gen_tps": timings.get("predicted_per_second")
+        or (len(itl) / gen_seconds if gen_seconds > 0 else None),
+        "seconds": finished - started,
+    }
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def summarize(prompt_length, concurrency, samples, errors, seconds):
+    """Aggregates stream_completion() results of one workload level."""
+    ttft = [s["ttft"] for s in samples]
+    itl = [gap for s in samples for gap in s["itl"]]
+    return {
+        "prompt_length": prompt_length,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": errors,
+        "prompt_tokens": _mean([s["prompt_tokens"] for s in samples]),
+        "prompt_tps": _mean([s["prompt_tps"] for s in samples]),
+        "gen_tps": _mean([s["gen_tps"] for s in samples]),
+        # All requests' generated tokens over the level's wall time
+        "total_gen_tps": (
+            sum(s["tokens"] for s in samples) / seconds if seconds > 0 else None
+        ),
+        "ttft_p50": percentile(ttft, 50),
+        "ttft_p90": percentile(ttft, 90),
+        "ttft_p99": percentile(ttft, 99),
+        "itl_p50": percentile(itl, 50),
+        "itl_p90": percentile(itl, 90),
+        "itl_p99": percentile(itl, 99),
+    }
+
+
+class BenchmarkRunner:
+    """Measures a running llama-server with synthetic streamed completions.
+
+    For every prompt length and concurrency level, `concurrency` requests
+    are sent at once, `rounds` times; each generates n_predict tokens with
+    prompt caching off. See summarize() for what is reported per level.
+
+    progress(done_levels, total_levels, result) is called after each level.
+    """
+
+    def __init__(
+        self,
+        port,
+        host="127.0.0.1",
+        prompt_lengths=None,
+        concurrency=None,
+        n_predict=DEFAULT_N_PREDICT,
+        rounds=1,
+        progress=None,
+    ):
+        self.port = port
+        self.host = host
+        self.prompt_lengths = prompt_lengths or DEFAULT_PROMPT_LENGTHS
+        self.concurrency = concurrency or [1]
+        self.n_predict = n_predict
+        self.rounds = max(1, rounds)
+        self.progress = progress
+        self._stop = threading.Event()
+        self._salt = itertools.count(1)
+
+    def cancel(self):
+        self._stop.set()
+
+    @property
+    def cancelled(self):
+        return self._stop.is_set()
+
+    def _request(self, prompt_length):
+        prompt = synthetic_prompt(prompt_length, next(self._salt))
+        return stream_completion(self.host, self.port, prompt, self.n_predict)
+
+    def run_level(self, prompt_length, concurrency):
+        samples = []
+        errors = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(self.rounds):
+                if self._stop.is_set():
+                    break
+                futures = [
+                    pool.submit(self._request, prompt_length)
+                    for _ in range(concurrency)
+                ]
+                for future in futures:
+                    try:
+                        samples.append(future.result())
+                    except (
+                        OSError,
+                        RuntimeError,
+                        ValueError,
+                        http.client.HTTPException,
+                    ) as e:
+                        # E.g. IncompleteRead from a server dying mid-stream
+                        print(f"Error in benchmark request: {e}")
+                        errors += 1
+        seconds = time.perf_counter() - started
+        return summarize(prompt_length, concurrency, samples, errors, seconds)
+
+    def run(self):
+        """Runs every level; blocks until done or cancelled. Returns the results."""
+        levels = [(p, c) for p in self.prompt_lengths for c in self.concurrency]
+        results = []
+        for i, (prompt_length, concurrency) in enumerate(levels):
+            if self._stop.is_set():
+                break
+            result = self.run_level(prompt_length, concurrency)
+            results.append(result)
+            if self.progress is not None:
+                self.progress(i + 1, len(levels), result)
+        return results
+
+
+class BenchmarkStore:
+    """Benchmark runs kept in benchmarks.json.
+
+    Each record has "time", "profile", "binary" (see server_binary_id()),
+    "params" (the launch parameters), "n_predict" and "results" (one dict
+    per level from summarize()), so runs can be compared per profile and
+    across llama-server builds.
+    """
+
+    MAX_RECORDS = 500
+
+    def __init__(self, filepath="benchmarks.json"):
+        self.filepath = filepath
+        self.records = []
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "r") as f:
+                    self.records = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.records = []
+        else:
+            self.records = []
+
+    def save(self):
+        try:
+            with open(self.filepath, "w") as f:
+                json.dump(self.records, f, indent=4)
+        except OSError as e:
+            print(f"Error saving benchmarks: {e}")
+
+    def record(self, entry):
+        entry = dict(entry)
+        entry.setdefault("time", time.time())
+        self.records.append(entry)
+        del self.records[: -self.MAX_RECORDS]
+        self.save()
+
+    def for_profile(self, profile, binary=None):
+        return [
+            r
+            for r in self.records
+            if r.get("profile") == profile
+            and (binary is None or r.get("binary") == binary)
+        ]
@@ -0,0 +1,180 @@
+import threading
+import time
+
+from core.autotune import _OOM_RE
+from core.residency import check_activity
+from core.server_process import FINAL_STATES, READY
+
+# Seconds the shadow server gets to become ready
+READY_TIMEOUT = 600
+# Seconds in-flight requests on the old server get to finish
+DRAIN_TIMEOUT = 120
+# Seconds between busy checks while draining
+DRAIN_INTERVAL = 0.5
+STOP_TIMEOUT = 10
+
+# Switch phases
+STARTING = "starting shadow"
+DRAINING = "draining old"
+DONE = "done"
+FALLBACK = "stop-then-start"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+def shadow_key(key):
+    return f"{key} (shadow)"
+
+
+def retired_key(key):
+    return f"{key} (retiring)"
+
+
+def profile_key(key):
+    """The profile key behind a shadow or retiring instance's key."""
+    for suffix in (" (shadow)", " (retiring)"):
+        if key.endswith(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+class BlueGreenSwitch:
+    """Relaunches a running profile with new parameters without downtime.
+
+    The new server is started next to the old one on a shadow port (the
+    supervisor moves it off the taken port) and the old one keeps serving
+    until the new one's /health is ready. The supervisor then switches the
+    profile's key over to the new instance in one step, so the proxy and
+    the launcher hand out the new port from then on, and the old instance
+    is kept as "<key> (retiring)" until its in-flight requests finish.
+
+    If has_room(params) says both can't be resident at once, or the shadow
+    server runs out of memory before it gets ready, the old server is
+    stopped and the new one started in its place instead. A shadow that
+    exits for any other reason (e.g. a bad parameter) leaves the old server
+    running and fails the switch with the shadow's log tail as error.
+    """
+
+    def __init__(
+        self,
+        supervisor,
+        key,
+        params,
+        has_room=None,
+        ready_timeout=READY_TIMEOUT,
+        drain_timeout=DRAIN_TIMEOUT,
+    ):
+        self.supervisor = supervisor
+        self.key = key
+        self.params = params
+        self.has_room = has_room
+        self.ready_timeout = ready_timeout
+        self.drain_timeout = drain_timeout
+        self.phase = None
+        self.error = None
+        self.instance = None
+        self.fell_back = False
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self):
+        return self.phase in (DONE, FAILED, CANCELLED)
+
+    def cancel(self):
+        """Abandons the shadow server if it hasn't been switched to yet."""
+        self._cancel.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        try:
+            self._run()
+        except Exception as e:
+            print(f"Error switching {self.key}: {e}")
+            self.error = str(e)
+            self.phase = FAILED
+
+    def _run(self):
+        old = self.supervisor.get(self.key)
+        if old is None or not old.is_live:
+            self._stop_then_start(None)
+            return
+        if self.has_room is not None and not self.has_room(self.params):
+            print(f"Not enough memory to run {self.key} twice, restarting it instead")
+            self._stop_then_start(old)
+            return
+
+        self.phase = STARTING
+        shadow = self.supervisor.start(shadow_key(self.key), self.params)
+        deadline = time.monotonic() + self.ready_timeout
+        while shadow.state != READY:
+            if self._cancel.is_set() or shadow.process.stop_requested:
+                self._discard(shadow)
+                self.phase = CANCELLED
+                return
+            if shadow.state in FINAL_STATES:
+                tail = shadow.process.tail(50)
+                self._discard(shadow)
+                if not _OOM_RE.search("\n".join(tail)):
+                    self.error = "\n".join(tail[-5:]) or "new server exited"
+                    self.phase = FAILED
+                    return
+                print(
+                    f"Shadow server for {self.key} ran out of memory, restarting it instead"
+                )
+                self._stop_then_start(old)
+                return
+            if time.monotonic() > deadline:
+                self._discard(shadow)
+                self.error = "new server did not become ready in time"
+                self.phase = FAILED
+                return
+            time.sleep(0.05)
+
+        old = self.supervisor.promote(
+            shadow_key(self.key), self.key, retired_key(self.key)
+        )
+        self.instance = shadow
+        print(f"{self.key} switched to port {shadow.port}")
+
+        self.phase = DRAINING
+        if old is not None and old.is_live:
+            self._drain(old)
+            self.supervisor.stop(old.key)
+            self.supervisor.wait_stopped(old, STOP_TIMEOUT)
+            self.supervisor.remove(old.key)
+        self.phase = DONE
+
+    def _drain(self, old):
+        # Requests routed just before the switch may still be on their way
+        time.sleep(DRAIN_INTERVAL)
+        deadline = time.monotonic() + self.drain_timeout
+        while time.monotonic() < deadline and old.state == READY:
+            busy, _ = check_activity(old)
+            if not busy:
+                return
+            time.sleep(DRAIN_INTERVAL)
+
+    def _discard(self, shadow):
+        self.supervisor.stop(shadow.key)
+        self.supervisor.wait_stopped(shadow, STOP_TIMEOUT)
+        self.supervisor.remove(shadow.key)
+
+    def _stop_then_start(self, old):
+        self.phase = FALLBACK
+        self.fell_back = True
+        if old is not None:
+            self.supervisor.stop(self.key)
+            self.supervisor.wait_stopped(old, STOP_TIMEOUT)
+        if self._cancel.is_set():
+            self.phase = CANCELLED
+            return
+        self.instance = self.supervisor.start(self.key, self.params)
+        self.phase = DONE
@@ -1,6 +1,9 @@
 import json
 import os
 
+# spec-type value for speculative decoding with a separate draft model
+DRAFT_MODEL_SPEC_TYPE = "draft-model"
+
 
 class CommandBuilder:
     def __init__(self, base_executable=".\\llama-server.exe", models_dir=""):
@@ -42,6 +45,13 @@ class CommandBuilder:
         if params.get("no-mmap", False):
             cmd.append("--no-mmap")
 
+        if params.get("metrics", False):
+            cmd.append("--metrics")
+
+        # Set by the SlotCache for profiles that keep their KV cache slots
+        if params.get("slot-save-path"):
+            cmd.extend(["--slot-save-path", params["slot-save-path"]])
+
         # Flash attention (on/off/auto - default is auto, so only emit if explicitly set)
         fa = params.get("flash-attn")
         if fa is True:
@@ -53,17 +63,36 @@ class CommandBuilder:
         # Speculative decoding / MTP
         spec_type = params.get("spec-type", "none")
         spec_enabled = bool(spec_type and spec_type != "none")
-        if spec_enabled:
+        # A separate draft model (-md) is enabled by passing it, not by --spec-type
+        draft_model = spec_type == DRAFT_MODEL_SPEC_TYPE
+        if draft_model and not params.get("model-draft"):
+            spec_enabled = False
+        if spec_enabled and draft_model:
+            draft_path = os.path.join(
+                self.models_dir, params["model-draft"].replace("/", os.sep)
+            )
+            cmd.extend(["-md", draft_path])
+            ngl_draft = params.get("ngl-draft")
+            if ngl_draft is not None:
+                cmd.extend(["-ngld", str(ngl_draft)])
+            ctx_draft = params.get("ctx-size-draft")
+            if ctx_draft is not None and int(ctx_draft) > 0:
+                cmd.extend(["-cd", str(ctx_draft)])
+        elif spec_enabled:
             cmd.extend(["--spec-type", spec_type])
+        if spec_enabled:
             spec_draft_n_max = params.get("spec-draft-n-max")
             if spec_draft_n_max is not None and int(spec_draft_n_max) > 0:
                 cmd.extend(["--spec-draft-n-max", str(spec_draft_n_max)])
+            spec_draft_n_min = params.get("spec-draft-n-min")
+            if spec_draft_n_min is not None and int(spec_draft_n_min) > 0:
+                cmd.extend(["--spec-draft-n-min", str(spec_draft_n_min)])
 
         # Parallel slots. MTP requires one slot; auto-set when enabled unless user overrides.
         parallel = params.get("parallel")
         if parallel is not None and int(parallel) > 0:
             cmd.extend(["--parallel", str(parallel)])
-        elif spec_enabled:
+        elif spec_enabled and not draft_model:
             cmd.extend(["--parallel", "1"])
 
         # Offload mode: --fit or manual --n-cpu-moe
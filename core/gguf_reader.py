@@ -0,0 +1,402 @@
+import hashlib
+import mmap
+import os
+import struct
+
+GGUF_MAGIC = b"GGUF"
+GGUF_DEFAULT_ALIGNMENT = 32
+
+# GGUF metadata value types
+GGUF_TYPE_UINT8 = 0
+GGUF_TYPE_INT8 = 1
+GGUF_TYPE_UINT16 = 2
+GGUF_TYPE_INT16 = 3
+GGUF_TYPE_UINT32 = 4
+GGUF_TYPE_INT32 = 5
+GGUF_TYPE_FLOAT32 = 6
+GGUF_TYPE_BOOL = 7
+GGUF_TYPE_STRING = 8
+GGUF_TYPE_ARRAY = 9
+GGUF_TYPE_UINT64 = 10
+GGUF_TYPE_INT64 = 11
+GGUF_TYPE_FLOAT64 = 12
+
+# Fixed-size scalar types -> struct format
+_SCALAR_FORMATS = {
+    GGUF_TYPE_UINT8: "<B",
+    GGUF_TYPE_INT8: "<b",
+    GGUF_TYPE_UINT16: "<H",
+    GGUF_TYPE_INT16: "<h",
+    GGUF_TYPE_UINT32: "<I",
+    GGUF_TYPE_INT32: "<i",
+    GGUF_TYPE_FLOAT32: "<f",
+    GGUF_TYPE_BOOL: "<?",
+    GGUF_TYPE_UINT64: "<Q",
+    GGUF_TYPE_INT64: "<q",
+    GGUF_TYPE_FLOAT64: "<d",
+}
+_SCALAR_SIZES = {t: struct.calcsize(f) for t, f in _SCALAR_FORMATS.items()}
+
+# Numeric arrays up to this length are kept (e.g. per-layer head counts);
+# longer ones (tokenizer scores, token types) are skipped without reading.
+MAX_KEPT_ARRAY_LEN = 1024
+
+# ggml tensor types: id -> (name, block size in elements, bytes per block)
+GGML_TYPES = {
+    0: ("F32", 1, 4),
+    1: ("F16", 1, 2),
+    2: ("Q4_0", 32, 18),
+    3: ("Q4_1", 32, 20),
+    6: ("Q5_0", 32, 22),
+    7: ("Q5_1", 32, 24),
+    8: ("Q8_0", 32, 34),
+    9: ("Q8_1", 32, 36),
+    10: ("Q2_K", 256, 84),
+    11: ("Q3_K", 256, 110),
+    12: ("Q4_K", 256, 144),
+    13: ("Q5_K", 256, 176),
+    14: ("Q6_K", 256, 210),
+    15: ("Q8_K", 256, 292),
+    16: ("IQ2_XXS", 256, 66),
+    17: ("IQ2_XS", 256, 74),
+    18: ("IQ3_XXS", 256, 98),
+    19: ("IQ1_S", 256, 50),
+    20: ("IQ4_NL", 32, 18),
+    21: ("IQ3_S", 256, 110),
+    22: ("IQ2_S", 256, 82),
+    23: ("IQ4_XS", 256, 136),
+    24: ("I8", 1, 1),
+    25: ("I16", 1, 2),
+    26: ("I32", 1, 4),
+    27: ("I64", 1, 8),
+    28: ("F64", 1, 8),
+    29: ("IQ1_M", 256, 56),
+    30: ("BF16", 1, 2),
+    34: ("TQ1_0", 256, 54),
+    35: ("TQ2_0", 256, 66),
+    39: ("MXFP4", 32, 17),
+}
+
+# general.file_type (llama_ftype) -> display name
+FILE_TYPES = {
+    0: "F32",
+    1: "F16",
+    2: "Q4_0",
+    3: "Q4_1",
+    7: "Q8_0",
+    8: "Q5_0",
+    9: "Q5_1",
+    10: "Q2_K",
+    11: "Q3_K_S",
+    12: "Q3_K_M",
+    13: "Q3_K_L",
+    14: "Q4_K_S",
+    15: "Q4_K_M",
+    16: "Q5_K_S",
+    17: "Q5_K_M",
+    18: "Q6_K",
+    19: "IQ2_XXS",
+    20: "IQ2_XS",
+    21: "Q2_K_S",
+    22: "IQ3_XS",
+    23: "IQ3_XXS",
+    24: "IQ1_S",
+    25: "IQ4_NL",
+    26: "IQ3_S",
+    27: "IQ3_M",
+    28: "IQ2_S",
+    29: "IQ2_M",
+    30: "IQ4_XS",
+    31: "IQ1_M",
+    32: "BF16",
+    36: "TQ1_0",
+    37: "TQ2_0",
+    38: "MXFP4_MOE",
+}
+
+
+def ggml_type_name(type_id):
+    entry = GGML_TYPES.get(type_id)
+    return entry[0] if entry else f"type{type_id}"
+
+
+def ggml_nbytes(type_id, n_elements):
+    """Returns the storage size in bytes of a tensor of the given ggml type."""
+    entry = GGML_TYPES.get(type_id)
+    if entry is None:
+        raise ValueError(f"Unknown ggml tensor type {type_id}")
+    _, block_size, type_size = entry
+    return (n_elements // block_size) * type_size
+
+
+class GGUFInfo:
+    """Compact per-model record parsed from a GGUF header.
+
+    kv holds the scalar metadata and small numeric arrays. tensors is a list
+    of (name, ggml_type, nbytes) tuples in file order. vocab_hash is a hash
+    of the tokenizer's token list ("" if the file has none), so models that
+    tokenize alike can be paired without keeping the vocabulary around.
+    """
+
+    __slots__ = (
+        "version",
+        "kv",
+        "tensors",
+        "n_vocab",
+        "data_offset",
+        "data_size",
+        "vocab_hash",
+    )
+
+    def __init__(
+        self,
+        version,
+        kv,
+        tensors,
+        n_vocab=0,
+        data_offset=0,
+        data_size=0,
+        vocab_hash="",
+    ):
+        self.version = version
+        self.kv = kv
+        self.tensors = tensors
+        self.n_vocab = n_vocab
+        self.data_offset = data_offset
+        self.data_size = data_size
+        self.vocab_hash = vocab_hash
+
+    def arch_value(self, key, default=None):
+        """Returns an architecture-scoped value, e.g. arch_value("block_count")."""
+        return self.kv.get(f"{self.architecture}.{key}", default)
+
+    @property
+    def architecture(self):
+        return self.kv.get("general.architecture", "")
+
+    @property
+    def name(self):
+        return self.kv.get("general.name", "")
+
+    @property
+    def block_count(self):
+        return int(self.arch_value("block_count", 0) or 0)
+
+    @property
+    def n_ctx_train(self):
+        return int(self.arch_value("context_length", 0) or 0)
+
+    @property
+    def embedding_length(self):
+        return int(self.arch_value("embedding_length", 0) or 0)
+
+    @property
+    def expert_count(self):
+        return int(self.arch_value("expert_count", 0) or 0)
+
+    @property
+    def expert_used_count(self):
+        return int(self.arch_value("expert_used_count", 0) or 0)
+
+    @property
+    def expected_file_size(self):
+        """Minimum file size needed to hold every tensor listed in the header."""
+        return self.data_offset + self.data_size
+
+    @property
+    def tensor_bytes(self):
+        return sum(t[2] for t in self.tensors)
+
+    def type_bytes(self):
+        """Returns {ggml type name: total bytes} over all tensors."""
+        totals = {}
+        for _, type_id, nbytes in self.tensors:
+            name = ggml_type_name(type_id)
+            totals[name] = totals.get(name, 0) + nbytes
+        return totals
+
+    @property
+    def quant(self):
+        """Quantization label from general.file_type, or the dominant tensor type."""
+        file_type = self.kv.get("general.file_type")
+        if file_type in FILE_TYPES:
+            return FILE_TYPES[file_type]
+        totals = self.type_bytes()
+        if not totals:
+            return ""
+        return max(totals.items(), key=lambda kv: kv[1])[0]
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "kv": self.kv,
+            "tensors": [list(t) for t in self.tensors],
+            "n_vocab": self.n_vocab,
+            "data_offset": self.data_offset,
+            "data_size": self.data_size,
+            "vocab_hash": self.vocab_hash,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("version", 0),
+            data.get("kv", {}),
+            [tuple(t) for t in data.get("tensors", [])],
+            data.get("n_vocab", 0),
+            data.get("data_offset", 0),
+            data.get("data_size", 0),
+            data.get("vocab_hash", ""),
+        )
+
+
+class _HeaderParser:
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+        self.size = len(buf)
+
+    def _need(self, n):
+        if self.pos + n > self.size:
+            raise ValueError("Truncated GGUF header")
+
+    def scalar(self, value_type):
+        fmt = _SCALAR_FORMATS[value_type]
+        n = _SCALAR_SIZES[value_type]
+        self._need(n)
+        (value,) = struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos += n
+        return value
+
+    def u32(self):
+        return self.scalar(GGUF_TYPE_UINT32)
+
+    def u64(self):
+        return self.scalar(GGUF_TYPE_UINT64)
+
+    def string(self):
+        n = self.u64()
+        self._need(n)
+        raw = self.buf[self.pos : self.pos + n]
+        self.pos += n
+        return raw.decode("utf-8", errors="replace")
+
+    def skip_string(self):
+        n = self.u64()
+        self._need(n)
+        self.pos += n
+
+    def value(self, value_type):
+        """Reads one metadata value. Returns (value, array_length)."""
+        if value_type == GGUF_TYPE_STRING:
+            return self.string(), 0
+        if value_type == GGUF_TYPE_ARRAY:
+            item_type = self.u32()
+            count = self.u64()
+            return self.array(item_type, count), count
+        if value_type in _SCALAR_FORMATS:
+            return self.scalar(value_type), 0
+        raise ValueError(f"Unknown GGUF value type {value_type}")
+
+    def array(self, item_type, count):
+        if item_type in _SCALAR_FORMATS:
+            n = _SCALAR_SIZES[item_type] * count
+            self._need(n)
+            if count > MAX_KEPT_ARRAY_LEN:
+                self.pos += n
+                return None
+            values = list(
+                struct.unpack_from(
+                    "<" + _SCALAR_FORMATS[item_type][1] * count, self.buf, self.pos
+                )
+            )
+            self.pos += n
+            return values
+        if item_type == GGUF_TYPE_STRING:
+            for _ in range(count):
+                self.skip_string()
+            return None
+        if item_type == GGUF_TYPE_ARRAY:
+            for _ in range(count):
+                self.value(GGUF_TYPE_ARRAY)
+            return None
+        raise ValueError(f"Unknown GGUF array type {item_type}")
+
+
+def parse_gguf_header(buf):
+    """Parses the header, metadata and tensor table of a GGUF buffer.
+
+    buf can be any object supporting the buffer protocol and slicing (bytes
+    or an mmap). Only the bytes covering the header are touched.
+    Raises ValueError if the buffer is not a valid GGUF file.
+    """
+    p = _HeaderParser(buf)
+    p._need(4)
+    if buf[0:4] != GGUF_MAGIC:
+        raise ValueError("Not a GGUF file")
+    p.pos = 4
+    version = p.u32()
+    if version < 2:
+        raise ValueError(f"Unsupported GGUF version {version}")
+    tensor_count = p.u64()
+    kv_count = p.u64()
+
+    kv = {}
+    n_vocab = 0
+    vocab_hash = ""
+    for _ in range(kv_count):
+        key = p.string()
+        value_type = p.u32()
+        start = p.pos
+        value, array_len = p.value(value_type)
+        if key == "tokenizer.ggml.tokens":
+            n_vocab = array_len
+            vocab_hash = hashlib.sha1(buf[start : p.pos]).hexdigest()
+        if value is not None:
+            kv[key] = value
+
+    tensors = []
+    data_size = 0
+    for _ in range(tensor_count):
+        name = p.string()
+        n_dims = p.u32()
+        n_elements = 1
+        for _ in range(n_dims):
+            n_elements *= p.u64()
+        type_id = p.u32()
+        offset = p.u64()
+        nbytes = ggml_nbytes(type_id, n_elements)
+        tensors.append((name, type_id, nbytes))
+        data_size = max(data_size, offset + nbytes)
+
+    alignment = int(kv.get("general.alignment", GGUF_DEFAULT_ALIGNMENT) or 1)
+    data_offset = p.pos + (-p.pos % alignment)
+
+    return GGUFInfo(version, kv, tensors, n_vocab, data_offset, data_size, vocab_hash)
+
+
+def vocab_compatible(target, draft):
+    """True if draft can be used as a speculative draft model for target.
+
+    Both need the same token list and the same BOS/EOS tokens, as
+    llama-server checks when pairing them.
+    """
+    if not target.vocab_hash or target.vocab_hash != draft.vocab_hash:
+        return False
+    for key in (
+        "tokenizer.ggml.model",
+        "tokenizer.ggml.bos_token_id",
+        "tokenizer.ggml.eos_token_id",
+    ):
+        if target.kv.get(key) != draft.kv.get(key):
+            return False
+    return True
+
+
+def read_gguf_info(path):
+    """Reads the GGUF header of a file via mmap without loading tensor data."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < 24:
+            raise ValueError("Not a GGUF file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_gguf_header(mm)
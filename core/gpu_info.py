@@ -0,0 +1,100 @@
+import subprocess
+
+GPU_QUERY_FIELDS = ["index", "name", "memory.total", "memory.used", "memory.free"]
+
+
+def _no_window_flags():
+    # Avoid flashing a console window when running under pythonw on Windows
+    return getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+
+def parse_gpu_query(text, fields=GPU_QUERY_FIELDS):
+    """Parses `nvidia-smi --query-gpu=... --format=csv,noheader,nounits` output.
+
+    Returns one dict per GPU keyed by field name. Numeric values become
+    floats (ints for "index"); "[N/A]" style values become None.
+    """
+    gpus = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        values = [v.strip() for v in line.split(",")]
+        if len(values) != len(fields):
+            continue
+        gpu = {}
+        for field, value in zip(fields, values):
+            if field == "name":
+                gpu[field] = value
+                continue
+            try:
+                gpu[field] = int(value) if field == "index" else float(value)
+            except ValueError:
+                gpu[field] = None
+        gpus.append(gpu)
+    return gpus
+
+
+def query_gpus(fields=GPU_QUERY_FIELDS, timeout=5):
+    """Queries nvidia-smi for the given fields. Returns [] if unavailable."""
+    try:
+        out = subprocess.run(
+            [
+                "nvidia-smi",
+                "--query-gpu=" + ",".join(fields),
+                "--format=csv,noheader,nounits",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            creationflags=_no_window_flags(),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return []
+    if out.returncode != 0:
+        return []
+    return parse_gpu_query(out.stdout, fields)
+
+
+def parse_compute_apps(text):
+    """Parses `nvidia-smi --query-compute-apps=pid,used_memory` CSV output.
+
+    Returns {pid: MiB} summed over GPUs; processes whose usage isn't
+    reported (e.g. WDDM on Windows) map to None.
+    """
+    usage = {}
+    for line in text.splitlines():
+        values = [v.strip() for v in line.split(",")]
+        if len(values) != 2:
+            continue
+        try:
+            pid = int(values[0])
+        except ValueError:
+            continue
+        try:
+            mib = float(values[1])
+        except ValueError:
+            usage.setdefault(pid, None)
+            continue
+        usage[pid] = (usage.get(pid) or 0.0) + mib
+    return usage
+
+
+def query_gpu_processes(timeout=5):
+    """VRAM used per process from nvidia-smi. Returns {} if unavailable."""
+    try:
+        out = subprocess.run(
+            [
+                "nvidia-smi",
+                "--query-compute-apps=pid,used_memory",
+                "--format=csv,noheader,nounits",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            creationflags=_no_window_flags(),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    if out.returncode != 0:
+        return {}
+    return parse_compute_apps(out.stdout)
@@ -0,0 +1,202 @@
+import threading
+import time
+
+from core.gpu_info import query_gpus
+from core.metrics import SERIES_CAPACITY, RingBuffer
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+# Seconds between samples unless configured otherwise
+DEFAULT_INTERVAL = 1.0
+# Seconds stop() waits for a sample in progress (nvidia-smi's own timeout)
+STOP_TIMEOUT = 5.0
+
+TELEMETRY_FIELDS = [
+    "index",
+    "name",
+    "memory.total",
+    "memory.used",
+    "utilization.gpu",
+    "power.draw",
+    "clocks.sm",
+    "clocks.mem",
+]
+
+# Series kept per GPU (keyed by nvidia-smi field), in display order
+GPU_SERIES = [
+    ("memory.used", "VRAM MiB"),
+    ("utilization.gpu", "Util %"),
+    ("power.draw", "Power W"),
+    ("clocks.sm", "SM MHz"),
+    ("clocks.mem", "Mem MHz"),
+]
+
+
+def _nvml_value(read):
+    try:
+        return read()
+    except pynvml.NVMLError:
+        return None
+
+
+def query_nvml():
+    """Samples every GPU through NVML, shaped like query_gpus() results.
+
+    Memory is in MiB, power in W and clocks in MHz, as nvidia-smi reports
+    them with nounits. Values a GPU doesn't support are None.
+    """
+    gpus = []
+    for index in range(pynvml.nvmlDeviceGetCount()):
+        handle = pynvml.nvmlDeviceGetHandleByIndex(index)
+        name = pynvml.nvmlDeviceGetName(handle)
+        if isinstance(name, bytes):
+            name = name.decode("utf-8", errors="replace")
+        mem = _nvml_value(lambda: pynvml.nvmlDeviceGetMemoryInfo(handle))
+        util = _nvml_value(lambda: pynvml.nvmlDeviceGetUtilizationRates(handle))
+        power = _nvml_value(lambda: pynvml.nvmlDeviceGetPowerUsage(handle))
+        gpus.append(
+            {
+                "index": index,
+                "name": name,
+                "memory.total": mem.total / 1024**2 if mem else None,
+                "memory.used": mem.used / 1024**2 if mem else None,
+                "utilization.gpu": float(util.gpu) if util else None,
+                "power.draw": power / 1000 if power is not None else None,
+                "clocks.sm": _nvml_value(
+                    lambda: pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_SM)
+                ),
+                "clocks.mem": _nvml_value(
+                    lambda: pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_MEM)
+                ),
+            }
+        )
+    return gpus
+
+
+class GpuSeries:
+    """Sampled telemetry of one GPU in fixed-size ring buffers."""
+
+    def __init__(self, index, name, capacity=SERIES_CAPACITY):
+        self.index = index
+        self.name = name
+        self.total = None
+        self.times = RingBuffer(capacity)
+        self.series = {field: RingBuffer(capacity) for field, _ in GPU_SERIES}
+
+    def values(self, field):
+        return self.series[field].values()
+
+    def last(self, field):
+        return self.series[field].last()
+
+    @property
+    def free(self):
+        """MiB of VRAM free at the last sample, or None."""
+        used = self.last("memory.used")
+        if self.total is None or used is None:
+            return None
+        return max(self.total - used, 0.0)
+
+
+class GpuTelemetry:
+    """Samples GPU memory, utilization, power and clocks in the background.
+
+    Uses NVML when the optional pynvml package is installed, else
+    `nvidia-smi --query-gpu=... --format=csv,noheader,nounits`, every
+    interval seconds (changeable while running). gpus maps the GPU index
+    to its GpuSeries; available is None before the first sample and False
+    while no GPU can be queried.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, capacity=SERIES_CAPACITY):
+        self.interval = interval
+        self.capacity = capacity
+        self.gpus = {}
+        self.available = None
+        self.backend = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def update(self, samples, now=None):
+        """Adds one sample per GPU from query_gpus()/query_nvml() results."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.available = bool(samples)
+            for sample in samples:
+                gpu = self.gpus.get(sample["index"])
+                if gpu is None:
+                    gpu = GpuSeries(sample["index"], sample["name"], self.capacity)
+                    self.gpus[sample["index"]] = gpu
+                gpu.total = sample.get("memory.total")
+                gpu.times.append(now)
+                for field, buf in gpu.series.items():
+                    buf.append(sample.get(field))
+
+    def _open_backend(self):
+        if pynvml is not None:
+            try:
+                pynvml.nvmlInit()
+                self.backend = "nvml"
+                return
+            except pynvml.NVMLError:
+                pass
+        self.backend = "nvidia-smi"
+
+    def sample(self):
+        if self.backend is None:
+            self._open_backend()
+        if self.backend == "nvml":
+            try:
+                samples = query_nvml()
+            except pynvml.NVMLError as e:
+                print(f"Error querying NVML: {e}")
+                samples = []
+        else:
+            samples = query_gpus(TELEMETRY_FIELDS)
+        self.update(samples)
+
+    def snapshot(self):
+        """The GpuSeries of all sampled GPUs, by index."""
+        with self._lock:
+            return [self.gpus[i] for i in sorted(self.gpus)]
+
+    def headroom(self):
+        """{GPU index: free VRAM MiB} at the last sample (None if unknown)."""
+        with self._lock:
+            return {i: gpu.free for i, gpu in sorted(self.gpus.items())}
+
+    def _loop(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling GPU telemetry: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Stops sampling; NVML is shut down once no sample is in progress."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print("GPU telemetry still sampling; leaving NVML initialized")
+                return
+            self._thread = None
+        if self.backend == "nvml":
+            try:
+                pynvml.nvmlShutdown()
+            except pynvml.NVMLError:
+                pass
+            self.backend = None
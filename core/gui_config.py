@@ -26,7 +26,7 @@ DEFAULT_PARAMS = [
         "key": "spec-type",
         "type": "combo",
         "default": "none",
-        "options": ["none", "draft-mtp", "draft-mtp,ngram-mod"],
+        "options": ["none", "draft-mtp", "draft-mtp,ngram-mod", "draft-model"],
     },
     {
         "label": "Spec Draft Max",
@@ -34,6 +34,37 @@ DEFAULT_PARAMS = [
         "type": "int",
         "default": 2,
     },
+    {
+        "label": "Spec Draft Min",
+        "key": "spec-draft-n-min",
+        "type": "int",
+        "default": 0,
+    },
+    {
+        "label": "Auto Draft Max (best measured)",
+        "key": "spec-auto-draft",
+        "type": "bool",
+        "default": False,
+    },
+    {
+        "label": "Draft Model (-md)",
+        "key": "model-draft",
+        "type": "combo",
+        "default": "",
+        "options": [""],
+    },
+    {
+        "label": "Draft GPU Layers (-ngld)",
+        "key": "ngl-draft",
+        "type": "int",
+        "default": 999,
+    },
+    {
+        "label": "Draft Context (-cd, 0=same)",
+        "key": "ctx-size-draft",
+        "type": "int",
+        "default": 0,
+    },
     {
         "label": "Offload Mode",
         "key": "offload-mode",
@@ -81,6 +112,43 @@ DEFAULT_PARAMS = [
         "type": "bool",
         "default": False,
     },
+    {
+        "label": "Prometheus Metrics (--metrics)",
+        "key": "metrics",
+        "type": "bool",
+        "default": False,
+    },
+    {
+        "label": "Persist KV Cache Slots",
+        "key": "slot-cache",
+        "type": "bool",
+        "default": False,
+    },
+    {
+        "label": "Prewarm Page Cache",
+        "key": "prewarm",
+        "type": "bool",
+        "default": False,
+    },
+    {
+        "label": "Idle Unload After (min, 0 = never)",
+        "key": "idle-ttl",
+        "type": "int",
+        "default": 0,
+    },
+    {
+        "label": "Keep Resident (never unload)",
+        "key": "pin-resident",
+        "type": "bool",
+        "default": False,
+    },
+    {
+        "label": "Restart Policy",
+        "key": "restart-policy",
+        "type": "combo",
+        "default": "never",
+        "options": ["never", "on-failure", "always"],
+    },
     {
         "label": "Reasoning Format",
         "key": "reasoning-format",
@@ -0,0 +1,58 @@
+import json
+import os
+import time
+
+
+class LaunchHistory:
+    """Per-launch timing records kept in launch_history.json.
+
+    Each record is a dict with "time" (unix seconds), "profile", "model",
+    "models_dir", "prewarm", "outcome" (the state the launch reached, e.g.
+    "ready" or "crashed"), "time_to_ready" and "load_seconds" (seconds or
+    None), so load latency can be compared across profiles and storage.
+    """
+
+    MAX_RECORDS = 1000
+
+    def __init__(self, filepath="launch_history.json"):
+        self.filepath = filepath
+        self.records = []
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "r") as f:
+                    self.records = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.records = []
+        else:
+            self.records = []
+
+    def save(self):
+        try:
+            with open(self.filepath, "w") as f:
+                json.dump(self.records, f, indent=4)
+        except OSError as e:
+            print(f"Error saving launch history: {e}")
+
+    def record(self, entry):
+        entry = dict(entry)
+        entry.setdefault("time", time.time())
+        self.records.append(entry)
+        del self.records[: -self.MAX_RECORDS]
+        self.save()
+
+    def for_profile(self, profile):
+        return [r for r in self.records if r.get("profile") == profile]
+
+    def average_time_to_ready(self, profile, last=5):
+        """Mean time_to_ready over the profile's last successful launches."""
+        times = [
+            r["time_to_ready"]
+            for r in self.for_profile(profile)
+            if r.get("time_to_ready") is not None
+        ][-last:]
+        if not times:
+            return None
+        return sum(times) / len(times)
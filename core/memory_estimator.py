@@ -0,0 +1,320 @@
+import re
+
+from core.command_builder import DRAFT_MODEL_SPEC_TYPE
+
+MIB = 1024**2
+GIB = 1024**3
+
+# KV cache types (-ctk/-ctv) -> (block size in elements, bytes per block)
+CACHE_TYPES = {
+    "f32": (1, 4),
+    "f16": (1, 2),
+    "bf16": (1, 2),
+    "q8_0": (32, 34),
+    "q4_0": (32, 18),
+    "q4_1": (32, 20),
+    "iq4_nl": (32, 18),
+    "q5_0": (32, 22),
+    "q5_1": (32, 24),
+}
+DEFAULT_CACHE_TYPE = "f16"
+
+# llama.cpp pads the context to a multiple of this many cells
+CTX_PAD = 256
+# Slots llama-server creates when --parallel is left on auto
+AUTO_PARALLEL = 4
+# Rough per-GPU cost of the CUDA/driver context, outside llama.cpp's buffers
+GPU_CONTEXT_OVERHEAD = 384 * MIB
+
+_LAYER_RE = re.compile(r"^blk\.(\d+)\.")
+_EXPS_RE = re.compile(r"\.ffn_[a-z_]*_exps\.")
+
+
+def _pad(n, multiple):
+    return (n + multiple - 1) // multiple * multiple
+
+
+def _int(params, key, default=0):
+    try:
+        return int(params.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def cache_type_bytes(name, n_elements):
+    block, size = CACHE_TYPES.get(name or DEFAULT_CACHE_TYPE, CACHE_TYPES["f16"])
+    return (n_elements + block - 1) // block * size
+
+
+def _per_layer(info, key, il, default=0):
+    """Reads a hyperparameter that may be stored per layer as an array."""
+    value = info.arch_value(key, default)
+    if isinstance(value, list):
+        return value[il] if il < len(value) else default
+    return value
+
+
+def resolve_parallel(params):
+    """Number of slots llama-server will create, mirroring CommandBuilder."""
+    parallel = _int(params, "parallel")
+    if parallel > 0:
+        return parallel
+    spec_type = params.get("spec-type", "none")
+    if spec_type and spec_type not in ("none", DRAFT_MODEL_SPEC_TYPE):
+        return 1
+    return AUTO_PARALLEL
+
+
+def gpu_split(params, n_gpus=1):
+    """Returns [(device name, fraction)] for the GPUs layers are spread over."""
+    main_gpu = _int(params, "main-gpu")
+    split_mode = params.get("split-mode", "none")
+    ts = str(params.get("ts") or "").replace("/", ",")
+    weights = []
+    for part in ts.split(","):
+        try:
+            weights.append(float(part))
+        except ValueError:
+            pass
+
+    if split_mode == "none" or (not weights and n_gpus <= 1):
+        return [(f"GPU{main_gpu}", 1.0)]
+    if not weights:
+        weights = [1.0] * n_gpus
+    total = sum(weights) or 1.0
+    return [(f"GPU{i}", w / total) for i, w in enumerate(weights) if w > 0]
+
+
+def layer_kinds(info):
+    """Classifies each layer as "attn", "swa" (sliding window) or "recurrent"."""
+    n_layer = info.block_count
+    interval = int(info.arch_value("full_attention_interval", 0) or 0)
+    pattern = info.arch_value("attention.sliding_window_pattern")
+    has_swa = int(info.arch_value("attention.sliding_window", 0) or 0) > 0
+    has_attn = info.arch_value("attention.head_count") is not None
+
+    kinds = []
+    for il in range(n_layer):
+        if not has_attn:
+            kinds.append("recurrent")
+        elif interval and (il + 1) % interval != 0:
+            kinds.append("recurrent")
+        elif int(_per_layer(info, "attention.head_count_kv", il, 1) or 0) == 0:
+            kinds.append("recurrent")
+        elif has_swa and isinstance(pattern, list):
+            kinds.append("swa" if il < len(pattern) and pattern[il] else "attn")
+        elif has_swa and isinstance(pattern, int) and pattern > 0:
+            kinds.append("attn" if (il + 1) % pattern == 0 else "swa")
+        elif has_swa:
+            kinds.append("swa")
+        else:
+            kinds.append("attn")
+    return kinds
+
+
+def kv_bytes_per_layer(info, params, n_ctx):
+    """Returns a list with the KV/recurrent state bytes of each layer."""
+    n_seq = resolve_parallel(params)
+    unified = _int(params, "parallel") <= 0
+    ub = _int(params, "ub", 512) or 512
+    n_embd = info.embedding_length
+    n_swa = int(info.arch_value("attention.sliding_window", 0) or 0)
+    swa_cells = min(n_ctx, _pad(n_swa * (1 if unified else n_seq) + ub, CTX_PAD))
+
+    # Recurrent (SSM / linear attention) state, stored in f32 per sequence
+    d_conv = int(info.arch_value("ssm.conv_kernel", 0) or 0)
+    d_inner = int(info.arch_value("ssm.inner_size", 0) or 0)
+    d_state = int(info.arch_value("ssm.state_size", 0) or 0)
+    n_group = int(info.arch_value("ssm.group_count", 0) or 0)
+    recurrent = (
+        (max(d_conv - 1, 0) * (d_inner + 2 * n_group * d_state) + d_state * d_inner)
+        * 4
+        * n_seq
+    )
+
+    sizes = []
+    for il, kind in enumerate(layer_kinds(info)):
+        if kind == "recurrent":
+            sizes.append(recurrent)
+            continue
+        n_head = int(_per_layer(info, "attention.head_count", il, 1) or 1)
+        n_head_kv = int(_per_layer(info, "attention.head_count_kv", il, n_head) or 0)
+        head_k = int(info.arch_value("attention.key_length", 0) or n_embd // n_head)
+        head_v = int(info.arch_value("attention.value_length", 0) or n_embd // n_head)
+        cells = swa_cells if kind == "swa" else n_ctx
+        sizes.append(
+            cache_type_bytes(params.get("ctk"), n_head_kv * head_k * cells)
+            + cache_type_bytes(params.get("ctv"), n_head_kv * head_v * cells)
+        )
+    return sizes
+
+
+def _compute_bytes(info, params, n_ctx, with_output):
+    """Heuristic size of one device's compute buffer for a micro-batch."""
+    ub = _int(params, "ub", 512) or 512
+    n_embd = info.embedding_length
+    n_ff = _per_layer(info, "feed_forward_length", 0, 0) or 0
+    n_ff_exp = int(info.arch_value("expert_feed_forward_length", 0) or 0)
+    n_ff = max(int(n_ff), n_ff_exp * info.expert_used_count)
+    size = ub * 4 * (4 * n_embd + 2 * n_ff)
+    if with_output:
+        size += ub * 4 * info.n_vocab
+    if params.get("flash-attn") is False:
+        n_head = int(_per_layer(info, "attention.head_count", 0, 1) or 1)
+        size += ub * n_ctx * n_head * 4
+    return size
+
+
+def draft_params(params):
+    """Parameters the draft model of a profile is loaded with."""
+    return {
+        "ctx-size": _int(params, "ctx-size-draft") or _int(params, "ctx-size"),
+        "ngl": _int(params, "ngl-draft", 999),
+        "parallel": params.get("parallel"),
+        "spec-type": DRAFT_MODEL_SPEC_TYPE,
+        "ub": params.get("ub"),
+        "flash-attn": params.get("flash-attn"),
+        "ts": params.get("ts"),
+        "split-mode": params.get("split-mode"),
+        "main-gpu": params.get("main-gpu"),
+    }
+
+
+def estimate_memory(info, params, mmproj_info=None, n_gpus=1, draft_info=None):
+    """Estimates memory use per device for launching a model with params.
+
+    info is the model's GGUFInfo (combined across shards); params is the
+    form/profile parameter dict. In fit mode the estimate assumes a full
+    offload, i.e. what --fit would need to avoid spilling to the CPU.
+    draft_info is the GGUFInfo of a speculative draft model, if any; its
+    weights, KV cache and buffers (see draft_params()) count as "draft".
+
+    Returns {"devices": {name: {"weights", "kv", "compute", "mmproj",
+    "draft", "overhead", "total"}}, "n_ctx", "n_gpu_layers", "n_layer"}
+    with sizes in bytes. "CPU" is host RAM (mmapped weights count towards
+    it).
+    """
+    n_layer = info.block_count
+    n_ctx = _int(params, "ctx-size") or info.n_ctx_train or 4096
+    n_ctx = _pad(n_ctx, CTX_PAD)
+
+    if params.get("offload-mode") == "fit":
+        ngl, n_cpu_moe = n_layer + 1, 0
+    else:
+        ngl = _int(params, "ngl", 999)
+        if ngl < 0:
+            ngl = n_layer + 1
+        n_cpu_moe = _int(params, "n-cpu-moe")
+    ngl = min(ngl, n_layer + 1)
+    first_gpu_layer = n_layer - min(ngl, n_layer)
+    output_on_gpu = ngl > n_layer
+
+    split = gpu_split(params, n_gpus)
+    main_device = split[0][0]
+
+    def layer_device(il):
+        if il < first_gpu_layer:
+            return "CPU"
+        frac = (il - first_gpu_layer) / max(n_layer - first_gpu_layer, 1)
+        acc = 0.0
+        for device, share in split:
+            acc += share
+            if frac < acc:
+                return device
+        return split[-1][0]
+
+    devices = {}
+
+    def add(device, field, nbytes):
+        dev = devices.setdefault(
+            device,
+            {
+                "weights": 0,
+                "kv": 0,
+                "compute": 0,
+                "mmproj": 0,
+                "draft": 0,
+                "overhead": 0,
+            },
+        )
+        dev[field] += nbytes
+
+    add("CPU", "weights", 0)
+    has_output = False
+    token_embd = 0
+    for name, _, nbytes in info.tensors:
+        m = _LAYER_RE.match(name)
+        if m:
+            il = int(m.group(1))
+            if il < n_cpu_moe and _EXPS_RE.search(name):
+                add("CPU", "weights", nbytes)
+            else:
+                add(layer_device(il), "weights", nbytes)
+        elif name.startswith("output"):
+            has_output = has_output or name == "output.weight"
+            add(main_device if output_on_gpu else "CPU", "weights", nbytes)
+        else:
+            if name == "token_embd.weight":
+                token_embd = nbytes
+            # Input embeddings and other global tensors stay on the host
+            add("CPU", "weights", nbytes)
+    if output_on_gpu and not has_output:
+        # Tied embeddings: the output projection is a GPU copy of token_embd
+        add(main_device, "weights", token_embd)
+
+    for il, nbytes in enumerate(kv_bytes_per_layer(info, params, n_ctx)):
+        add(layer_device(il), "kv", nbytes)
+
+    for device, _ in split:
+        if device in devices:
+            with_output = output_on_gpu and device == main_device
+            add(device, "compute", _compute_bytes(info, params, n_ctx, with_output))
+            add(device, "overhead", GPU_CONTEXT_OVERHEAD)
+    if first_gpu_layer > 0 or n_cpu_moe > 0 or not output_on_gpu:
+        add("CPU", "compute", _compute_bytes(info, params, n_ctx, not output_on_gpu))
+    # Logits output buffer, one row per slot
+    add("CPU", "compute", info.n_vocab * 4 * resolve_parallel(params))
+
+    if mmproj_info is not None:
+        add(main_device, "mmproj", mmproj_info.tensor_bytes)
+
+    if draft_info is not None:
+        draft = estimate_memory(draft_info, draft_params(params), n_gpus=n_gpus)
+        for device, dev in draft["devices"].items():
+            # The draft shares the target's CUDA context
+            add(device, "draft", dev["total"] - dev["overhead"])
+
+    for dev in devices.values():
+        dev["total"] = sum(dev.values())
+
+    return {
+        "devices": devices,
+        "n_ctx": n_ctx,
+        "n_gpu_layers": ngl,
+        "n_layer": n_layer,
+    }
+
+
+def gpu_total(estimate):
+    """Sum of estimated bytes across all GPU devices."""
+    return sum(d["total"] for name, d in estimate["devices"].items() if name != "CPU")
+
+
+def format_estimate(estimate):
+    """One-line human-readable summary of an estimate_memory() result."""
+    parts = []
+    devices = estimate["devices"]
+    for name in sorted(devices, key=lambda n: (n == "CPU", n)):
+        dev = devices[name]
+        label = "RAM" if name == "CPU" else name
+        detail = f"weights {dev['weights'] / GIB:.1f}"
+        if dev["kv"]:
+            detail += f", KV {dev['kv'] / GIB:.2f}"
+        if dev["compute"]:
+            detail += f", compute {dev['compute'] / GIB:.2f}"
+        if dev["mmproj"]:
+            detail += f", mmproj {dev['mmproj'] / GIB:.2f}"
+        if dev["draft"]:
+            detail += f", draft {dev['draft'] / GIB:.2f}"
+        parts.append(f"{label}: {dev['total'] / GIB:.1f} GiB ({detail})")
+    return " | ".join(parts)
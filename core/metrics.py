@@ -0,0 +1,162 @@
+import array
+import csv
+import http.client
+import math
+import threading
+import time
+
+# Samples kept per series (30 minutes at the supervisor's 2 s interval)
+SERIES_CAPACITY = 900
+
+# Series recorded from llama-server's /metrics, in display order
+SERIES = [
+    ("prompt_tps", "Prompt tok/s"),
+    ("gen_tps", "Gen tok/s"),
+    ("requests_processing", "Processing"),
+    ("requests_deferred", "Deferred"),
+    ("kv_cache_usage", "KV cache %"),
+]
+
+_PROMPT_TOKENS = "llamacpp:prompt_tokens_total"
+_GEN_TOKENS = "llamacpp:tokens_predicted_total"
+_GAUGES = {
+    "requests_processing": "llamacpp:requests_processing",
+    "requests_deferred": "llamacpp:requests_deferred",
+}
+_KV_USAGE = "llamacpp:kv_cache_usage_ratio"
+
+
+def parse_prometheus(text):
+    """{metric name: float} from Prometheus text exposition.
+
+    Labels are dropped (llama-server doesn't use them); comments and
+    unparsable samples are skipped.
+    """
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        name = parts[0].split("{", 1)[0]
+        try:
+            values[name] = float(parts[1])
+        except ValueError:
+            pass
+    return values
+
+
+class RingBuffer:
+    """Fixed-size series of floats backed by array('d').
+
+    Appending past capacity overwrites the oldest value; missing samples
+    are stored as NaN.
+    """
+
+    def __init__(self, capacity=SERIES_CAPACITY):
+        self.capacity = capacity
+        self._data = array.array("d", [math.nan]) * capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        self._data[self._next] = math.nan if value is None else value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def values(self):
+        """Values oldest first."""
+        if self._count < self.capacity:
+            return self._data[: self._count].tolist()
+        return (self._data[self._next :] + self._data[: self._next]).tolist()
+
+    def last(self):
+        if not self._count:
+            return None
+        value = self._data[self._next - 1]
+        return None if math.isnan(value) else value
+
+
+class MetricsSeries:
+    """Time series of one llama-server's /metrics (needs --metrics).
+
+    Each scrape appends one sample to every series: prompt and generation
+    tokens per second (from the token counters' change since the previous
+    scrape), requests processing and deferred, and KV cache usage in
+    percent (NaN when the server doesn't report it).
+    """
+
+    def __init__(self, capacity=SERIES_CAPACITY):
+        self.times = RingBuffer(capacity)
+        self.series = {name: RingBuffer(capacity) for name, _ in SERIES}
+        self.available = None
+        self._counters = None
+        self._lock = threading.Lock()
+
+    def update(self, values, now=None):
+        """Adds a sample from parsed /metrics values."""
+        now = time.time() if now is None else now
+        counters = (now, values.get(_PROMPT_TOKENS), values.get(_GEN_TOKENS))
+        previous = self._counters
+        self._counters = counters
+
+        sample = {name: values.get(metric) for name, metric in _GAUGES.items()}
+        kv = values.get(_KV_USAGE)
+        sample["kv_cache_usage"] = kv * 100 if kv is not None else None
+        for name, index in (("prompt_tps", 1), ("gen_tps", 2)):
+            rate = None
+            if previous is not None and None not in (counters[index], previous[index]):
+                elapsed = now - previous[0]
+                delta = counters[index] - previous[index]
+                # A counter going down means the server was restarted
+                if elapsed > 0 and delta >= 0:
+                    rate = delta / elapsed
+            sample[name] = rate
+
+        with self._lock:
+            self.times.append(now)
+            for name, buf in self.series.items():
+                buf.append(sample[name])
+
+    def scrape(self, port, host="127.0.0.1", timeout=2.0):
+        """GETs /metrics and records a sample; False if it isn't served."""
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        try:
+            conn.request("GET", "/metrics")
+            resp = conn.getresponse()
+            body = resp.read()
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+        self.available = resp.status == 200
+        if self.available:
+            self.update(parse_prometheus(body.decode("utf-8", errors="replace")))
+        return self.available
+
+    def values(self, name):
+        with self._lock:
+            return self.series[name].values()
+
+    def last(self, name):
+        with self._lock:
+            return self.series[name].last()
+
+    def export_csv(self, path):
+        """Writes every sample with its unix time to a CSV file."""
+        with self._lock:
+            times = self.times.values()
+            columns = [self.series[name].values() for name, _ in SERIES]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time"] + [name for name, _ in SERIES])
+            for i, t in enumerate(times):
+                row = [f"{t:.3f}"]
+                for column in columns:
+                    value = column[i]
+                    row.append("" if math.isnan(value) else f"{value:.3f}")
+                writer.writerow(row)
@@ -0,0 +1,313 @@
+import http.client
+import http.server
+import json
+import os
+import threading
+import time
+import weakref
+
+from core.server_process import FINAL_STATES, READY
+
+DEFAULT_PROXY_PORT = 8000
+# Seconds a request waits for its model to become ready
+LOAD_TIMEOUT = 600
+# Seconds a swap waits for in-flight requests on other models to finish
+DRAIN_TIMEOUT = 120
+# Bytes forwarded per read when streaming a response back
+STREAM_CHUNK = 64 * 1024
+
+# Hop-by-hop headers that must not be forwarded
+_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-connection",
+    "transfer-encoding",
+    "te",
+    "trailer",
+    "upgrade",
+    "content-length",
+    "host",
+}
+
+
+class ProxyError(Exception):
+    def __init__(self, status, message, code=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class ModelProxy:
+    """One OpenAI-compatible endpoint in front of all profiles.
+
+    Requests are routed by their JSON "model" field to the profile of that
+    name (or whose model file name matches). A profile that isn't running
+    is started through the supervisor and the request is held until its
+    /health reports ready; responses, including SSE streams, are passed
+    through as they arrive. With exclusive set, starting a model first
+    stops the other instances the proxy started, once their in-flight
+    requests have finished, so only the model in use holds the GPU.
+    """
+
+    def __init__(
+        self,
+        supervisor,
+        profile_manager,
+        host="127.0.0.1",
+        port=DEFAULT_PROXY_PORT,
+        exclusive=True,
+        load_timeout=LOAD_TIMEOUT,
+    ):
+        self.supervisor = supervisor
+        self.profile_manager = profile_manager
+        self.host = host
+        self.port = port
+        self.exclusive = exclusive
+        self.load_timeout = load_timeout
+        self.started_keys = set()
+        self._inflight = {}
+        # Processes stopped by a swap; requests for them start them again
+        self._swapped_out = weakref.WeakSet()
+        self._cond = threading.Condition()
+        self._swap_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        proxy = self
+
+        class Handler(_ProxyHandler):
+            pass
+
+        Handler.proxy = proxy
+        self._server = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+
+    def model_ids(self):
+        return self.profile_manager.get_profile_names()
+
+    def resolve(self, model):
+        """Profile name for a request's model field, or None."""
+        names = self.profile_manager.get_profile_names()
+        if model in names:
+            return model
+        for name in names:
+            profile = self.profile_manager.get_profile(name) or {}
+            path = profile.get("parameters", {}).get("model") or ""
+            base = os.path.basename(path)
+            if model and model in (base, os.path.splitext(base)[0]):
+                return name
+        return None
+
+    def _evict_others(self, key):
+        """Stops other proxy-started instances once they're idle."""
+        others = [k for k in self.started_keys if k != key]
+        for other in others:
+            inst = self.supervisor.get(other)
+            if inst is not None and inst.is_live:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: not self._inflight.get(other), DRAIN_TIMEOUT
+                    )
+                    self._swapped_out.add(inst.process)
+                self.supervisor.stop(other)
+                self.supervisor.wait_stopped(inst)
+            self.started_keys.discard(other)
+
+    def _count_live(self, key):
+        """Counts a request on the profile's live instance; None if not live."""
+        with self._cond:
+            inst = self.supervisor.get(key)
+            if inst is None or not inst.is_live or inst.process in self._swapped_out:
+                return None
+            self._inflight[key] = self._inflight.get(key, 0) + 1
+            return inst
+
+    def _claim(self, key):
+        """Starts the profile if needed and counts a request on it."""
+        inst = self._count_live(key)
+        if inst is not None:
+            return inst
+        profile = self.profile_manager.get_profile(key) or {}
+        with self._swap_lock:
+            inst = self._count_live(key)
+            if inst is not None:
+                return inst
+            if self.exclusive:
+                self._evict_others(key)
+            try:
+                inst = self.supervisor.start(key, profile.get("parameters", {}))
+            except Exception as e:
+                # E.g. no free port or a bad parameter; answer with a JSON error
+                print(f"Error starting {key} for the proxy: {e}")
+                raise ProxyError(503, f"Model '{key}' could not be started: {e}")
+            self.started_keys.add(key)
+            with self._cond:
+                self._inflight[key] = self._inflight.get(key, 0) + 1
+            return inst
+
+    def _touch(self, key):
+        inst = self.supervisor.get(key)
+        if inst is not None:
+            inst.touch()
+
+    def acquire(self, key):
+        """Starts the profile if needed and waits until it's ready.
+
+        The request counts as in flight from the moment its model runs, so
+        a swap lets a loading model serve the requests waiting for it, but
+        requests whose model isn't running yet never hold up a swap. If a
+        swap stops the model anyway, it is started again. Returns the
+        instance; call release(key) when done.
+        """
+        deadline = time.monotonic() + self.load_timeout
+        while True:
+            inst = self._claim(key)
+            while inst.state not in FINAL_STATES:
+                if inst.state == READY:
+                    self._touch(key)
+                    return inst
+                if time.monotonic() > deadline:
+                    self.release(key)
+                    raise ProxyError(504, f"Model '{key}' did not become ready in time")
+                time.sleep(0.05)
+            self.release(key)
+            if inst.process not in self._swapped_out:
+                tail = "\n".join(inst.process.tail(5))
+                raise ProxyError(503, f"Model '{key}' failed to start:\n{tail}")
+
+    def release(self, key):
+        with self._cond:
+            self._inflight[key] -= 1
+            self._cond.notify_all()
+        self._touch(key)
+
+
+class _ProxyHandler(http.server.BaseHTTPRequestHandler):
+    proxy = None
+    # Responses are streamed until the connection closes
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message, code=None):
+        self._send_json(
+            status,
+            {
+                "error": {
+                    "message": message,
+                    "type": "invalid_request_error" if status < 500 else "server_error",
+                    "code": code,
+                }
+            },
+        )
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/v1/models", "/models"):
+            now = int(time.time())
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": [
+                        {
+                            "id": name,
+                            "object": "model",
+                            "created": now,
+                            "owned_by": "llamacpp-launcher",
+                        }
+                        for name in self.proxy.model_ids()
+                    ],
+                },
+            )
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_error(404, f"Unknown endpoint {self.path}")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            model = json.loads(body or b"{}").get("model")
+        except (ValueError, AttributeError):
+            self._send_error(400, "Request body must be a JSON object")
+            return
+
+        key = self.proxy.resolve(model)
+        if key is None:
+            self._send_error(
+                404, f"Model '{model}' does not match any profile", "model_not_found"
+            )
+            return
+
+        self._streaming = False
+        inst = None
+        try:
+            inst = self.proxy.acquire(key)
+            self._forward(inst.port, body)
+        except ProxyError as e:
+            self._send_error(e.status, str(e), e.code)
+        except (OSError, http.client.HTTPException) as e:
+            print(f"Error proxying to {key}: {e}")
+            if not self._streaming:
+                try:
+                    self._send_error(502, f"Upstream error: {e}")
+                except OSError:
+                    pass
+        finally:
+            if inst is not None:
+                self.proxy.release(key)
+
+    def _forward(self, port, body):
+        headers = {
+            k: v for k, v in self.headers.items() if k.lower() not in _HOP_HEADERS
+        }
+        headers["Content-Length"] = str(len(body))
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=None)
+        try:
+            conn.request("POST", self.path, body, headers)
+            resp = conn.getresponse()
+            self._streaming = True
+            self.send_response(resp.status, resp.reason)
+            for k, v in resp.getheaders():
+                if k.lower() not in _HOP_HEADERS:
+                    self.send_header(k, v)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            while True:
+                chunk = resp.read1(STREAM_CHUNK)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                self.wfile.flush()
+        finally:
+            conn.close()
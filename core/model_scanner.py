@@ -1,77 +1,296 @@
 import os
+import re
+import threading
+import time
+
+from core.gguf_reader import GGUFInfo, read_gguf_info, vocab_compatible
+from core.scan_index import ScanIndex
+
+# Split GGUF shard names, e.g. "Model-Q3_K_XL-00001-of-00003.gguf"
+SPLIT_RE = re.compile(r"^(.*)-(\d{5})-(of)-(\d{5})(\.gguf)$", re.IGNORECASE)
+# A draft model is only suggested if the target is at least this many times larger
+DRAFT_SIZE_RATIO = 4
+
+
+def model_sort_key(rel_path):
+    """Sort key for model lists: top-level files first, then by folder, then by name."""
+    return (rel_path.count("/"), rel_path.lower())
+
+
+def split_shard_names(rel_path):
+    """Returns every shard path of a split GGUF, or None if not a shard name.
+
+    Names are built in the case of rel_path ("-OF-", ".GGUF" stay as they
+    are). Numbering that can't be a real split, like -00000-of-00000 or
+    -00003-of-00002, is not treated as a shard name.
+    """
+    m = SPLIT_RE.match(rel_path)
+    if not m:
+        return None
+    base, index, of, count, ext = m.groups()
+    n = int(count)
+    if not 1 <= int(index) <= n:
+        return None
+    return [f"{base}-{i:05d}-{of}-{n:05d}{ext}" for i in range(1, n + 1)]
 
 
 class ModelScanner:
     MMPROJ_INDICATORS = ["mmproj"]
+    # Files modified more recently than this are treated as still being written
+    SETTLE_SECONDS = 5.0
 
-    def __init__(self, models_dir):
+    def __init__(self, models_dir, index_path=None):
         self.models_dir = models_dir
         # Maps relative model path -> list of relative mmproj paths in the same folder
         self._model_mmproj_map = {}
+        # Persistent directory/header cache; in-memory only if index_path is None
+        self._index = ScanIndex(index_path, models_dir)
+        # Maps relative path -> GGUFInfo (or None) built from index entries
+        self._model_info = {}
+        # Maps the listed path of a split model -> all of its shard paths
+        self._shard_groups = {}
+        # Guards index mutation; scans may run on a worker thread
+        self._lock = threading.Lock()
 
     def _is_mmproj(self, filename):
         """Check if a gguf file is a multimodal projector file."""
         lower = filename.lower()
         return any(ind in lower for ind in self.MMPROJ_INDICATORS)
 
-    def scan(self):
-        """Recursively scans the models directory for .gguf model files.
+    @staticmethod
+    def _rel_join(rel_dir, name):
+        if rel_dir == ".":
+            return name
+        return os.path.join(rel_dir, name).replace("\\", "/")
 
-        Returns a list of relative paths (using forward slashes) for all
-        non-mmproj .gguf files. Also builds an internal map of which mmproj
-        files are available in each model's directory.
-        """
-        self._model_mmproj_map = {}
+    def _list_dir(self, rel_dir, abs_dir, mtime_ns):
+        """Lists a changed directory, re-parsing only headers whose stamp changed."""
+        gguf_files = []
+        subdirs = []
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                        continue
+                    if not entry.name.lower().endswith(".gguf"):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                gguf_files.append(entry.name)
+
+                rel_path = self._rel_join(rel_dir, entry.name)
+                stamp = ScanIndex.file_stamp(st)
+                if st.st_ino == 0:
+                    # On Windows scandir's cached stat has no inode; ask for it
+                    stamp[2] = entry.inode()
+                if self._index.get_file(rel_path, stamp) is None:
+                    header = self._parse_header(entry.path)
+                    with self._lock:
+                        self._index.set_file(rel_path, stamp, header)
+                    self._invalidate(rel_path)
+
+        gguf_files.sort()
+        subdirs.sort()
+        with self._lock:
+            self._index.set_dir(rel_dir, mtime_ns, gguf_files, subdirs)
+        return gguf_files, subdirs
 
+    def _parse_header(self, full_path):
+        try:
+            return read_gguf_info(full_path).to_dict()
+        except (OSError, ValueError) as e:
+            print(f"Error reading GGUF header of {full_path}: {e}")
+            return None
+
+    def iter_scan(self, full=False, should_stop=None):
+        """Incrementally scans the models directory, yielding results as found.
+
+        Yields ("dir", rel_dir, dirs_done) after each directory and
+        ("model", rel_path) for each non-mmproj .gguf file. The mmproj map is
+        updated as models are found. should_stop is an optional callable
+        checked between directories; when it returns True the scan stops
+        early, keeping what was indexed so far but not pruning anything.
+        Directories that exist but can't be read keep their cached listing.
+
+        Directory listings and parsed GGUF headers are cached in the scan
+        index. Only directories whose mtime changed are re-listed, and only
+        files whose size/mtime/inode changed are re-parsed. Pass full=True to
+        ignore the cached listings.
+        """
         if not os.path.exists(self.models_dir):
-            return []
+            self._model_mmproj_map = {}
+            return
 
-        model_files = []
+        mmproj_map = {}
+        shard_groups = {}
+        seen_dirs = set()
+        seen_files = set()
+        pending = ["."]
 
-        for dirpath, dirnames, filenames in os.walk(self.models_dir):
-            gguf_files = [f for f in filenames if f.lower().endswith(".gguf")]
+        while pending:
+            if should_stop is not None and should_stop():
+                with self._lock:
+                    self._index.save()
+                return
 
-            if not gguf_files:
+            rel_dir = pending.pop()
+            abs_dir = self.models_dir if rel_dir == "." else self.get_full_path(rel_dir)
+            try:
+                mtime_ns = os.stat(abs_dir).st_mtime_ns
+                cached = None if full else self._index.get_dir(rel_dir, mtime_ns)
+                if cached is None:
+                    gguf_files, subdirs = self._list_dir(rel_dir, abs_dir, mtime_ns)
+            except FileNotFoundError:
                 continue
+            except OSError as e:
+                # Unreadable for now (e.g. a network share hiccup): keep what
+                # the index knows about it instead of pruning the subtree
+                print(f"Error listing {abs_dir}: {e}")
+                cached = self._index.get_dir(rel_dir)
+                if cached is None:
+                    continue
+            if cached is not None:
+                gguf_files, subdirs = cached["files"], cached["subdirs"]
+
+            seen_dirs.add(rel_dir)
+            pending.extend(self._rel_join(rel_dir, d) for d in reversed(subdirs))
 
             # Separate models from mmproj files in this directory
             models_in_dir = []
-            mmproj_in_dir = []
+            mmproj_rel_paths = []
 
             for f in gguf_files:
+                rel_path = self._rel_join(rel_dir, f)
+                seen_files.add(rel_path)
                 if self._is_mmproj(f):
-                    mmproj_in_dir.append(f)
+                    mmproj_rel_paths.append(rel_path)
                 else:
-                    models_in_dir.append(f)
+                    models_in_dir.append(rel_path)
 
-            # Build relative paths from models_dir
-            rel_dir = os.path.relpath(dirpath, self.models_dir)
+            for rel_path in self._group_shards(models_in_dir, shard_groups):
+                # Associate mmproj files from the same directory
+                mmproj_map[rel_path] = mmproj_rel_paths
+                self._model_mmproj_map[rel_path] = mmproj_rel_paths
+                yield ("model", rel_path)
 
-            # Compute relative mmproj paths for this directory
-            mmproj_rel_paths = []
-            for mp in mmproj_in_dir:
-                if rel_dir == ".":
-                    mmproj_rel_paths.append(mp)
-                else:
-                    mmproj_rel_paths.append(
-                        os.path.join(rel_dir, mp).replace("\\", "/")
-                    )
+            yield ("dir", rel_dir, len(seen_dirs))
 
-            for m in models_in_dir:
-                if rel_dir == ".":
-                    rel_path = m
-                else:
-                    rel_path = os.path.join(rel_dir, m).replace("\\", "/")
+        self._model_mmproj_map = mmproj_map
+        self._shard_groups = shard_groups
+        with self._lock:
+            self._index.prune(seen_dirs, seen_files)
+            self._index.save()
 
-                model_files.append(rel_path)
-                # Associate mmproj files from the same directory
-                self._model_mmproj_map[rel_path] = mmproj_rel_paths
+    def _group_shards(self, models_in_dir, shard_groups):
+        """Collapses split GGUF shards into one entry per logical model.
 
-        # Sort: top-level files first, then by folder, then by name
-        model_files.sort(key=lambda p: (p.count("/"), p.lower()))
+        Each set is listed under its first shard present (normally
+        -00001-of-N, which is what llama-server needs). The other shards
+        are hidden. Shard names are matched case-insensitively, as on
+        Windows. Returns the paths to list.
+        """
+        listed = []
+        grouped = set()
+        by_lower = {p.lower(): p for p in models_in_dir}
+        for rel_path in models_in_dir:
+            if rel_path in grouped:
+                continue
+            shards = split_shard_names(rel_path)
+            if shards is None:
+                listed.append(rel_path)
+                continue
+            shards = [by_lower.get(s.lower(), s) for s in shards]
+            present = [p for p in shards if p.lower() in by_lower]
+            if not present:
+                listed.append(rel_path)
+                continue
+            grouped.update(present)
+            shard_groups[present[0]] = shards
+            self._shard_groups[present[0]] = shards
+            listed.append(present[0])
+        return listed
 
+    def scan(self, full=False):
+        """Recursively scans the models directory for .gguf model files.
+
+        Returns a list of relative paths (using forward slashes) for all
+        non-mmproj .gguf files. Also builds an internal map of which mmproj
+        files are available in each model's directory.
+        """
+        model_files = [ev[1] for ev in self.iter_scan(full) if ev[0] == "model"]
+        model_files.sort(key=model_sort_key)
         return model_files
 
+    def get_shards(self, rel_path):
+        """Returns all shard paths of a model (just [rel_path] if not split)."""
+        if rel_path in self._shard_groups:
+            return self._shard_groups[rel_path]
+        return split_shard_names(rel_path) or [rel_path]
+
+    def get_model_size(self, rel_path):
+        """Total size in bytes of a model's shards that exist on disk."""
+        total = 0
+        for shard in self.get_shards(rel_path):
+            entry = self._index.get_file(shard)
+            if entry is not None:
+                total += entry["stamp"][0]
+            else:
+                try:
+                    total += os.path.getsize(self.get_full_path(shard))
+                except OSError:
+                    pass
+        return total
+
+    def validate_model(self, rel_path):
+        """Checks that a model can be loaded. Returns a list of problems.
+
+        For split models every shard must exist, be complete, and carry
+        split.no / split.count metadata matching its file name; the shards'
+        tensor counts must add up to split.tensors.count. Only re-stats the
+        shards, so a missing shard is reported in milliseconds.
+        """
+        shards = self.get_shards(rel_path)
+        present = []
+        problems = []
+        for shard in shards:
+            if os.path.exists(self.get_full_path(shard)):
+                present.append(shard)
+            else:
+                problems.append(f"Missing file: {shard}")
+        self.refresh_files(present)
+
+        for shard in present:
+            if self.is_incomplete(shard):
+                problems.append(f"Still being copied or written: {shard}")
+        if problems or len(shards) == 1:
+            return problems
+
+        total_tensors = 0
+        expected_tensors = None
+        for i, shard in enumerate(shards):
+            entry = self._index.get_file(shard)
+            info = entry["info"] if entry else None
+            if info is None:
+                problems.append(f"Not a valid GGUF file: {shard}")
+                continue
+            kv = info["kv"]
+            if kv.get("split.count") != len(shards) or kv.get("split.no") != i:
+                problems.append(
+                    f"{shard} has split metadata {kv.get('split.no')} of "
+                    f"{kv.get('split.count')}, expected {i} of {len(shards)}"
+                )
+            total_tensors += len(info["tensors"])
+            if i == 0:
+                expected_tensors = kv.get("split.tensors.count")
+
+        if not problems and expected_tensors not in (None, total_tensors):
+            problems.append(
+                f"Shards hold {total_tensors} tensors, expected {expected_tensors}"
+            )
+        return problems
+
     def get_mmproj_options(self, model_rel_path):
         """Returns a list of mmproj relative paths available for the given model.
 
@@ -80,6 +299,150 @@ class ModelScanner:
         """
         return self._model_mmproj_map.get(model_rel_path, [])
 
+    def get_model_info(self, rel_path):
+        """Returns the parsed GGUF header (GGUFInfo) for a model or mmproj.
+
+        Headers come from the scan index when available and are otherwise
+        parsed on first use. For split models the tensor tables of all
+        shards are combined. Returns None if the file is missing or not
+        valid GGUF.
+        """
+        if rel_path in self._model_info:
+            return self._model_info[rel_path]
+
+        header = self._get_header(rel_path)
+        info = GGUFInfo.from_dict(header) if header else None
+        shards = self.get_shards(rel_path)
+        if info is not None and len(shards) > 1 and shards[0] == rel_path:
+            info = self._merge_shard_infos(info, shards[1:])
+        self._model_info[rel_path] = info
+        return info
+
+    def draft_candidates(self, model_rel_path, models):
+        """Models usable as a speculative draft for the given model.
+
+        Candidates (from models) share the model's tokenizer, see
+        vocab_compatible(), and are at most 1/DRAFT_SIZE_RATIO of its size.
+        Smallest first. Only headers already in the scan index are looked
+        at, so this never reads files; models not indexed yet are skipped.
+        """
+        info = self.get_model_info(model_rel_path)
+        if info is None or not info.vocab_hash:
+            return []
+        max_size = self.get_model_size(model_rel_path) / DRAFT_SIZE_RATIO
+        candidates = []
+        for rel_path in models:
+            if rel_path == model_rel_path:
+                continue
+            entry = self._index.get_file(rel_path)
+            header = entry["info"] if entry is not None else None
+            if not header or header.get("vocab_hash") != info.vocab_hash:
+                continue
+            if not vocab_compatible(info, GGUFInfo.from_dict(header)):
+                continue
+            size = self.get_model_size(rel_path)
+            if size <= max_size:
+                candidates.append((size, rel_path))
+        return [rel_path for _, rel_path in sorted(candidates)]
+
+    def _get_header(self, rel_path):
+        """Returns the indexed header dict of a file, parsing it if not indexed."""
+        entry = self._index.get_file(rel_path)
+        if entry is not None:
+            return entry["info"]
+
+        full_path = self.get_full_path(rel_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        header = self._parse_header(full_path)
+        with self._lock:
+            self._index.set_file(rel_path, ScanIndex.file_stamp(st), header)
+        return header
+
+    def _merge_shard_infos(self, first, other_shards):
+        """Combines the tensor tables of a split model into one GGUFInfo."""
+        tensors = list(first.tensors)
+        data_size = first.expected_file_size
+        for shard in other_shards:
+            header = self._get_header(shard)
+            if header is None:
+                continue
+            info = GGUFInfo.from_dict(header)
+            tensors.extend(info.tensors)
+            data_size += info.expected_file_size
+        return GGUFInfo(
+            first.version,
+            first.kv,
+            tensors,
+            first.n_vocab,
+            0,
+            data_size,
+            first.vocab_hash,
+        )
+
+    def _invalidate(self, rel_path):
+        """Drops cached GGUFInfo for a file and the split model it belongs to."""
+        self._model_info.pop(rel_path, None)
+        shards = split_shard_names(rel_path)
+        if shards:
+            self._model_info.pop(shards[0], None)
+
+    def get_directories(self):
+        """Returns absolute paths of every directory seen by the last scan."""
+        return [
+            self.models_dir if d == "." else self.get_full_path(d)
+            for d in list(self._index.dirs)
+        ]
+
+    def is_incomplete(self, rel_path):
+        """True if a file looks like it is still being copied or written.
+
+        That is the case when it was modified within SETTLE_SECONDS, or when
+        it is smaller than its GGUF header says the tensor data needs.
+        """
+        entry = self._index.get_file(rel_path)
+        if entry is None:
+            return False
+        size, mtime_ns, _ = entry["stamp"]
+        if time.time_ns() - mtime_ns < self.SETTLE_SECONDS * 1e9:
+            return True
+        info = entry["info"]
+        if info is None:
+            return False
+        return size < info["data_offset"] + info["data_size"]
+
+    def incomplete_files(self):
+        return [p for p in list(self._index.files) if self.is_incomplete(p)]
+
+    def refresh_files(self, rel_paths):
+        """Re-stats the given files, re-parsing any whose stamp changed.
+
+        Writing into an existing file doesn't change its directory's mtime,
+        so files flagged as incomplete need to be polled individually.
+        Returns the paths whose stamp changed.
+        """
+        changed = []
+        for rel_path in rel_paths:
+            full_path = self.get_full_path(rel_path)
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            stamp = ScanIndex.file_stamp(st)
+            if self._index.get_file(rel_path, stamp) is not None:
+                continue
+            header = self._parse_header(full_path)
+            with self._lock:
+                self._index.set_file(rel_path, stamp, header)
+            self._invalidate(rel_path)
+            changed.append(rel_path)
+        if changed:
+            with self._lock:
+                self._index.save()
+        return changed
+
     def get_full_path(self, rel_path):
         """Returns the absolute path for a model or mmproj given its relative path."""
         return os.path.join(self.models_dir, rel_path.replace("/", os.sep))
@@ -0,0 +1,110 @@
+from core.memory_estimator import MIB, estimate_memory
+
+# Headroom kept free on every GPU, same as llama-server's --fit-target default
+DEFAULT_MARGIN = 1024 * MIB
+
+
+def fits(estimate, vram_budget, margin=DEFAULT_MARGIN):
+    """True if every GPU in the estimate stays within its budget minus margin.
+
+    vram_budget is bytes per GPU, or a dict of device name -> bytes.
+    """
+    for name, dev in estimate["devices"].items():
+        if name == "CPU":
+            continue
+        if isinstance(vram_budget, dict):
+            budget = vram_budget.get(name, 0)
+        else:
+            budget = vram_budget
+        if dev["total"] + margin > budget:
+            return False
+    return True
+
+
+def _smallest(lo, hi, ok):
+    """Smallest value in [lo, hi] for which ok() is True (ok is monotonic)."""
+    if not ok(hi):
+        return None
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ok(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def plan_offload(
+    info, params, vram_budget, margin=DEFAULT_MARGIN, mmproj_info=None, draft_info=None
+):
+    """Finds manual-mode offload settings that fit the VRAM budget.
+
+    For MoE models all layers stay on the GPU and the smallest --n-cpu-moe
+    that fits is chosen; only if all experts on the CPU still don't fit are
+    GPU layers reduced as well. For dense models the largest -ngl that fits
+    is chosen.
+
+    Returns {"ngl", "n-cpu-moe", "estimate"}; ngl may be 0 if nothing fits.
+    """
+    n_layer = info.block_count
+    trial = dict(params)
+    trial["offload-mode"] = "n-cpu-moe"
+
+    def estimate(ngl, n_cpu_moe):
+        trial["ngl"] = ngl
+        trial["n-cpu-moe"] = n_cpu_moe
+        return estimate_memory(info, trial, mmproj_info, draft_info=draft_info)
+
+    def ok(ngl, n_cpu_moe):
+        return fits(estimate(ngl, n_cpu_moe), vram_budget, margin)
+
+    is_moe = info.expert_count > 0 and any("_exps." in t[0] for t in info.tensors)
+    ngl, n_cpu_moe = n_layer + 1, 0
+    if is_moe:
+        found = _smallest(0, n_layer, lambda n: ok(n_layer + 1, n))
+        if found is not None:
+            n_cpu_moe = found
+        else:
+            n_cpu_moe = n_layer
+
+    if not ok(ngl, n_cpu_moe):
+        # Largest ngl that fits == n_layer + 1 - smallest number of layers to drop
+        drop = _smallest(0, n_layer + 1, lambda d: ok(n_layer + 1 - d, n_cpu_moe))
+        ngl = n_layer + 1 - (drop if drop is not None else n_layer + 1)
+
+    return {"ngl": ngl, "n-cpu-moe": n_cpu_moe, "estimate": estimate(ngl, n_cpu_moe)}
+
+
+def max_context_size(
+    info,
+    params,
+    vram_budget,
+    margin=DEFAULT_MARGIN,
+    mmproj_info=None,
+    granularity=1024,
+    max_ctx=None,
+    draft_info=None,
+):
+    """Largest ctx-size (a multiple of granularity) that fits the VRAM budget.
+
+    Uses the current placement (ngl / n-cpu-moe, or a full offload in fit
+    mode), KV cache types, parallel slots, sliding-window/recurrent layers,
+    mmproj and draft model via estimate_memory(). Capped at max_ctx, which
+    defaults to the model's training context. Returns 0 if not even one
+    step fits.
+    """
+    granularity = max(int(granularity), 256)
+    if max_ctx is None:
+        max_ctx = info.n_ctx_train or 1024 * 1024
+    steps = max_ctx // granularity
+    trial = dict(params)
+
+    def too_big(step):
+        if step > steps:
+            return True
+        trial["ctx-size"] = step * granularity
+        estimate = estimate_memory(info, trial, mmproj_info, draft_info=draft_info)
+        return not fits(estimate, vram_budget, margin)
+
+    # Smallest step that doesn't fit, minus one, is the largest that does
+    return (_smallest(1, steps + 1, too_big) - 1) * granularity
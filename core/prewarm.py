@@ -0,0 +1,139 @@
+import ctypes
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 16 * 1024 * 1024
+# Files are split into segments of this size so large files are read in parallel
+SEGMENT_SIZE = 256 * 1024 * 1024
+
+
+def available_memory():
+    """Returns available physical memory in bytes, or None if unknown."""
+    if hasattr(os, "sysconf"):
+        try:
+            return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (ValueError, OSError):
+            return None
+    if os.name == "nt":
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    return None
+
+
+class Prewarmer:
+    """Pulls model files into the OS page cache before llama-server mmaps them.
+
+    Files are split into SEGMENT_SIZE ranges that are read sequentially in
+    CHUNK_SIZE blocks by a pool of workers; on Linux each range is also
+    hinted with posix_fadvise(WILLNEED). Reading stops at max_bytes (e.g.
+    the available RAM), since warming more than fits only evicts what was
+    just read.
+
+    progress(done_bytes, total_bytes, bytes_per_second) is called from the
+    worker threads at most every PROGRESS_INTERVAL seconds.
+    """
+
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, paths, workers=4, max_bytes=None, progress=None):
+        self.paths = [p for p in paths if p]
+        self.workers = max(1, workers)
+        self.max_bytes = max_bytes
+        self.progress = progress
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._done = 0
+        self._last_report = 0.0
+
+    def cancel(self):
+        self._stop.set()
+
+    @property
+    def cancelled(self):
+        return self._stop.is_set()
+
+    def _segments(self):
+        segments = []
+        budget = self.max_bytes
+        for path in self.paths:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if budget is not None:
+                size = min(size, budget)
+                budget -= size
+            for start in range(0, size, SEGMENT_SIZE):
+                segments.append((path, start, min(start + SEGMENT_SIZE, size)))
+        return segments
+
+    def _read_segment(self, path, start, end, total, started):
+        buf = bytearray(CHUNK_SIZE)
+        view = memoryview(buf)
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), start, end - start, os.POSIX_FADV_WILLNEED)
+            f.seek(start)
+            pos = start
+            while pos < end and not self._stop.is_set():
+                n = f.readinto(view[: min(CHUNK_SIZE, end - pos)])
+                if not n:
+                    break
+                pos += n
+                self._report(n, total, started)
+
+    def _report(self, n, total, started):
+        with self._lock:
+            self._done += n
+            now = time.monotonic()
+            if now - self._last_report < self.PROGRESS_INTERVAL and self._done < total:
+                return
+            self._last_report = now
+            done = self._done
+        if self.progress is not None:
+            self.progress(done, total, done / max(now - started, 1e-6))
+
+    def run(self):
+        """Reads all files; blocks until done or cancelled.
+
+        Returns {"bytes", "total", "seconds", "throughput", "cancelled"}.
+        """
+        segments = self._segments()
+        total = sum(end - start for _, start, end in segments)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(self._read_segment, path, start, end, total, started)
+                for path, start, end in segments
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except OSError as e:
+                    print(f"Error prewarming: {e}")
+        seconds = time.monotonic() - started
+        return {
+            "bytes": self._done,
+            "total": total,
+            "seconds": seconds,
+            "throughput": self._done / max(seconds, 1e-6),
+            "cancelled": self.cancelled,
+        }
@@ -0,0 +1,186 @@
+import ctypes
+import os
+import signal
+import socket
+import subprocess
+import threading
+import time
+
+# Seconds between the polite stop request and the forced kill
+GRACE_SECONDS = 5.0
+# Seconds to wait for a stopped server's port to be released
+PORT_FREE_TIMEOUT = 5.0
+
+IS_WINDOWS = os.name == "nt"
+
+
+def server_executable_name():
+    return "llama-server.exe" if IS_WINDOWS else "llama-server"
+
+
+def spawn_kwargs():
+    """Popen arguments that put the server in its own process group.
+
+    That lets the whole tree be signalled at once and keeps console
+    Ctrl+C/Ctrl+Break aimed at the launcher away from the server. On
+    Windows no console window is created since output is piped; the
+    server then has a hidden console of its own that console control
+    events from the launcher can't reach (see request_stop()).
+    """
+    if IS_WINDOWS:
+        return {
+            "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP
+            | subprocess.CREATE_NO_WINDOW
+        }
+    return {"start_new_session": True}
+
+
+def _signal_group(process, sig):
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+    except PermissionError:
+        # Not our group (e.g. spawned without a new session)
+        process.send_signal(sig)
+
+
+def _taskkill(pid, force):
+    args = ["taskkill", "/T", "/PID", str(pid)]
+    if force:
+        args.insert(1, "/F")
+    try:
+        return (
+            subprocess.run(
+                args,
+                capture_output=True,
+                timeout=10,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+            ).returncode
+            == 0
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def request_stop(process):
+    """Asks the server to shut down cleanly (SIGTERM).
+
+    Windows has no such request for a server on its own hidden console:
+    GenerateConsoleCtrlEvent() only reaches the caller's console, so the
+    tree is killed right away instead of after a grace period that could
+    only run out. Anything that must happen before the exit (e.g. saving
+    KV cache slots) has to be done over HTTP first.
+    """
+    if process.poll() is not None:
+        return
+    if IS_WINDOWS:
+        force_kill(process)
+    else:
+        _signal_group(process, signal.SIGTERM)
+
+
+def force_kill(process):
+    """Kills the server and everything in its process group / tree."""
+    if process.poll() is not None:
+        return
+    if IS_WINDOWS:
+        if not _taskkill(process.pid, force=True):
+            process.kill()
+    else:
+        _signal_group(process, signal.SIGKILL)
+
+
+def stop_process(process, grace=GRACE_SECONDS):
+    """Stops politely, kills after grace seconds and waits for the exit.
+
+    On Windows the stop is a kill right away (see request_stop()).
+    """
+    request_stop(process)
+    try:
+        return process.wait(grace)
+    except subprocess.TimeoutExpired:
+        force_kill(process)
+        return process.wait()
+
+
+def escalate_after(process, grace=GRACE_SECONDS):
+    """Kills the process in the background if it outlives grace seconds."""
+
+    def run():
+        try:
+            process.wait(grace)
+        except subprocess.TimeoutExpired:
+            print(f"Process {process.pid} ignored the stop request, killing it")
+            force_kill(process)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def port_is_free(port, host="127.0.0.1"):
+    """True if nothing is listening on host:port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        if not IS_WINDOWS:
+            # Ignore TIME_WAIT leftovers, like the server's own listener does
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+def wait_port_free(port, host="127.0.0.1", timeout=PORT_FREE_TIMEOUT):
+    """Waits until port can be bound again; returns False on timeout."""
+    deadline = time.monotonic() + timeout
+    while not port_is_free(port, host):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def process_rss(pid):
+    """Resident memory of a process in bytes, or None if unknown."""
+    if IS_WINDOWS:
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", ctypes.c_ulong),
+                ("PageFaultCount", ctypes.c_ulong),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            if ctypes.windll.psapi.GetProcessMemoryInfo(
+                handle, ctypes.byref(counters), counters.cb
+            ):
+                return counters.WorkingSetSize
+        finally:
+            kernel32.CloseHandle(handle)
+        return None
+
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
@@ -0,0 +1,242 @@
+import http.client
+import json
+import threading
+
+from core.metrics import parse_prometheus
+from core.server_process import READY
+
+# Seconds between activity checks of running instances
+ACTIVITY_INTERVAL = 5.0
+
+# Prometheus counters that move whenever llama-server handles a request
+_METRIC_COUNTERS = ("llamacpp:prompt_tokens_total", "llamacpp:tokens_predicted_total")
+_METRIC_BUSY = "llamacpp:requests_processing"
+
+
+def _http_get(port, path, timeout=2.0):
+    """Returns (status, body bytes), or (None, None) if the request failed."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        return resp.status, resp.read()
+    except (OSError, http.client.HTTPException):
+        return None, None
+    finally:
+        conn.close()
+
+
+def slots_activity(slots):
+    """(busy, signature) from a parsed /slots response.
+
+    The signature changes whenever a slot picks up a new task or decodes
+    more tokens, so comparing it between checks reveals requests that
+    started and finished in between.
+    """
+    busy = False
+    signature = []
+    for slot in slots:
+        busy = busy or bool(slot.get("is_processing"))
+        next_token = slot.get("next_token") or {}
+        if isinstance(next_token, list):
+            next_token = next_token[0] if next_token else {}
+        signature.append(
+            (slot.get("id"), slot.get("id_task"), next_token.get("n_decoded"))
+        )
+    return busy, tuple(signature)
+
+
+def metrics_activity(text):
+    """(busy, signature) from /metrics (Prometheus text) output."""
+    values = parse_prometheus(text)
+    busy = values.get(_METRIC_BUSY, 0) > 0
+    return busy, tuple(values.get(name) for name in _METRIC_COUNTERS)
+
+
+def check_activity(inst):
+    """(busy, signature) for an instance from /slots, /metrics or its log.
+
+    /slots is on by default; /metrics needs --metrics; failing both, the
+    time of the last prompt/eval timing line in the log is used.
+    """
+    status, body = _http_get(inst.port, "/slots")
+    if status == 200:
+        try:
+            return slots_activity(json.loads(body))
+        except (ValueError, AttributeError, TypeError):
+            pass
+    status, body = _http_get(inst.port, "/metrics")
+    if status == 200:
+        return metrics_activity(body.decode("utf-8", errors="replace"))
+    return False, inst.process.last_event_time("timing")
+
+
+class ResidencyManager:
+    """Unloads idle servers and keeps resident models within a VRAM budget.
+
+    Every ACTIVITY_INTERVAL the activity of each ready instance is checked
+    (see check_activity()); an instance whose signature changed or that is
+    busy counts as used now. Instances idle for longer than their profile's
+    "idle-ttl" (minutes, 0 = never) are stopped unless "pin-resident" is
+    set.
+
+    With a vram_budget (bytes, 0 = unlimited), starting a profile first
+    stops least-recently-used idle, unpinned instances until the estimated
+    VRAM of everything resident fits. estimate_vram(params) returns the
+    bytes a profile is expected to need; running instances are counted by
+    their sampled VRAM when known.
+    """
+
+    def __init__(self, supervisor, vram_budget=0, estimate_vram=None):
+        self.supervisor = supervisor
+        self.vram_budget = vram_budget
+        self.estimate_vram = estimate_vram
+        self._signatures = {}
+        self._estimates = {}
+        self._thread = None
+        self._stop = threading.Event()
+        supervisor.on_before_start = self.make_room
+
+    @staticmethod
+    def is_pinned(inst):
+        return bool(inst.params.get("pin-resident"))
+
+    @staticmethod
+    def idle_ttl(inst):
+        """Idle timeout in seconds, 0 if the instance is never unloaded."""
+        try:
+            return max(int(inst.params.get("idle-ttl") or 0), 0) * 60
+        except (TypeError, ValueError):
+            return 0
+
+    def update_activity(self, inst):
+        busy, signature = check_activity(inst)
+        previous = self._signatures.get(inst.key)
+        self._signatures[inst.key] = (inst.process.pid, signature)
+        if busy or (
+            previous is not None
+            and previous[0] == inst.process.pid
+            and previous[1] != signature
+        ):
+            inst.touch()
+        inst.busy = busy
+
+    def expired(self, inst):
+        ttl = self.idle_ttl(inst)
+        return (
+            ttl > 0
+            and not self.is_pinned(inst)
+            and not inst.busy
+            and inst.idle_seconds > ttl
+        )
+
+    def poll(self):
+        """Checks activity and stops expired instances; returns their keys."""
+        stopped = []
+        for inst in self.supervisor.live():
+            if inst.state != READY:
+                continue
+            self.update_activity(inst)
+            if self.expired(inst):
+                print(f"Stopping {inst.key}: idle for {inst.idle_seconds / 60:.0f} min")
+                self.supervisor.stop(inst.key)
+                stopped.append(inst.key)
+        return stopped
+
+    def resident_vram(self, inst):
+        if inst.vram:
+            return inst.vram
+        return self._estimates.get(inst.key) or 0
+
+    def _estimate(self, key, params):
+        needed = 0
+        if self.estimate_vram is not None:
+            try:
+                needed = self.estimate_vram(params) or 0
+            except Exception as e:
+                print(f"Error estimating VRAM for {key}: {e}")
+        return needed
+
+    def fits_alongside(self, params, free_vram=None):
+        """True if params can start without stopping anything.
+
+        The estimate is checked against the budget (if set) with every live
+        instance counted, and against free_vram bytes if given.
+        """
+        needed = self._estimate(None, params)
+        if free_vram is not None and needed > free_vram:
+            return False
+        if not self.vram_budget:
+            return True
+        used = sum(self.resident_vram(i) for i in self.supervisor.live())
+        return used + needed <= self.vram_budget
+
+    def to_evict(self, key, params):
+        """Instances make_room() would stop for the profile, LRU first.
+
+        Only computes; nothing is stopped. Other instances of the same
+        profile (the live one a shadow replaces) are never evicted.
+        """
+        # blue_green imports this module
+        from core.blue_green import profile_key
+
+        needed = self._estimate(key, params)
+        self._estimates[key] = needed
+        if not self.vram_budget:
+            return []
+
+        others = [i for i in self.supervisor.live() if i.key != key]
+        used = sum(self.resident_vram(i) for i in others)
+        candidates = sorted(
+            (
+                i
+                for i in others
+                if not self.is_pinned(i)
+                and not i.busy
+                and profile_key(i.key) != profile_key(key)
+            ),
+            key=lambda i: i.last_activity,
+        )
+        evict = []
+        while used + needed > self.vram_budget and candidates:
+            inst = candidates.pop(0)
+            used -= self.resident_vram(inst)
+            evict.append(inst)
+        if used + needed > self.vram_budget:
+            print(
+                f"Starting {key} exceeds the VRAM budget; remaining models are busy or pinned"
+            )
+        return evict
+
+    def make_room(self, key, params):
+        """Stops LRU idle instances until the new profile fits the budget.
+
+        Waits for them to exit, which can take a while: call it off the GUI
+        thread. Returns the keys of the stopped instances.
+        """
+        evict = self.to_evict(key, params)
+        for inst in evict:
+            print(f"Stopping {inst.key} to make room for {key}")
+            self.supervisor.stop(inst.key)
+        for inst in evict:
+            self.supervisor.wait_stopped(inst)
+        return [inst.key for inst in evict]
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error checking instance activity: {e}")
+
+    def start(self, interval=ACTIVITY_INTERVAL):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,187 @@
+import collections
+import json
+import os
+import threading
+import time
+
+from core.autotune import AUTOTUNE_KEY
+from core.blue_green import profile_key
+from core.server_process import CRASHED, FINAL_STATES, READY
+
+RESTART_POLICIES = ["never", "on-failure", "always"]
+
+# First restart waits BACKOFF_BASE seconds, doubling per consecutive failure
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+# A server that stayed up this long resets the backoff
+STABLE_SECONDS = 60.0
+# This many crashes within QUARANTINE_WINDOW seconds stops restarts
+QUARANTINE_CRASHES = 5
+QUARANTINE_WINDOW = 600.0
+# Log lines kept with each crash record
+CRASH_LOG_LINES = 50
+# Seconds between checks for exited instances
+CHECK_INTERVAL = 0.5
+
+
+class RestartManager:
+    """Restarts servers that exit according to their profile's restart-policy.
+
+    "on-failure" restarts instances that crashed, "always" also those that
+    exited cleanly on their own; instances stopped on purpose (by the user,
+    idle unloading or eviction) are never restarted. Restarts back off
+    exponentially; a profile that crashes QUARANTINE_CRASHES times within
+    QUARANTINE_WINDOW is quarantined until release() is called.
+
+    Every crash is recorded with its exit code and the last CRASH_LOG_LINES
+    lines of output in crash_history.json. Only profile instances count:
+    autotune trials and blue-green shadow or retiring servers are expected
+    to crash now and then and are left alone.
+    """
+
+    MAX_RECORDS = 200
+
+    def __init__(self, supervisor, filepath=None):
+        self.supervisor = supervisor
+        self.filepath = filepath
+        self.records = []
+        self.quarantined = set()
+        self._recent = {}
+        self._failures = {}
+        self._pending = {}
+        self._handled = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.load()
+
+    def load(self):
+        if self.filepath and os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "r") as f:
+                    self.records = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.records = []
+
+    def save(self):
+        if not self.filepath:
+            return
+        try:
+            with open(self.filepath, "w") as f:
+                json.dump(self.records, f, indent=4)
+        except OSError as e:
+            print(f"Error saving crash history: {e}")
+
+    @staticmethod
+    def policy(inst):
+        policy = inst.requested_params.get("restart-policy") or "never"
+        return policy if policy in RESTART_POLICIES else "never"
+
+    def _record_crash(self, inst):
+        proc = inst.process
+        record = {
+            "time": time.time(),
+            "profile": inst.key,
+            "exit_code": proc.returncode,
+            "uptime": proc.exit_time,
+            "reached_ready": READY in [s for s, _ in proc.state_times],
+            "log_tail": proc.tail(CRASH_LOG_LINES),
+        }
+        self.records.append(record)
+        del self.records[: -self.MAX_RECORDS]
+        self.save()
+
+        now = time.monotonic()
+        recent = self._recent.setdefault(inst.key, collections.deque())
+        recent.append(now)
+        while recent and now - recent[0] > QUARANTINE_WINDOW:
+            recent.popleft()
+        return len(recent) >= QUARANTINE_CRASHES
+
+    def handle_exit(self, inst):
+        """Records a crash and schedules a restart if the policy asks for it."""
+        if inst.key == AUTOTUNE_KEY or profile_key(inst.key) != inst.key:
+            return
+        proc = inst.process
+        crashed = inst.state == CRASHED
+        quarantine = self._record_crash(inst) if crashed else False
+        policy = self.policy(inst)
+        if proc.stop_requested or policy == "never":
+            return
+        if policy == "on-failure" and not crashed:
+            return
+        if quarantine:
+            print(f"{inst.key} crashed {QUARANTINE_CRASHES} times, quarantined")
+            self.quarantined.add(inst.key)
+            self._pending.pop(inst.key, None)
+            return
+
+        if (proc.exit_time or 0) >= STABLE_SECONDS:
+            self._failures[inst.key] = 0
+        failures = self._failures.get(inst.key, 0)
+        delay = min(BACKOFF_BASE * 2**failures, BACKOFF_MAX)
+        self._failures[inst.key] = failures + 1
+        self._pending[inst.key] = (time.monotonic() + delay, proc)
+        print(f"{inst.key} exited ({proc.returncode}), restarting in {delay:.0f}s")
+
+    def poll(self):
+        """Handles newly exited instances and performs due restarts."""
+        with self._lock:
+            instances = self.supervisor.list()
+            self._handled &= {inst.process for inst in instances}
+            for inst in instances:
+                proc = inst.process
+                if inst.state in FINAL_STATES and proc not in self._handled:
+                    self._handled.add(proc)
+                    self.handle_exit(inst)
+
+            now = time.monotonic()
+            for key, (due, proc) in list(self._pending.items()):
+                inst = self.supervisor.get(key)
+                if inst is None or inst.process is not proc:
+                    # Removed or started again by someone else meanwhile
+                    del self._pending[key]
+                elif now >= due:
+                    del self._pending[key]
+                    new = self.supervisor.start(key, inst.requested_params)
+                    new.restarts = inst.restarts + 1
+
+    @property
+    def has_pending(self):
+        return bool(self._pending)
+
+    def status(self, key):
+        """Short text about pending restarts or quarantine, or ""."""
+        if key in self.quarantined:
+            return "quarantined"
+        pending = self._pending.get(key)
+        if pending is not None:
+            return f"restart in {max(pending[0] - time.monotonic(), 0):.0f}s"
+        return ""
+
+    def release(self, key):
+        """Lifts quarantine and resets the backoff for a profile."""
+        with self._lock:
+            self.quarantined.discard(key)
+            self._recent.pop(key, None)
+            self._failures.pop(key, None)
+            self._pending.pop(key, None)
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error restarting instances: {e}")
+
+    def start(self, interval=CHECK_INTERVAL):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,103 @@
+import json
+import os
+
+
+class ScanIndex:
+    """On-disk cache of the models directory tree and parsed GGUF headers.
+
+    dirs maps a relative directory ("." for the root) to its mtime and the
+    .gguf files and subdirectories it contained when last listed. files maps
+    a relative file path to its size/mtime/inode stamp and the parsed header
+    (GGUFInfo.to_dict(), or None if the file could not be parsed).
+
+    The index is only valid for the models_dir it was built for; loading it
+    for another directory starts empty. A filepath of None keeps the index
+    in memory only.
+    """
+
+    VERSION = 2
+
+    def __init__(self, filepath=None, models_dir=""):
+        self.filepath = filepath
+        self.models_dir = os.path.abspath(models_dir) if models_dir else ""
+        self.dirs = {}
+        self.files = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        self.dirs = {}
+        self.files = {}
+        if not self.filepath or not os.path.exists(self.filepath):
+            return
+        try:
+            with open(self.filepath, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading scan index: {e}")
+            return
+        if data.get("version") != self.VERSION:
+            return
+        if data.get("models_dir") != self.models_dir:
+            return
+        self.dirs = data.get("dirs", {})
+        self.files = data.get("files", {})
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        if not self.filepath:
+            return
+        data = {
+            "version": self.VERSION,
+            "models_dir": self.models_dir,
+            "dirs": self.dirs,
+            "files": self.files,
+        }
+        tmp_path = self.filepath + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.filepath)
+        except OSError as e:
+            print(f"Error saving scan index: {e}")
+
+    @staticmethod
+    def file_stamp(st):
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def get_dir(self, rel_dir, mtime_ns=None):
+        """Returns the cached listing of rel_dir, optionally only if unchanged."""
+        entry = self.dirs.get(rel_dir)
+        if entry is None:
+            return None
+        if mtime_ns is not None and entry["mtime"] != mtime_ns:
+            return None
+        return entry
+
+    def set_dir(self, rel_dir, mtime_ns, files, subdirs):
+        self.dirs[rel_dir] = {"mtime": mtime_ns, "files": files, "subdirs": subdirs}
+        self.dirty = True
+
+    def get_file(self, rel_path, stamp=None):
+        """Returns the cached file entry, optionally only if its stamp matches."""
+        entry = self.files.get(rel_path)
+        if entry is None:
+            return None
+        if stamp is not None and entry["stamp"] != stamp:
+            return None
+        return entry
+
+    def set_file(self, rel_path, stamp, info_dict):
+        self.files[rel_path] = {"stamp": stamp, "info": info_dict}
+        self.dirty = True
+
+    def prune(self, seen_dirs, seen_files):
+        """Drops entries for directories and files that no longer exist."""
+        for rel_dir in [d for d in self.dirs if d not in seen_dirs]:
+            del self.dirs[rel_dir]
+            self.dirty = True
+        for rel_path in [p for p in self.files if p not in seen_files]:
+            del self.files[rel_path]
+            self.dirty = True
@@ -0,0 +1,153 @@
+import re
+
+# load_tensors:        CUDA0 model buffer size =  3577.56 MiB
+# llama_kv_cache:      CUDA0 KV buffer size =   512.00 MiB
+# llama_context:  CUDA_Host  output buffer size =     0.58 MiB
+_BUFFER_RE = re.compile(
+    r"^\w+:\s+(?P<device>\S+)\s+(?P<kind>model|KV|compute|output|RS)\s+buffer"
+    r"\s+size\s*=\s*(?P<mib>[\d.]+)\s*MiB"
+)
+# llama_kv_cache: size =  512.00 MiB (  4096 cells,  32 layers,  1/1 seqs), ...
+_KV_SIZE_RE = re.compile(
+    r"^llama_kv_cache\w*:\s+size\s*=\s*(?P<mib>[\d.]+)\s*MiB\s*\(\s*(?P<cells>\d+)"
+    r"\s+cells,\s*(?P<layers>\d+)\s+layers"
+)
+# llama_params_fit_impl: ... / common_fit_params: ...
+_FIT_RE = re.compile(
+    r"^(?:llama_params_fit|common_fit_params|common_params_fit)\w*:\s*(?P<msg>.*\S)"
+)
+# slot   load_model: id  0 | task -1 | new slot, n_ctx = 4096
+_SLOT_RE = re.compile(
+    r"\bid\s+(?P<id>\d+)\s*\|\s*task\s+-?\d+\s*\|\s*new slot,?\s+n_ctx(?:_slot)?\s*=\s*(?P<n_ctx>\d+)"
+)
+# prompt eval time =  123.45 ms /   100 tokens (  1.23 ms per token,  810.00 tokens per second)
+_TIMING_RE = re.compile(
+    r"(?P<phase>prompt eval|eval) time\s*=\s*(?P<ms>[\d.]+)\s*ms\s*/\s*(?P<tokens>\d+)"
+    r"\s+tokens.*?(?P<tps>[\d.]+)\s+tokens per second"
+)
+# slot print_timing: id  0 | task 0 | draft acceptance rate = 0.57143 (   12 accepted /    21 generated)
+_DRAFT_RE = re.compile(
+    r"draft acceptance rate\s*=\s*(?P<rate>[\d.]+)\s*\(\s*(?P<accepted>\d+)\s+accepted"
+    r"\s*/\s*(?P<generated>\d+)\s+generated"
+)
+# main: server is listening on http://127.0.0.1:8080 - starting the main loop
+_LISTENING_RE = re.compile(r"server is listening on (?P<url>\S+)")
+_LOADED_RE = re.compile(r"^\w+:\s+model loaded\s*$")
+_ERROR_RE = re.compile(r"\b(?:error|failed|out of memory)\b", re.IGNORECASE)
+
+
+def parse_log_line(line):
+    """Turns one llama-server log line into an event dict, or None.
+
+    Events have a "type" of "buffer" (device, kind, mib), "kv_cache" (mib,
+    cells, layers), "fit" (message), "slot" (id, n_ctx), "timing" (phase
+    "prompt"/"eval", ms, tokens, tps), "draft" (rate, accepted, generated
+    speculative tokens of one request), "listening" (url), "loaded" or
+    "error" (message).
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    m = _BUFFER_RE.match(line)
+    if m:
+        return {
+            "type": "buffer",
+            "device": m.group("device"),
+            "kind": m.group("kind"),
+            "mib": float(m.group("mib")),
+        }
+    m = _KV_SIZE_RE.match(line)
+    if m:
+        return {
+            "type": "kv_cache",
+            "mib": float(m.group("mib")),
+            "cells": int(m.group("cells")),
+            "layers": int(m.group("layers")),
+        }
+    m = _FIT_RE.match(line)
+    if m:
+        return {"type": "fit", "message": m.group("msg")}
+    m = _SLOT_RE.search(line)
+    if m:
+        return {
+            "type": "slot",
+            "id": int(m.group("id")),
+            "n_ctx": int(m.group("n_ctx")),
+        }
+    m = _TIMING_RE.search(line)
+    if m:
+        return {
+            "type": "timing",
+            "phase": "prompt" if m.group("phase") == "prompt eval" else "eval",
+            "ms": float(m.group("ms")),
+            "tokens": int(m.group("tokens")),
+            "tps": float(m.group("tps")),
+        }
+    m = _DRAFT_RE.search(line)
+    if m:
+        return {
+            "type": "draft",
+            "rate": float(m.group("rate")),
+            "accepted": int(m.group("accepted")),
+            "generated": int(m.group("generated")),
+        }
+    m = _LISTENING_RE.search(line)
+    if m:
+        return {"type": "listening", "url": m.group("url")}
+    if _LOADED_RE.match(line):
+        return {"type": "loaded"}
+    if _ERROR_RE.search(line):
+        return {"type": "error", "message": line}
+    return None
+
+
+def format_load_report(events, load_seconds=None, time_to_ready=None):
+    """Multi-line summary of one launch from its parsed events."""
+    buffers = {}
+    kv = None
+    fit = []
+    slots = {}
+    errors = []
+    listening = None
+    for event in events:
+        kind = event["type"]
+        if kind == "buffer":
+            dev = buffers.setdefault(event["device"], {})
+            dev[event["kind"]] = dev.get(event["kind"], 0.0) + event["mib"]
+        elif kind == "kv_cache":
+            kv = event
+        elif kind == "fit":
+            fit.append(event["message"])
+        elif kind == "slot":
+            slots[event["id"]] = event["n_ctx"]
+        elif kind == "listening":
+            listening = event["url"]
+        elif kind == "error":
+            errors.append(event["message"])
+
+    lines = []
+    if load_seconds is not None:
+        lines.append(f"Model loaded in {load_seconds:.1f}s")
+    if time_to_ready is not None:
+        lines.append(f"Ready (/health OK) in {time_to_ready:.2f}s")
+    if listening:
+        lines.append(f"Listening on {listening}")
+    for device in sorted(buffers):
+        parts = [f"{k} {v:.0f} MiB" for k, v in buffers[device].items()]
+        total = sum(buffers[device].values())
+        lines.append(f"{device}: {total:.0f} MiB ({', '.join(parts)})")
+    if kv:
+        lines.append(
+            f"KV cache: {kv['mib']:.0f} MiB, {kv['cells']} cells, {kv['layers']} layers"
+        )
+    if slots:
+        ctx = sorted(set(slots.values()))
+        lines.append(f"Slots: {len(slots)} (n_ctx {', '.join(str(c) for c in ctx)})")
+    if fit:
+        lines.append("Fit:")
+        lines.extend(f"  {msg}" for msg in fit)
+    if errors:
+        lines.append("Errors:")
+        lines.extend(f"  {msg}" for msg in errors[-10:])
+    return "\n".join(lines)
@@ -0,0 +1,276 @@
+import collections
+import http.client
+import subprocess
+import threading
+import time
+
+from core.process_backend import (
+    GRACE_SECONDS,
+    escalate_after,
+    force_kill,
+    request_stop,
+    spawn_kwargs,
+)
+from core.server_log import parse_log_line
+
+# Lines kept in memory per server; older output is dropped
+MAX_LOG_LINES = 5000
+
+# Server lifecycle states
+SPAWNING = "spawning"  # process started, HTTP port not answering yet
+LOADING = "loading"  # /health answers 503 while the model loads
+READY = "ready"  # /health answered 200
+DRAINING = "draining"  # stop requested, waiting for the process to exit
+STOPPED = "stopped"
+CRASHED = "crashed"  # exited without being asked to
+FINAL_STATES = (STOPPED, CRASHED)
+
+# /health probe interval starts here and doubles up to PROBE_MAX_INTERVAL
+PROBE_MIN_INTERVAL = 0.02
+PROBE_MAX_INTERVAL = 0.25
+
+
+def probe_health(host, port, timeout=1.0):
+    """GETs /health. Returns the HTTP status, or None if nothing answered."""
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request("GET", "/health")
+        return conn.getresponse().status
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+
+
+class ServerProcess:
+    """A llama-server process whose output is captured and parsed.
+
+    stdout and stderr are merged into one pipe that a daemon thread reads
+    line by line, so the GUI never blocks on it. Lines go into a bounded
+    ring buffer (with a running sequence number so readers can ask for
+    what's new) and every recognised line is also recorded as an event,
+    see core.server_log.parse_log_line(). Events up to the "listening"
+    line are additionally kept in load_events for the load report.
+
+    The server runs in its own process group (see core.process_backend),
+    so stop() and kill() reach any children too.
+
+    A second thread tracks the lifecycle: SPAWNING -> LOADING -> READY,
+    then DRAINING once stop() is called and STOPPED or CRASHED when the
+    process exits. If a port is given, /health is probed with a short
+    exponential backoff and time_to_ready is the time from spawn to the
+    first 200; without a port the server counts as ready once it logs that
+    it is listening.
+    """
+
+    def __init__(
+        self, cmd, cwd=None, env=None, max_lines=MAX_LOG_LINES, port=None, host=None
+    ):
+        self.cmd = cmd
+        self.port = port
+        self.host = host or "127.0.0.1"
+        self.started = time.monotonic()
+        self.load_seconds = None
+        self.time_to_ready = None
+        self.state = SPAWNING
+        self.state_times = [(SPAWNING, 0.0)]
+        self._stop_requested = False
+        self._signalled = False
+        # Runs stop()'s before_exit while the server is still up
+        self._drain_thread = None
+        self.lines = collections.deque(maxlen=max_lines)
+        self.events = collections.deque(maxlen=max_lines)
+        self.load_events = []
+        self.loading = True
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.process = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **spawn_kwargs(),
+        )
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+        self._monitor = threading.Thread(target=self._watch_lifecycle, daemon=True)
+        self._monitor.start()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    def poll(self):
+        return self.process.poll()
+
+    def terminate(self):
+        self.stop()
+
+    def stop(self, grace=GRACE_SECONDS, before_exit=None):
+        """Asks the server to exit; the state moves to DRAINING.
+
+        The process group gets SIGTERM and is killed if it is still
+        running grace seconds later; on Windows it is killed right away
+        (see process_backend.request_stop()). If the server was ready,
+        before_exit() (e.g. saving its KV cache slots) runs on a background
+        thread first and the signal is sent once it returns; stopping again
+        meanwhile sends it right away. Never blocks.
+        """
+        with self._lock:
+            first = not self._stop_requested
+            self._stop_requested = True
+            was_ready = self.state == READY
+            if self.state not in FINAL_STATES:
+                self._set_state(DRAINING)
+        if first and before_exit is not None and was_ready:
+            # Not a daemon, so closing the launcher lets the save finish
+            self._drain_thread = threading.Thread(
+                target=self._drain, args=(before_exit, grace)
+            )
+            self._drain_thread.start()
+            return
+        self._signal_stop(grace)
+
+    def _drain(self, before_exit, grace):
+        try:
+            before_exit()
+        except Exception as e:
+            print(f"Error before stopping server: {e}")
+        self._signal_stop(grace)
+
+    def _signal_stop(self, grace):
+        if self.process.poll() is None:
+            request_stop(self.process)
+            with self._lock:
+                first = not self._signalled
+                self._signalled = True
+            if first:
+                escalate_after(self.process, grace)
+
+    @property
+    def draining(self):
+        """True while stop()'s before_exit is still running."""
+        return self._drain_thread is not None and self._drain_thread.is_alive()
+
+    @property
+    def stop_requested(self):
+        return self._stop_requested
+
+    @property
+    def exit_time(self):
+        """Seconds from spawn to exit, or None while running."""
+        if self.state not in FINAL_STATES:
+            return None
+        return self.state_times[-1][1]
+
+    def kill(self):
+        """Kills the server together with any children it spawned."""
+        with self._lock:
+            self._stop_requested = True
+        force_kill(self.process)
+
+    def wait(self, timeout=None):
+        """Waits for the process to exit and for the final state to be set.
+
+        A running before_exit (see stop()) is waited for first; timeout
+        counts from when the exit signal is sent.
+        """
+        if self._drain_thread is not None:
+            self._drain_thread.join()
+        code = self.process.wait(timeout)
+        self._monitor.join(timeout)
+        return code
+
+    def _set_state(self, state):
+        # Caller holds self._lock
+        if state != self.state:
+            self.state = state
+            self.state_times.append((state, time.monotonic() - self.started))
+
+    def _advance(self, state):
+        """Moves forward to state unless stopping or already past it."""
+        order = (SPAWNING, LOADING, READY)
+        with self._lock:
+            if self._stop_requested or self.state not in order:
+                return
+            if order.index(state) > order.index(self.state):
+                if state == READY:
+                    self.time_to_ready = time.monotonic() - self.started
+                self._set_state(state)
+
+    def _watch_lifecycle(self):
+        interval = PROBE_MIN_INTERVAL
+        while self.process.poll() is None and self.state in (SPAWNING, LOADING):
+            if self.port:
+                status = probe_health(self.host, self.port)
+                if status == 200:
+                    self._advance(READY)
+                    break
+                if status is not None:
+                    self._advance(LOADING)
+            elif not self.loading:
+                self._advance(READY)
+                break
+            time.sleep(interval)
+            interval = min(interval * 2, PROBE_MAX_INTERVAL)
+
+        code = self.process.wait()
+        # Let the reader drain what's left so the exit line comes last
+        self._reader.join(2.0)
+        with self._lock:
+            self._seq += 1
+            self.lines.append((self._seq, f"Server exited with code {code}"))
+            if self._stop_requested or code == 0:
+                self._set_state(STOPPED)
+            else:
+                self._set_state(CRASHED)
+
+    def _read_output(self):
+        for raw in iter(self.process.stdout.readline, b""):
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            event = parse_log_line(line)
+            with self._lock:
+                self._seq += 1
+                self.lines.append((self._seq, line))
+                if event is not None:
+                    event["time"] = time.monotonic() - self.started
+                    if event["type"] == "loaded" and self.load_seconds is None:
+                        self.load_seconds = event["time"]
+                    self.events.append(event)
+                    if self.loading:
+                        self.load_events.append(event)
+                        self.loading = event["type"] != "listening"
+        self.process.stdout.close()
+
+    def lines_since(self, seq):
+        """Returns (last_seq, [lines]) for lines after seq still in the buffer."""
+        with self._lock:
+            new = [line for n, line in self.lines if n > seq]
+            return self._seq, new
+
+    def tail(self, n):
+        """Last n captured lines."""
+        with self._lock:
+            return [line for _, line in list(self.lines)[-n:]]
+
+    def last_event_time(self, kind):
+        """Time (seconds since spawn) of the newest event of a kind, or None."""
+        with self._lock:
+            for event in reversed(self.events):
+                if event["type"] == kind:
+                    return event["time"]
+        return None
+
+    def get_events(self, kind=None):
+        with self._lock:
+            return [e for e in self.events if kind is None or e["type"] == kind]
+
+    @property
+    def output_closed(self):
+        return not self._reader.is_alive()
@@ -0,0 +1,270 @@
+import http.client
+import json
+import os
+import re
+import threading
+
+from core.blue_green import profile_key
+from core.server_process import READY
+
+# Default cap on all saved slot files together
+DEFAULT_MAX_BYTES = 16 * 1024**3
+# Seconds one slot save or restore may take
+SLOT_TIMEOUT = 120.0
+# Seconds between checks for newly ready instances
+CHECK_INTERVAL = 0.5
+
+_SLOT_FILE_RE = re.compile(r"^slot(\d+)\.bin$")
+
+
+def profile_dir_name(profile):
+    """A directory name for a profile that is safe on every platform."""
+    return re.sub(r"[^\w.-]+", "_", profile).strip("._") or "_"
+
+
+def slot_filename(slot_id):
+    return f"slot{slot_id}.bin"
+
+
+def _request(port, method, path, body=None, host="127.0.0.1", timeout=SLOT_TIMEOUT):
+    """Sends a JSON request; returns the decoded response, raises on errors."""
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        data = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        conn.request(method, path, data, headers)
+        resp = conn.getresponse()
+        payload = resp.read()
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}: {payload[:200]!r}")
+        return json.loads(payload or b"{}")
+    finally:
+        conn.close()
+
+
+def list_slots(port, host="127.0.0.1"):
+    """Parsed GET /slots of a server."""
+    return _request(port, "GET", "/slots", host=host, timeout=5.0)
+
+
+def save_slot(port, slot_id, filename, host="127.0.0.1"):
+    """Saves a slot's KV cache to filename in the server's --slot-save-path."""
+    return _request(
+        port, "POST", f"/slots/{slot_id}?action=save", {"filename": filename}, host
+    )
+
+
+def restore_slot(port, slot_id, filename, host="127.0.0.1"):
+    """Loads a slot's KV cache back from filename."""
+    return _request(
+        port, "POST", f"/slots/{slot_id}?action=restore", {"filename": filename}, host
+    )
+
+
+class SlotCache:
+    """Keeps the KV cache slots of profiles across server restarts.
+
+    Profiles with "slot-cache" set are launched with --slot-save-path
+    pointing at root/<profile>/. When such an instance is stopped while
+    ready, save_all() writes every slot that has served a request to
+    slot<id>.bin there first; once it is ready again, a background thread
+    restores the files, so long shared prompts don't need to be prefilled
+    again.
+
+    Saved files are kept least-recently-used first under a size cap of
+    max_bytes over all profiles (0 = no cap); restoring a file counts as
+    using it.
+    """
+
+    def __init__(self, supervisor, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.supervisor = supervisor
+        self.root = root
+        self.max_bytes = max_bytes
+        # Instance key -> short text about the last save/restore
+        self.status = {}
+        self.on_saved = None
+        self._handled = set()
+        # Processes whose restore has finished
+        self._restored = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def profile_dir(self, key):
+        return os.path.join(self.root, profile_dir_name(profile_key(key)))
+
+    def launch_params(self, key, params):
+        """Extra launch parameters for an instance of a profile."""
+        if not params.get("slot-cache"):
+            return {}
+        path = self.profile_dir(key)
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            print(f"Error creating slot cache directory {path}: {e}")
+            return {}
+        return {"slot-save-path": path}
+
+    def save_all(self, inst):
+        """Saves the used slots of a running instance. Returns how many.
+
+        The supervisor calls this on a background thread while a stopped
+        instance drains; on_saved, if set, is then called as
+        on_saved(key, slots saved, tokens saved).
+        """
+        if not inst.params.get("slot-save-path"):
+            return 0
+        self.status[inst.key] = "saving slots"
+        try:
+            slots = list_slots(inst.port)
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"Error listing slots of {inst.key}: {e}")
+            self.status.pop(inst.key, None)
+            return 0
+        saved = 0
+        tokens = 0
+        for slot in slots:
+            # id_task stays -1 until a slot serves its first request
+            if slot.get("id_task", -1) < 0:
+                continue
+            try:
+                result = save_slot(inst.port, slot["id"], slot_filename(slot["id"]))
+            except (OSError, RuntimeError, ValueError) as e:
+                print(f"Error saving slot {slot['id']} of {inst.key}: {e}")
+                continue
+            saved += 1
+            tokens += result.get("n_saved", 0)
+        if saved:
+            self.status[inst.key] = f"saved {saved} slots ({tokens} tokens)"
+            self.enforce_limit()
+        else:
+            self.status.pop(inst.key, None)
+        if self.on_saved is not None:
+            self.on_saved(inst.key, saved, tokens)
+        return saved
+
+    def restore_all(self, inst):
+        """Restores an instance's saved slot files. Returns how many."""
+        path = inst.params.get("slot-save-path")
+        if not path or not os.path.isdir(path):
+            return 0
+        try:
+            slot_ids = {slot["id"] for slot in list_slots(inst.port)}
+        except (OSError, RuntimeError, ValueError):
+            slot_ids = None
+        restored = 0
+        tokens = 0
+        for name in sorted(os.listdir(path)):
+            m = _SLOT_FILE_RE.match(name)
+            if not m or (slot_ids is not None and int(m.group(1)) not in slot_ids):
+                continue
+            try:
+                result = restore_slot(inst.port, int(m.group(1)), name)
+            except (OSError, RuntimeError, ValueError) as e:
+                print(f"Error restoring {name} for {inst.key}: {e}")
+                continue
+            restored += 1
+            tokens += result.get("n_restored", 0)
+            try:
+                os.utime(os.path.join(path, name))
+            except OSError:
+                pass
+        if restored:
+            self.status[inst.key] = f"restored {restored} slots ({tokens} tokens)"
+        return restored
+
+    def files(self):
+        """Saved slot files, least recently used first.
+
+        Returns dicts with "profile" (directory name), "name", "path",
+        "size" and "mtime".
+        """
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for profile in os.listdir(self.root):
+            path = os.path.join(self.root, profile)
+            if not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                full = os.path.join(path, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                entries.append(
+                    {
+                        "profile": profile,
+                        "name": name,
+                        "path": full,
+                        "size": st.st_size,
+                        "mtime": st.st_mtime,
+                    }
+                )
+        return sorted(entries, key=lambda e: e["mtime"])
+
+    def total_bytes(self):
+        return sum(e["size"] for e in self.files())
+
+    def delete(self, path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Error deleting slot file {path}: {e}")
+
+    def enforce_limit(self):
+        """Deletes least recently used files until under max_bytes. Returns them."""
+        if not self.max_bytes:
+            return []
+        files = self.files()
+        total = sum(e["size"] for e in files)
+        evicted = []
+        for entry in files:
+            if total <= self.max_bytes:
+                break
+            self.delete(entry["path"])
+            total -= entry["size"]
+            evicted.append(entry)
+        return evicted
+
+    def restore_pending(self, inst):
+        """True while a ready instance's saved slots may still be restored."""
+        return (
+            bool(inst.params.get("slot-save-path"))
+            and inst.process not in self._restored
+        )
+
+    def poll(self):
+        """Restores slots of instances that became ready since the last poll."""
+        with self._lock:
+            instances = self.supervisor.list()
+            processes = {inst.process for inst in instances}
+            self._handled &= processes
+            self._restored &= processes
+            for inst in instances:
+                if inst.state != READY or inst.process in self._handled:
+                    continue
+                self._handled.add(inst.process)
+                try:
+                    self.restore_all(inst)
+                finally:
+                    self._restored.add(inst.process)
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error restoring slots: {e}")
+
+    def start(self, interval=CHECK_INTERVAL):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
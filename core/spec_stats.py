@@ -0,0 +1,253 @@
+import json
+import os
+import time
+
+from core.command_builder import DRAFT_MODEL_SPEC_TYPE
+
+# Prompt-length buckets requests are grouped by: (upper bound, name)
+WORKLOADS = [(512, "short"), (4096, "medium"), (None, "long")]
+# Requests a draft length needs before its tok/s is trusted
+MIN_REQUESTS = 3
+
+
+def workload_of(prompt_tokens):
+    """Name of the prompt-length bucket a request falls in."""
+    for limit, name in WORKLOADS:
+        if limit is None or (prompt_tokens or 0) < limit:
+            return name
+    return WORKLOADS[-1][1]
+
+
+def requests_from_events(events):
+    """Per-request generation stats from parsed llama-server log events.
+
+    llama-server logs prompt eval and eval timings when a request finishes,
+    followed by the draft acceptance rate when speculative decoding ran.
+    Returns dicts with "prompt_tokens", "gen_tokens", "gen_ms", and
+    "accepted"/"generated" draft tokens (0 without speculation).
+    """
+    requests = []
+    prompt = None
+    current = None
+    for event in events:
+        kind = event["type"]
+        if kind == "timing" and event["phase"] == "prompt":
+            prompt = event
+        elif kind == "timing" and event["phase"] == "eval":
+            current = {
+                "prompt_tokens": prompt["tokens"] if prompt else 0,
+                "gen_tokens": event["tokens"],
+                "gen_ms": event["ms"],
+                "accepted": 0,
+                "generated": 0,
+            }
+            requests.append(current)
+            prompt = None
+        elif kind == "draft" and current is not None:
+            current["accepted"] += event["accepted"]
+            current["generated"] += event["generated"]
+            current = None
+    return requests
+
+
+def spec_config(params):
+    """(spec type, draft length) a profile runs with; length None if unset.
+
+    With a separate draft model the type names the draft file, e.g.
+    "draft-model:Qwen3-0.6B-Q8_0.gguf", so each pairing is measured apart.
+    """
+    spec_type = params.get("spec-type") or "none"
+    if spec_type == DRAFT_MODEL_SPEC_TYPE:
+        if not params.get("model-draft"):
+            return "none", None
+        spec_type = f"{spec_type}:{os.path.basename(params['model-draft'])}"
+    if spec_type == "none":
+        return spec_type, None
+    n_max = params.get("spec-draft-n-max")
+    if n_max is None or int(n_max) <= 0:
+        return spec_type, None
+    return spec_type, int(n_max)
+
+
+class SpecStats:
+    """Speculative decoding results kept in spec_stats.json.
+
+    Each record sums up one server session of a profile for one workload
+    (see WORKLOADS): "time", "profile", "spec_type", "draft_n_max",
+    "workload", "requests", "prompt_tokens", "gen_tokens", "gen_ms" and the
+    draft tokens "accepted" of "generated". Sessions without speculative
+    decoding are kept too (spec_type "none") as the baseline.
+    """
+
+    MAX_RECORDS = 1000
+
+    def __init__(self, filepath="spec_stats.json"):
+        self.filepath = filepath
+        self.records = []
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "r") as f:
+                    self.records = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.records = []
+        else:
+            self.records = []
+
+    def save(self):
+        try:
+            with open(self.filepath, "w") as f:
+                json.dump(self.records, f, indent=4)
+        except OSError as e:
+            print(f"Error saving spec stats: {e}")
+
+    def record_session(self, profile, params, events):
+        """Records the requests found in a session's events; returns how many."""
+        spec_type, n_max = spec_config(params)
+        totals = {}
+        for request in requests_from_events(events):
+            if request["gen_tokens"] <= 0 or request["gen_ms"] <= 0:
+                continue
+            workload = workload_of(request["prompt_tokens"])
+            total = totals.setdefault(
+                workload,
+                {
+                    "requests": 0,
+                    "prompt_tokens": 0,
+                    "gen_tokens": 0,
+                    "gen_ms": 0.0,
+                    "accepted": 0,
+                    "generated": 0,
+                },
+            )
+            total["requests"] += 1
+            for key in (
+                "prompt_tokens",
+                "gen_tokens",
+                "gen_ms",
+                "accepted",
+                "generated",
+            ):
+                total[key] += request[key]
+        now = time.time()
+        for workload, total in totals.items():
+            record = {
+                "time": now,
+                "profile": profile,
+                "spec_type": spec_type,
+                "draft_n_max": n_max,
+                "workload": workload,
+            }
+            record.update(total)
+            self.records.append(record)
+        if totals:
+            del self.records[: -self.MAX_RECORDS]
+            self.save()
+        return sum(t["requests"] for t in totals.values())
+
+    def for_profile(self, profile):
+        return [r for r in self.records if r.get("profile") == profile]
+
+    def main_workload(self, profile):
+        """The workload the profile served most requests in, or None."""
+        counts = {}
+        for r in self.for_profile(profile):
+            counts[r["workload"]] = counts.get(r["workload"], 0) + r["requests"]
+        if not counts:
+            return None
+        return max(counts, key=counts.get)
+
+    def summary(self, profile, workload=None):
+        """Measured results per (spec type, draft length).
+
+        Returns {(spec_type, draft_n_max): {"requests", "gen_tps",
+        "acceptance" (None without drafts)}} over all workloads, or one.
+        """
+        sums = {}
+        for r in self.for_profile(profile):
+            if workload is not None and r["workload"] != workload:
+                continue
+            key = (r["spec_type"], r["draft_n_max"])
+            s = sums.setdefault(
+                key,
+                {
+                    "requests": 0,
+                    "gen_tokens": 0,
+                    "gen_ms": 0.0,
+                    "accepted": 0,
+                    "generated": 0,
+                },
+            )
+            for k in s:
+                s[k] += r[k]
+        return {
+            key: {
+                "requests": s["requests"],
+                "gen_tps": (
+                    s["gen_tokens"] / s["gen_ms"] * 1000 if s["gen_ms"] else None
+                ),
+                "acceptance": (
+                    s["accepted"] / s["generated"] if s["generated"] else None
+                ),
+            }
+            for key, s in sums.items()
+        }
+
+    def recommend(self, profile, spec_type, workload=None):
+        """Draft length of spec_type with the highest measured gen tok/s.
+
+        Only lengths with at least MIN_REQUESTS requests count. Returns
+        {"draft_n_max", "gen_tps", "acceptance", "baseline_tps" (tok/s
+        without speculative decoding, or None)}, or None if nothing
+        qualifies.
+        """
+        summary = self.summary(profile, workload)
+        candidates = [
+            (key[1], s)
+            for key, s in summary.items()
+            if key[0] == spec_type
+            and key[1] is not None
+            and s["requests"] >= MIN_REQUESTS
+            and s["gen_tps"]
+        ]
+        if not candidates:
+            return None
+        n_max, best = max(candidates, key=lambda c: c[1]["gen_tps"])
+        baseline = summary.get(("none", None))
+        if baseline is not None and baseline["requests"] < MIN_REQUESTS:
+            baseline = None
+        return {
+            "draft_n_max": n_max,
+            "gen_tps": best["gen_tps"],
+            "acceptance": best["acceptance"],
+            "baseline_tps": baseline["gen_tps"] if baseline else None,
+        }
+
+    def format_report(self, profile, params):
+        """Lines describing measured draft lengths for the load report."""
+        spec_type, current = spec_config(params)
+        workload = self.main_workload(profile)
+        summary = self.summary(profile, workload)
+        if not summary:
+            return []
+        lines = [f"Speculative decoding ({workload} prompts):"]
+        for (kind, n_max), s in sorted(
+            summary.items(), key=lambda i: (i[0][0], i[0][1] or 0)
+        ):
+            if s["gen_tps"] is None:
+                continue
+            name = "off" if kind == "none" else f"{kind} draft max {n_max or 'default'}"
+            text = f"  {name}: {s['gen_tps']:.1f} tok/s over {s['requests']} requests"
+            if s["acceptance"] is not None:
+                text += f", {s['acceptance']:.0%} drafts accepted"
+            lines.append(text)
+        if spec_type != "none":
+            best = self.recommend(profile, spec_type, workload)
+            if best is not None:
+                if best["draft_n_max"] != current:
+                    lines.append(f"  Recommended draft max: {best['draft_n_max']}")
+                if best["baseline_tps"] and best["baseline_tps"] >= best["gen_tps"]:
+                    lines.append("  Speculative decoding is not faster than without it")
+        return lines
@@ -0,0 +1,249 @@
+import subprocess
+import threading
+import time
+
+from core.gpu_info import query_gpu_processes
+from core.metrics import MetricsSeries
+from core.process_backend import port_is_free, process_rss, wait_port_free
+from core.server_process import FINAL_STATES, READY, STOPPED, ServerProcess
+
+DEFAULT_PORT = 8080
+# How many ports above the requested one are tried when it is taken
+PORT_SEARCH_RANGE = 100
+# Seconds between RAM/VRAM samples of running instances
+RESOURCE_INTERVAL = 2.0
+
+
+class Instance:
+    """One supervised llama-server, keyed by profile name.
+
+    params are the launch parameters with the port actually assigned;
+    requested_params are the ones the instance was started with. rss and
+    vram are the last sampled bytes (None if unknown); metrics holds the
+    /metrics time series when the server was started with --metrics.
+    last_activity is the monotonic time a request was last seen and busy
+    whether one was in progress at the last activity check.
+    """
+
+    def __init__(self, key, requested_params, params, process):
+        self.key = key
+        self.requested_params = requested_params
+        self.params = params
+        self.port = params.get("port")
+        self.process = process
+        self.restarts = 0
+        self.rss = None
+        self.vram = None
+        self.last_activity = time.monotonic()
+        self.busy = False
+        self.metrics = MetricsSeries() if params.get("metrics") else None
+
+    @property
+    def state(self):
+        return self.process.state if self.process else STOPPED
+
+    @property
+    def is_live(self):
+        return self.state not in FINAL_STATES
+
+    @property
+    def uptime(self):
+        return time.monotonic() - self.process.started if self.process else 0.0
+
+    @property
+    def idle_seconds(self):
+        return time.monotonic() - self.last_activity
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+
+class Supervisor:
+    """Runs several llama-server instances side by side.
+
+    Instances are keyed by profile name; starting a profile whose port is
+    already used (by another instance or any other program) moves it to
+    the next free port. A background thread samples each live instance's
+    RAM (RSS) and VRAM (nvidia-smi compute apps) every RESOURCE_INTERVAL,
+    and scrapes /metrics of ready instances that serve it.
+
+    on_before_start, if set, is called as on_before_start(key, params)
+    before a new process is spawned, e.g. to free VRAM for it. It runs
+    outside the supervisor's lock and may block, so GUI code does that
+    work on a worker thread first.
+
+    slot_cache, if set, is a SlotCache that adds --slot-save-path to the
+    profiles using it and saves their slots whenever a ready instance is
+    stopped (before it is signalled to exit, without blocking stop()).
+    """
+
+    def __init__(self, command_builder=None, server_dir=None):
+        self.command_builder = command_builder
+        self.server_dir = server_dir
+        self.instances = {}
+        self._lock = threading.RLock()
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+        self.on_before_start = None
+        self.slot_cache = None
+
+    def configure(self, command_builder, server_dir):
+        self.command_builder = command_builder
+        self.server_dir = server_dir
+
+    def get(self, key):
+        return self.instances.get(key)
+
+    def list(self):
+        with self._lock:
+            return list(self.instances.values())
+
+    def live(self):
+        return [inst for inst in self.list() if inst.is_live]
+
+    def allocate_port(self, requested, host="127.0.0.1", key=None):
+        """requested if it's free, else the next free port above it."""
+        with self._lock:
+            taken = {
+                inst.port
+                for inst in self.instances.values()
+                if inst.is_live and inst.key != key
+            }
+        for port in range(requested, requested + PORT_SEARCH_RANGE):
+            if port not in taken and port_is_free(port, host):
+                return port
+        raise RuntimeError(f"No free port in {requested}-{port}")
+
+    def start(self, key, params):
+        """Starts the profile; returns the existing instance if it's live."""
+        inst = self.instances.get(key)
+        if inst is not None and inst.is_live:
+            return inst
+        # May stop and wait for other instances, so not under the lock
+        if self.on_before_start is not None:
+            self.on_before_start(key, params)
+        with self._lock:
+            inst = self.instances.get(key)
+            if inst is not None and inst.is_live:
+                return inst
+            requested = int(params.get("port") or DEFAULT_PORT)
+            host = "0.0.0.0" if params.get("host_0000") else "127.0.0.1"
+            assigned = dict(params, port=self.allocate_port(requested, host, key))
+            if self.slot_cache is not None:
+                assigned.update(self.slot_cache.launch_params(key, params))
+            cmd, env = self.command_builder.build_command(assigned)
+            process = ServerProcess(
+                cmd, cwd=self.server_dir, env=env, port=assigned["port"]
+            )
+            restarts = inst.restarts if inst is not None else 0
+            inst = Instance(key, dict(params), assigned, process)
+            inst.restarts = restarts
+            # Re-insert so the dict stays in launch order
+            self.instances.pop(key, None)
+            self.instances[key] = inst
+            return inst
+
+    def promote(self, from_key, key, retired_key):
+        """Moves the instance at from_key to key in one step.
+
+        The instance it replaces, if any, is kept under retired_key (so it
+        can be drained and stopped) and returned.
+        """
+        with self._lock:
+            new = self.instances.pop(from_key)
+            old = self.instances.pop(key, None)
+            if old is not None:
+                new.restarts = old.restarts
+                old.key = retired_key
+                self.instances[retired_key] = old
+            new.key = key
+            self.instances[key] = new
+            return old
+
+    def stop(self, key):
+        inst = self.instances.get(key)
+        if inst is not None and inst.is_live:
+            inst.process.stop(before_exit=self._before_exit(inst))
+        return inst
+
+    def restart(self, key, params=None, timeout=10):
+        """Stops the instance, waits for it to exit and starts it again."""
+        inst = self.instances.get(key)
+        if inst is None:
+            raise KeyError(key)
+        self.stop(key)
+        self.wait_stopped(inst, timeout)
+        new = self.start(key, params if params is not None else inst.requested_params)
+        new.restarts += 1
+        return new
+
+    def wait_stopped(self, inst, timeout=10):
+        """Waits for an instance to exit and its port to be released.
+
+        The process group is killed if it hasn't exited after timeout.
+        Returns False if the port is still taken afterwards.
+        """
+        try:
+            inst.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            inst.process.kill()
+            inst.process.wait()
+        if inst.port is None:
+            return True
+        host = "0.0.0.0" if inst.params.get("host_0000") else "127.0.0.1"
+        if not wait_port_free(inst.port, host):
+            print(f"Port {inst.port} of {inst.key} is still in use")
+            return False
+        return True
+
+    def remove(self, key):
+        """Forgets a stopped instance."""
+        with self._lock:
+            inst = self.instances.get(key)
+            if inst is not None and not inst.is_live:
+                del self.instances[key]
+
+    def stop_all(self):
+        for inst in self.live():
+            inst.process.stop(before_exit=self._before_exit(inst))
+
+    def _before_exit(self, inst):
+        """What to run before a ready instance gets the exit signal, or None.
+
+        Instances using the slot cache save their KV cache slots; that runs
+        in the background while the instance is DRAINING.
+        """
+        if self.slot_cache is None or not inst.params.get("slot-save-path"):
+            return None
+        return lambda: self.slot_cache.save_all(inst)
+
+    def sample_resources(self):
+        live = self.live()
+        if not live:
+            return
+        vram = query_gpu_processes()
+        for inst in live:
+            inst.rss = process_rss(inst.process.pid)
+            mib = vram.get(inst.process.pid)
+            inst.vram = mib * 1024 * 1024 if mib is not None else None
+            if inst.metrics is not None and inst.state == READY:
+                inst.metrics.scrape(inst.port)
+
+    def _sample_loop(self, interval):
+        while not self._stop_sampling.wait(interval):
+            try:
+                self.sample_resources()
+            except Exception as e:
+                print(f"Error sampling instance resources: {e}")
+
+    def start_sampling(self, interval=RESOURCE_INTERVAL):
+        if self._sampler is not None and self._sampler.is_alive():
+            return
+        self._stop_sampling.clear()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, args=(interval,), daemon=True
+        )
+        self._sampler.start()
+
+    def stop_sampling(self):
+        self._stop_sampling.set()
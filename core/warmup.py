@@ -0,0 +1,200 @@
+import http.client
+import json
+import threading
+import time
+
+from core.blue_green import profile_key
+from core.server_process import READY
+from core.slot_cache import list_slots
+
+# Seconds one warmup request may take (a long prompt on a slow CPU)
+WARMUP_TIMEOUT = 600.0
+# Seconds between checks for newly ready instances
+CHECK_INTERVAL = 0.5
+
+
+def slot_assignments(n_prompts, n_slots):
+    """(slot id, prompt index) pairs, in the order each slot sends them.
+
+    Every slot gets a prompt and every prompt a slot: with fewer prompts
+    than slots the prompts are repeated so any slot a request lands on has
+    a warm prefix; with more, slots take several in turn (the host-memory
+    prompt cache keeps the earlier ones).
+    """
+    if n_prompts <= 0 or n_slots <= 0:
+        return []
+    return [(i % n_slots, i % n_prompts) for i in range(max(n_prompts, n_slots))]
+
+
+def slot_count(port, params, host="127.0.0.1"):
+    """Number of slots a server runs: --parallel, else what /slots reports."""
+    parallel = params.get("parallel")
+    if parallel is not None and int(parallel) > 0:
+        return int(parallel)
+    try:
+        return max(len(list_slots(port, host)), 1)
+    except (OSError, RuntimeError, ValueError):
+        return 1
+
+
+def warm_slot(port, prompt, slot_id, host="127.0.0.1", timeout=WARMUP_TIMEOUT):
+    """Prefills one slot with a prompt; returns (prompt tokens, prompt ms).
+
+    The prompt is sent as a system message through the chat endpoint, so
+    the cached tokens are the chat-templated prefix real requests share.
+    Raises on connection or HTTP errors.
+    """
+    body = {
+        "messages": [{"role": "system", "content": prompt}],
+        "max_tokens": 1,
+        "cache_prompt": True,
+        "id_slot": slot_id,
+    }
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request(
+            "POST",
+            "/v1/chat/completions",
+            json.dumps(body),
+            {"Content-Type": "application/json"},
+        )
+        resp = conn.getresponse()
+        payload = resp.read()
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}: {payload[:200]!r}")
+        timings = json.loads(payload).get("timings") or {}
+        return timings.get("prompt_n", 0), timings.get("prompt_ms", 0.0)
+    finally:
+        conn.close()
+
+
+def run_warmup(port, prompts, n_slots, host="127.0.0.1"):
+    """Sends the warmup prompts to all slots, one thread per slot.
+
+    Returns {"seconds", "slots": [{"slot", "prompts", "tokens", "ms",
+    "tps" (None if unknown)}], "errors": [str]}.
+    """
+    per_slot = {}
+    for slot_id, index in slot_assignments(len(prompts), n_slots):
+        per_slot.setdefault(slot_id, []).append(prompts[index])
+    results = {
+        slot_id: {"slot": slot_id, "prompts": 0, "tokens": 0, "ms": 0.0}
+        for slot_id in per_slot
+    }
+    errors = []
+
+    def worker(slot_id):
+        result = results[slot_id]
+        for prompt in per_slot[slot_id]:
+            try:
+                tokens, ms = warm_slot(port, prompt, slot_id, host)
+            except (OSError, RuntimeError, ValueError) as e:
+                errors.append(f"slot {slot_id}: {e}")
+                continue
+            result["prompts"] += 1
+            result["tokens"] += tokens
+            result["ms"] += ms
+
+    start = time.monotonic()
+    threads = [
+        threading.Thread(target=worker, args=(slot_id,), daemon=True)
+        for slot_id in per_slot
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    slots = []
+    for slot_id in sorted(results):
+        result = results[slot_id]
+        result["tps"] = (
+            result["tokens"] / result["ms"] * 1000 if result["ms"] > 0 else None
+        )
+        slots.append(result)
+    return {"seconds": time.monotonic() - start, "slots": slots, "errors": errors}
+
+
+def format_report(result):
+    """Lines describing a warmup for the load report."""
+    sent = sum(s["prompts"] for s in result["slots"])
+    lines = [f"Warmup: {sent} prompts in {result['seconds']:.2f}s"]
+    for s in result["slots"]:
+        text = f"  Slot {s['slot']}: {s['tokens']} tokens"
+        if s["tps"] is not None:
+            text += f" at {s['tps']:.1f} tok/s prefill"
+        lines.append(text)
+    for error in result["errors"]:
+        lines.append(f"  Failed: {error}")
+    return lines
+
+
+class WarmupManager:
+    """Prefills the prompt cache of instances right after they get ready.
+
+    get_prompts(profile) returns the warmup prompts of a profile (system
+    prompts, tool schemas, ...), which are sent to every slot with
+    cache_prompt so the first real requests find their prefix cached.
+    Instances whose saved KV cache slots are still being restored by
+    slot_cache are warmed once that finished. results holds the last
+    run_warmup() result per instance key, status a short text about it.
+    """
+
+    def __init__(self, supervisor, get_prompts, slot_cache=None):
+        self.supervisor = supervisor
+        self.get_prompts = get_prompts
+        self.slot_cache = slot_cache
+        self.results = {}
+        self.status = {}
+        self._handled = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def warm_up(self, inst, prompts):
+        self.status[inst.key] = "warming up"
+        result = run_warmup(inst.port, prompts, slot_count(inst.port, inst.params))
+        self.results[inst.key] = result
+        if result["errors"]:
+            self.status[inst.key] = "warmup failed"
+        else:
+            self.status[inst.key] = f"warmed up in {result['seconds']:.1f}s"
+        return result
+
+    def poll(self):
+        """Starts warming up instances that became ready since the last poll."""
+        with self._lock:
+            instances = self.supervisor.list()
+            self._handled &= {inst.process for inst in instances}
+            for inst in instances:
+                if inst.state != READY or inst.process in self._handled:
+                    continue
+                if self.slot_cache is not None and self.slot_cache.restore_pending(
+                    inst
+                ):
+                    continue
+                self._handled.add(inst.process)
+                prompts = self.get_prompts(profile_key(inst.key))
+                if not prompts:
+                    continue
+                threading.Thread(
+                    target=self.warm_up, args=(inst, prompts), daemon=True
+                ).start()
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error starting warmup: {e}")
+
+    def start(self, interval=CHECK_INTERVAL):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
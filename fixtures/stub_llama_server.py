@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Minimal stand-in for llama-server used by the tests.
+
+Accepts the llama-server flags the launcher passes (unknown ones are
+ignored), prints llama.cpp-style log lines and serves /health, which
+answers 503 for STUB_LOAD_DELAY seconds (default 0.2) and then 200.
+POST /v1/chat/completions and /v1/completions answer with a fixed reply
+naming the model file, streamed as SSE chunks when "stream" is set, else
+with timings counting one prompt token per word of the messages.
+GET /slots reports one slot whose id_task counts the requests served;
+with --metrics, GET /metrics reports 10 prompt and 3 predicted tokens
+per request. POST /completion streams n_predict tokens (at most 32),
+STUB_TOKEN_DELAY seconds apart (default 0.005), then llama.cpp timings.
+With --slot-save-path, POST /slots/0?action=save writes the request count
+to the named file after STUB_SAVE_DELAY seconds (default 0) and
+action=restore reads it back.
+"""
+
+import argparse
+import http.server
+import json
+import os
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--model", default="stub.gguf")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--metrics", action="store_true")
+    parser.add_argument("--slot-save-path")
+    args, _ = parser.parse_known_args()
+
+    load_delay = float(os.environ.get("STUB_LOAD_DELAY", "0.2"))
+    token_delay = float(os.environ.get("STUB_TOKEN_DELAY", "0.005"))
+    save_delay = float(os.environ.get("STUB_SAVE_DELAY", "0"))
+    started = time.monotonic()
+    model_name = os.path.basename(args.model)
+    tasks = [0]
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                if time.monotonic() - started < load_delay:
+                    self._send_json(503, {"error": {"message": "Loading model"}})
+                else:
+                    self._send_json(200, {"status": "ok"})
+            elif self.path == "/slots":
+                self._send_json(
+                    200,
+                    [
+                        {
+                            "id": 0,
+                            "id_task": tasks[0] - 1,
+                            "is_processing": False,
+                            "next_token": {"n_decoded": 3 if tasks[0] else 0},
+                        }
+                    ],
+                )
+            elif self.path == "/metrics" and args.metrics:
+                data = (
+                    "# TYPE llamacpp:prompt_tokens_total counter\n"
+                    f"llamacpp:prompt_tokens_total {tasks[0] * 10}\n"
+                    f"llamacpp:tokens_predicted_total {tasks[0] * 3}\n"
+                    "llamacpp:requests_processing 0\n"
+                    "llamacpp:requests_deferred 0\n"
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self._send_json(404, {"error": {"message": "Not Found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.startswith("/slots/0?action="):
+                self._slot_action(self.path.split("=", 1)[1], request)
+                return
+            if self.path == "/completion":
+                self._completion(request)
+                return
+            if self.path not in ("/v1/chat/completions", "/v1/completions"):
+                self._send_json(404, {"error": {"message": "Not Found"}})
+                return
+            tasks[0] += 1
+            words = ["reply", "from", model_name]
+            if not request.get("stream"):
+                n_prompt = sum(
+                    len(str(m.get("content", "")).split())
+                    for m in request.get("messages", [])
+                )
+                self._send_json(
+                    200,
+                    {
+                        "object": "chat.completion",
+                        "model": model_name,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {
+                                    "role": "assistant",
+                                    "content": " ".join(words),
+                                },
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "timings": {
+                            "prompt_n": n_prompt,
+                            "prompt_ms": 2.0,
+                            "prompt_per_second": n_prompt * 500.0,
+                        },
+                    },
+                )
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, word in enumerate(words + [None]):
+                if word is None:
+                    data = b"data: [DONE]\n\n"
+                else:
+                    delta = {"content": word if i == 0 else " " + word}
+                    chunk = {
+                        "object": "chat.completion.chunk",
+                        "model": model_name,
+                        "choices": [{"index": 0, "delta": delta}],
+                    }
+                    data = f"data: {json.dumps(chunk)}\n\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+                time.sleep(0.01)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _slot_action(self, action, request):
+            if not args.slot_save_path:
+                self._send_json(
+                    501, {"error": {"message": "This server does not support slots"}}
+                )
+                return
+            path = os.path.join(args.slot_save_path, request.get("filename", ""))
+            if action == "save":
+                time.sleep(save_delay)
+                with open(path, "w") as f:
+                    f.write(str(tasks[0]))
+                self._send_json(200, {"id_slot": 0, "n_saved": tasks[0] * 13})
+            elif action == "restore" and os.path.isfile(path):
+                with open(path) as f:
+                    tasks[0] = int(f.read())
+                self._send_json(200, {"id_slot": 0, "n_restored": tasks[0] * 13})
+            else:
+                self._send_json(400, {"error": {"message": "Invalid slot action"}})
+
+        def _completion(self, request):
+            tasks[0] += 1
+            n_prompt = len(str(request.get("prompt", "")).split())
+            n_predict = min(int(request.get("n_predict", 16)), 32)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            start = time.monotonic()
+            for i in range(n_predict + 1):
+                if i < n_predict:
+                    time.sleep(token_delay)
+                    chunk = {"content": " tok", "stop": False}
+                else:
+                    ms = (time.monotonic() - start) * 1000
+                    chunk = {
+                        "content": "",
+                        "stop": True,
+                        "timings": {
+                            "prompt_n": n_prompt,
+                            "prompt_ms": 1.0,
+                            "prompt_per_second": n_prompt * 1000.0,
+                            "predicted_n": n_predict,
+                            "predicted_ms": ms,
+                            "predicted_per_second": n_predict / ms * 1000,
+                        },
+                    }
+                data = f"data: {json.dumps(chunk)}\n\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, fmt, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"llama_model_loader: loaded meta data from {model_name}", flush=True)
+    print("load_tensors:          CPU model buffer size =    12.00 MiB", flush=True)
+    print("main: model loaded", file=sys.stderr, flush=True)
+    print(
+        f"main: server is listening on http://{args.host}:{args.port}"
+        " - starting the main loop",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
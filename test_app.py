@@ -1,9 +1,115 @@
 import unittest
 import os
 import json
+import http.client
+import math
 import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
 from core.command_builder import CommandBuilder
 from core.profile_manager import ProfileManager
+from core.gguf_reader import read_gguf_info, ggml_nbytes, vocab_compatible
+from core.model_scanner import ModelScanner
+from core.memory_estimator import estimate_memory, format_estimate, kv_bytes_per_layer
+from core.offload_planner import max_context_size, plan_offload
+from core.gpu_info import parse_gpu_query
+from core.prewarm import Prewarmer
+from core.server_log import format_load_report, parse_log_line
+from core.server_process import (
+    CRASHED,
+    DRAINING,
+    READY,
+    STOPPED,
+    ServerProcess,
+    probe_health,
+)
+from core.launch_history import LaunchHistory
+from core.process_backend import wait_port_free
+from core.supervisor import Supervisor, port_is_free
+from core.gpu_info import parse_compute_apps
+from core.model_proxy import ModelProxy
+from core.residency import ResidencyManager, metrics_activity, slots_activity
+from core import restart_policy
+from core.restart_policy import RestartManager
+from core import blue_green
+from core.blue_green import BlueGreenSwitch, shadow_key
+from core.metrics import MetricsSeries, RingBuffer, parse_prometheus
+from core.autotune import (
+    AUTOTUNE_KEY,
+    OK,
+    Autotuner,
+    is_valid,
+    pareto_front,
+    pick_best,
+)
+from core.spec_stats import SpecStats, requests_from_events, spec_config
+from core.slot_cache import SlotCache, list_slots
+from core.warmup import WarmupManager, format_report, slot_assignments
+from core import gpu_telemetry
+from core.gpu_telemetry import TELEMETRY_FIELDS, GpuTelemetry
+from core.benchmark import (
+    BenchmarkRunner,
+    BenchmarkStore,
+    concurrency_levels,
+    percentile,
+    server_binary_id,
+    synthetic_prompt,
+)
+
+
+def _gguf_string(s):
+    raw = s.encode("utf-8")
+    return struct.pack("<Q", len(raw)) + raw
+
+
+def _gguf_value(value):
+    """Encodes a metadata value; ints become uint32, floats float32."""
+    if isinstance(value, bool):
+        return struct.pack("<I?", 7, value)
+    if isinstance(value, int):
+        return struct.pack("<II", 4, value)
+    if isinstance(value, float):
+        return struct.pack("<If", 6, value)
+    if isinstance(value, str):
+        return struct.pack("<I", 8) + _gguf_string(value)
+    if isinstance(value, list):
+        if value and isinstance(value[0], str):
+            body = b"".join(_gguf_string(v) for v in value)
+            return struct.pack("<IIQ", 9, 8, len(value)) + body
+        return struct.pack("<IIQ", 9, 5, len(value)) + struct.pack(
+            f"<{len(value)}i", *value
+        )
+    raise TypeError(value)
+
+
+def write_gguf(path, kv, tensors, write_data=True):
+    """Writes a synthetic GGUF file.
+
+    kv: dict of metadata. tensors: list of (name, dims, ggml_type).
+    Tensor data is zero-filled (or omitted when write_data is False).
+    """
+    header = b"GGUF" + struct.pack("<IQQ", 3, len(tensors), len(kv))
+    for key, value in kv.items():
+        header += _gguf_string(key) + _gguf_value(value)
+    offset = 0
+    for name, dims, type_id in tensors:
+        n = 1
+        for d in dims:
+            n *= d
+        header += _gguf_string(name) + struct.pack("<I", len(dims))
+        header += struct.pack(f"<{len(dims)}Q", *dims)
+        header += struct.pack("<IQ", type_id, offset)
+        offset += ggml_nbytes(type_id, n)
+        offset += -offset % 32
+    header += b"\0" * (-len(header) % 32)
+    with open(path, "wb") as f:
+        f.write(header)
+        if write_data:
+            f.write(b"\0" * offset)
+
 
 class TestLauncher(unittest.TestCase):
     def test_command_builder(self):
@@ -42,6 +148,34 @@ class TestLauncher(unittest.TestCase):
             '{"preserve_thinking":true,"reasoning_effort":"medium"}',
         )
 
+    def test_draft_model_command(self):
+        builder = CommandBuilder(base_executable="llama-server", models_dir="models")
+        params = {
+            "model": "big.gguf",
+            "spec-type": "draft-model",
+            "model-draft": "drafts/small.gguf",
+            "ngl-draft": 99,
+            "ctx-size-draft": 0,
+            "spec-draft-n-max": 8,
+            "spec-draft-n-min": 2,
+            "parallel": 0,
+        }
+        cmd, _ = builder.build_command(params)
+        md = cmd.index("-md")
+        self.assertEqual(cmd[md + 1], os.path.join("models", "drafts", "small.gguf"))
+        self.assertEqual(cmd[cmd.index("-ngld") + 1], "99")
+        self.assertEqual(cmd[cmd.index("--spec-draft-n-min") + 1], "2")
+        self.assertNotIn("-cd", cmd)
+        # Draft models run in every slot; only self-speculation forces one
+        self.assertNotIn("--spec-type", cmd)
+        self.assertNotIn("--parallel", cmd)
+        self.assertEqual(spec_config(params), ("draft-model:small.gguf", 8))
+
+        # Without a draft model picked there's nothing to speculate with
+        cmd, _ = builder.build_command(dict(params, **{"model-draft": ""}))
+        self.assertNotIn("-md", cmd)
+        self.assertNotIn("--spec-draft-n-max", cmd)
+
     def test_profile_manager(self):
         test_file = "test_profiles.json"
         if os.path.exists(test_file):
@@ -59,5 +193,1472 @@ class TestLauncher(unittest.TestCase):
         if os.path.exists(test_file):
             os.remove(test_file)
 
+
+class TestGGUFReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_read_header(self):
+        path = os.path.join(self.tmp, "model.gguf")
+        write_gguf(
+            path,
+            {
+                "general.architecture": "qwen3moe",
+                "general.file_type": 15,
+                "qwen3moe.block_count": 2,
+                "qwen3moe.context_length": 40960,
+                "qwen3moe.expert_count": 8,
+                "tokenizer.ggml.tokens": ["a", "b", "c"],
+            },
+            [
+                ("token_embd.weight", [64, 3], 0),
+                ("blk.0.ffn_up_exps.weight", [256, 64, 8], 12),
+                ("blk.1.ffn_up_exps.weight", [256, 64, 8], 8),
+            ],
+        )
+        info = read_gguf_info(path)
+        self.assertEqual(info.architecture, "qwen3moe")
+        self.assertEqual(info.block_count, 2)
+        self.assertEqual(info.n_ctx_train, 40960)
+        self.assertEqual(info.expert_count, 8)
+        self.assertEqual(info.quant, "Q4_K_M")
+        self.assertEqual(info.n_vocab, 3)
+        self.assertEqual(
+            info.tensors[1], ("blk.0.ffn_up_exps.weight", 12, 256 * 64 * 8 // 256 * 144)
+        )
+        self.assertEqual(info.type_bytes()["Q8_0"], 256 * 64 * 8 // 32 * 34)
+        self.assertLessEqual(info.expected_file_size, os.path.getsize(path))
+
+        # Round-trips through the compact dict form
+        clone = type(info).from_dict(json.loads(json.dumps(info.to_dict())))
+        self.assertEqual(clone.tensors, info.tensors)
+
+        scanner = ModelScanner(self.tmp)
+        self.assertEqual(scanner.get_model_info("model.gguf").block_count, 2)
+
+    def test_rejects_non_gguf(self):
+        path = os.path.join(self.tmp, "bad.gguf")
+        with open(path, "wb") as f:
+            f.write(b"not a gguf file at all, just text")
+        with self.assertRaises(ValueError):
+            read_gguf_info(path)
+        self.assertIsNone(ModelScanner(self.tmp).get_model_info("bad.gguf"))
+
+    def test_draft_candidates(self):
+        path = lambda name: os.path.join(self.tmp, name)
+        big = write_test_model(path("big.gguf"), n_layer=16)
+        small = write_test_model(path("small.gguf"), n_layer=1)
+        write_test_model(path("mid.gguf"), n_layer=8)
+        write_test_model(
+            path("other-vocab.gguf"),
+            n_layer=1,
+            kv_extra={"tokenizer.ggml.tokens": ["x%d" % i for i in range(64)]},
+        )
+        write_test_model(
+            path("other-bos.gguf"),
+            n_layer=1,
+            kv_extra={"tokenizer.ggml.bos_token_id": 5},
+        )
+        self.assertEqual(len(big.vocab_hash), 40)
+        self.assertEqual(big.vocab_hash, small.vocab_hash)
+        self.assertTrue(vocab_compatible(big, small))
+
+        scanner = ModelScanner(self.tmp, os.path.join(self.tmp, "index.json"))
+        models = scanner.scan()
+        self.assertEqual(scanner.draft_candidates("big.gguf", models), ["small.gguf"])
+        self.assertEqual(scanner.draft_candidates("small.gguf", models), [])
+
+        # Models not indexed yet are skipped rather than parsed
+        write_test_model(path("new-small.gguf"), n_layer=1)
+        parsed = []
+        scanner._parse_header = lambda p: parsed.append(p)
+        self.assertEqual(
+            scanner.draft_candidates("big.gguf", models + ["new-small.gguf"]),
+            ["small.gguf"],
+        )
+        self.assertEqual(parsed, [])
+
+        # The hash is kept in the scan index
+        scanner._index.save()
+        cached = ModelScanner(self.tmp, os.path.join(self.tmp, "index.json"))
+        self.assertEqual(
+            cached.get_model_info("small.gguf").vocab_hash, small.vocab_hash
+        )
+
+
+class TestScanIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.models = os.path.join(self.tmp, "models")
+        os.makedirs(os.path.join(self.models, "vision"))
+        self.index = os.path.join(self.tmp, "scan_index.json")
+        kv = {"general.architecture": "llama", "llama.block_count": 1}
+        write_gguf(os.path.join(self.models, "a.gguf"), kv, [])
+        write_gguf(os.path.join(self.models, "vision", "b.gguf"), kv, [])
+        write_gguf(os.path.join(self.models, "vision", "mmproj-F16.gguf"), kv, [])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_incremental_rescan(self):
+        scanner = ModelScanner(self.models, self.index)
+        self.assertEqual(scanner.scan(), ["a.gguf", "vision/b.gguf"])
+        self.assertTrue(os.path.exists(self.index))
+
+        # A fresh scanner reuses the persisted listings and headers
+        parsed = []
+        scanner = ModelScanner(self.models, self.index)
+        scanner._parse_header = lambda path: parsed.append(path)
+        self.assertEqual(scanner.scan(), ["a.gguf", "vision/b.gguf"])
+        self.assertEqual(parsed, [])
+        self.assertEqual(
+            scanner.get_mmproj_options("vision/b.gguf"), ["vision/mmproj-F16.gguf"]
+        )
+        self.assertEqual(scanner.get_model_info("a.gguf").block_count, 1)
+
+        # Only the new file in the changed directory gets parsed
+        path = os.path.join(self.models, "vision", "c.gguf")
+        write_gguf(path, {"general.architecture": "llama"}, [])
+        os.utime(os.path.join(self.models, "vision"), ns=(1, 1))
+        self.assertEqual(scanner.scan(), ["a.gguf", "vision/b.gguf", "vision/c.gguf"])
+        self.assertEqual(parsed, [path])
+
+        os.remove(path)
+        os.utime(os.path.join(self.models, "vision"), ns=(2, 2))
+        self.assertEqual(scanner.scan(), ["a.gguf", "vision/b.gguf"])
+        self.assertNotIn("vision/c.gguf", scanner._index.files)
+
+    def test_iter_scan_streams_and_cancels(self):
+        scanner = ModelScanner(self.models, self.index)
+        events = list(scanner.iter_scan())
+        self.assertIn(("model", "vision/b.gguf"), events)
+        self.assertEqual(events[-1][0], "dir")
+
+        # Cancelling keeps the existing index intact
+        scanner = ModelScanner(self.models, self.index)
+        self.assertEqual(list(scanner.iter_scan(should_stop=lambda: True)), [])
+        self.assertIn("vision/b.gguf", scanner._index.files)
+
+    def test_unreadable_directory_keeps_cached_entries(self):
+        scanner = ModelScanner(self.models, self.index)
+        scanner.scan()
+        list_dir = scanner._list_dir
+
+        def flaky_list_dir(rel_dir, abs_dir, mtime_ns):
+            if rel_dir == "vision":
+                raise PermissionError("share unavailable")
+            return list_dir(rel_dir, abs_dir, mtime_ns)
+
+        scanner._list_dir = flaky_list_dir
+        os.utime(os.path.join(self.models, "vision"), ns=(1, 1))
+        self.assertEqual(scanner.scan(), ["a.gguf", "vision/b.gguf"])
+        self.assertIn("vision/b.gguf", scanner._index.files)
+
+        # A directory that is really gone is still pruned
+        shutil.rmtree(os.path.join(self.models, "vision"))
+        self.assertEqual(scanner.scan(), ["a.gguf"])
+        self.assertNotIn("vision/b.gguf", scanner._index.files)
+
+    def test_incomplete_files(self):
+        path = os.path.join(self.models, "partial.gguf")
+        write_gguf(path, {}, [("w", [1024, 1024], 0)], write_data=False)
+        old = 1_000_000_000 * 10**9
+        os.utime(path, ns=(old, old))
+        os.utime(os.path.join(self.models, "a.gguf"), ns=(old, old))
+        scanner = ModelScanner(self.models)
+        scanner.scan()
+        # Truncated: header lists 4 MiB of tensor data that isn't there
+        self.assertTrue(scanner.is_incomplete("partial.gguf"))
+        self.assertFalse(scanner.is_incomplete("a.gguf"))
+
+        # Still being written: recently modified
+        with open(path, "ab") as f:
+            f.write(b"\0" * (4 * 1024 * 1024))
+        self.assertEqual(scanner.refresh_files(["partial.gguf"]), ["partial.gguf"])
+        self.assertTrue(scanner.is_incomplete("partial.gguf"))
+
+        os.utime(path, ns=(old, old))
+        scanner.refresh_files(["partial.gguf"])
+        self.assertFalse(scanner.is_incomplete("partial.gguf"))
+
+
+class TestSplitModels(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.old = 1_000_000_000 * 10**9
+        for i in range(3):
+            self._write_shard(i, i)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write_shard(self, i, split_no):
+        path = os.path.join(self.tmp, f"Big-Q3_K_XL-{i + 1:05d}-of-00003.gguf")
+        kv = {
+            "general.architecture": "llama",
+            "split.no": split_no,
+            "split.count": 3,
+            "split.tensors.count": 3,
+        }
+        write_gguf(path, kv, [(f"blk.{i}.w", [32, 32], 8)])
+        os.utime(path, ns=(self.old, self.old))
+        return path
+
+    def test_shards_collapse_into_one_model(self):
+        scanner = ModelScanner(self.tmp)
+        self.assertEqual(scanner.scan(), ["Big-Q3_K_XL-00001-of-00003.gguf"])
+        first = "Big-Q3_K_XL-00001-of-00003.gguf"
+        self.assertEqual(len(scanner.get_shards(first)), 3)
+        self.assertEqual(
+            scanner.get_model_size(first),
+            sum(os.path.getsize(os.path.join(self.tmp, f)) for f in os.listdir(self.tmp)),
+        )
+        self.assertEqual(len(scanner.get_model_info(first).tensors), 3)
+        self.assertEqual(scanner.validate_model(first), [])
+
+    def test_uppercase_and_zero_shard_names(self):
+        for name in ["MODEL-00001-OF-00002.GGUF", "Model-00002-of-00002.gguf"]:
+            write_gguf(os.path.join(self.tmp, name), {}, [("w", [32], 8)])
+        write_gguf(os.path.join(self.tmp, "Zero-00000-of-00000.gguf"), {}, [])
+        scanner = ModelScanner(self.tmp)
+        self.assertEqual(
+            scanner.scan(),
+            [
+                "Big-Q3_K_XL-00001-of-00003.gguf",
+                "MODEL-00001-OF-00002.GGUF",
+                "Zero-00000-of-00000.gguf",
+            ],
+        )
+        self.assertEqual(
+            scanner.get_shards("MODEL-00001-OF-00002.GGUF"),
+            ["MODEL-00001-OF-00002.GGUF", "Model-00002-of-00002.gguf"],
+        )
+        self.assertEqual(
+            scanner.get_shards("Zero-00000-of-00000.gguf"), ["Zero-00000-of-00000.gguf"]
+        )
+
+    def test_validate_reports_missing_and_mismatched_shards(self):
+        scanner = ModelScanner(self.tmp)
+        first = scanner.scan()[0]
+        os.remove(os.path.join(self.tmp, "Big-Q3_K_XL-00002-of-00003.gguf"))
+        self.assertEqual(
+            scanner.validate_model(first),
+            ["Missing file: Big-Q3_K_XL-00002-of-00003.gguf"],
+        )
+        path = self._write_shard(1, 2)
+        os.utime(path, ns=(self.old + 10**9, self.old + 10**9))
+        problems = scanner.validate_model(first)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("expected 1 of 3", problems[0])
+
+
+def write_test_model(path, n_layer=2, moe=False, kv_extra=None):
+    """Writes a small llama-style GGUF: 256-dim, 4 heads (2 KV), Q8_0 weights."""
+    kv = {
+        "general.architecture": "llama",
+        "llama.block_count": n_layer,
+        "llama.context_length": 8192,
+        "llama.embedding_length": 256,
+        "llama.feed_forward_length": 512,
+        "llama.attention.head_count": 4,
+        "llama.attention.head_count_kv": 2,
+        "tokenizer.ggml.tokens": ["t%d" % i for i in range(64)],
+    }
+    if moe:
+        kv["llama.expert_count"] = 4
+        kv["llama.expert_used_count"] = 2
+    kv.update(kv_extra or {})
+    tensors = [("token_embd.weight", [256, 64], 8), ("output.weight", [256, 64], 8)]
+    for il in range(n_layer):
+        tensors.append((f"blk.{il}.attn_q.weight", [256, 256], 8))
+        if moe:
+            tensors.append((f"blk.{il}.ffn_up_exps.weight", [256, 512, 4], 8))
+        else:
+            tensors.append((f"blk.{il}.ffn_up.weight", [256, 512], 8))
+    write_gguf(path, kv, tensors)
+    return read_gguf_info(path)
+
+
+class TestMemoryEstimator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_kv_cache_size(self):
+        info = write_test_model(os.path.join(self.tmp, "m.gguf"))
+        # 2 KV heads * 64 dims * 1024 cells * 2 bytes, for both K and V
+        self.assertEqual(kv_bytes_per_layer(info, {}, 1024), [524288, 524288])
+        q8 = kv_bytes_per_layer(info, {"ctk": "q8_0", "ctv": "q8_0"}, 1024)
+        self.assertEqual(q8[0], 2 * (2 * 64 * 1024 // 32 * 34))
+
+    def test_sliding_window_layers(self):
+        info = write_test_model(
+            os.path.join(self.tmp, "m.gguf"),
+            n_layer=4,
+            kv_extra={
+                "llama.attention.sliding_window": 256,
+                "llama.attention.sliding_window_pattern": 2,
+            },
+        )
+        sizes = kv_bytes_per_layer(info, {"parallel": 1, "ub": 256}, 4096)
+        self.assertEqual(sizes[1], sizes[3])
+        self.assertEqual(sizes[0] * 8, sizes[1])
+
+    def test_layer_placement(self):
+        info = write_test_model(os.path.join(self.tmp, "m.gguf"), moe=True)
+        layer = 256 * 256 // 32 * 34
+        exps = 256 * 512 * 4 // 32 * 34
+        embd = 256 * 64 // 32 * 34
+
+        full = estimate_memory(info, {"ctx-size": 1024, "ngl": 999})
+        self.assertEqual(full["devices"]["GPU0"]["weights"], 2 * (layer + exps) + embd)
+        self.assertEqual(full["devices"]["CPU"]["weights"], embd)
+        self.assertEqual(full["devices"]["GPU0"]["kv"], 2 * 524288)
+
+        moe = estimate_memory(info, {"ctx-size": 1024, "ngl": 999, "n-cpu-moe": 1})
+        self.assertEqual(moe["devices"]["CPU"]["weights"], embd + exps)
+
+        partial = estimate_memory(info, {"ctx-size": 1024, "ngl": 1})
+        self.assertEqual(partial["devices"]["GPU0"]["weights"], layer + exps)
+        self.assertEqual(partial["devices"]["CPU"]["kv"], 524288)
+
+        split = estimate_memory(
+            info, {"ctx-size": 1024, "ngl": 999, "split-mode": "layer", "ts": "1,1"}
+        )
+        self.assertEqual(split["devices"]["GPU1"]["weights"], layer + exps)
+
+    def test_draft_model(self):
+        info = write_test_model(os.path.join(self.tmp, "m.gguf"), n_layer=4)
+        draft = write_test_model(os.path.join(self.tmp, "d.gguf"), n_layer=1)
+        params = {"ctx-size": 1024, "ngl": 999, "spec-type": "draft-model"}
+        alone = estimate_memory(draft, {"ctx-size": 1024, "ngl": 999})
+        paired = estimate_memory(info, params, draft_info=draft)
+        gpu = paired["devices"]["GPU0"]
+        self.assertEqual(
+            gpu["draft"], alone["devices"]["GPU0"]["total"] - gpu["overhead"]
+        )
+        self.assertIn("draft", format_estimate(paired))
+
+        # Draft KV cache follows -cd when set
+        small_ctx = estimate_memory(
+            info, dict(params, **{"ctx-size-draft": 256}), draft_info=draft
+        )
+        self.assertLess(small_ctx["devices"]["GPU0"]["draft"], gpu["draft"])
+
+
+class TestOffloadPlanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_smallest_n_cpu_moe(self):
+        info = write_test_model(os.path.join(self.tmp, "m.gguf"), n_layer=4, moe=True)
+        params = {"ctx-size": 1024, "ngl": 999}
+        full = estimate_memory(info, params)["devices"]["GPU0"]["total"]
+        exps = 256 * 512 * 4 // 32 * 34
+
+        plan = plan_offload(info, params, full, margin=0)
+        self.assertEqual((plan["ngl"], plan["n-cpu-moe"]), (5, 0))
+        plan = plan_offload(info, params, full - exps, margin=0)
+        self.assertEqual((plan["ngl"], plan["n-cpu-moe"]), (5, 1))
+        plan = plan_offload(info, params, full - exps - 1, margin=0)
+        self.assertEqual(plan["n-cpu-moe"], 2)
+
+    def test_largest_ngl_for_dense_model(self):
+        info = write_test_model(os.path.join(self.tmp, "m.gguf"), n_layer=4)
+        params = {"ctx-size": 1024}
+        full = estimate_memory(info, params)["devices"]["GPU0"]["total"]
+        self.assertEqual(plan_offload(info, params, full, margin=0)["ngl"], 5)
+        self.assertLess(plan_offload(info, params, full - 1, margin=0)["ngl"], 5)
+        self.assertEqual(plan_offload(info, params, 0, margin=0)["ngl"], 0)
+
+    def test_max_context_size(self):
+        info = write_test_model(os.path.join(self.tmp, "m.gguf"), n_layer=4)
+        params = {"ctx-size": 4096, "ub": 256}
+        budget = estimate_memory(info, params)["devices"]["GPU0"]["total"]
+        self.assertEqual(max_context_size(info, params, budget, margin=0), 4096)
+        self.assertEqual(max_context_size(info, params, budget - 1, margin=0), 3072)
+        # Quantized KV cache fits more context in the same budget
+        q8 = dict(params, ctk="q8_0", ctv="q8_0")
+        self.assertGreater(max_context_size(info, q8, budget, margin=0), 4096)
+        # Capped at the training context
+        self.assertEqual(max_context_size(info, params, 10**12, margin=0), 8192)
+        self.assertEqual(max_context_size(info, params, 0, margin=0), 0)
+
+    def test_parse_gpu_query(self):
+        gpus = parse_gpu_query(
+            "0, NVIDIA GeForce RTX 4090, 24564, 1203, 23012\n"
+            "1, NVIDIA GeForce RTX 3090, 24576, [N/A], 24000\n"
+        )
+        self.assertEqual(gpus[0]["index"], 0)
+        self.assertEqual(gpus[0]["memory.free"], 23012.0)
+        self.assertIsNone(gpus[1]["memory.used"])
+
+
+class TestPrewarmer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.paths = []
+        for i, size in enumerate([3 * 1024 * 1024, 100]):
+            path = os.path.join(self.tmp, f"m{i}.gguf")
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_reads_all_files(self):
+        reports = []
+        stats = Prewarmer(
+            self.paths + [os.path.join(self.tmp, "missing.gguf")],
+            workers=2,
+            progress=lambda *args: reports.append(args),
+        ).run()
+        self.assertEqual(stats["total"], 3 * 1024 * 1024 + 100)
+        self.assertEqual(stats["bytes"], stats["total"])
+        self.assertFalse(stats["cancelled"])
+        self.assertEqual(reports[-1][0], stats["total"])
+
+    def test_max_bytes_and_cancel(self):
+        stats = Prewarmer(self.paths, max_bytes=1024 * 1024).run()
+        self.assertEqual(stats["total"], 1024 * 1024)
+
+        prewarmer = Prewarmer(self.paths)
+        prewarmer.cancel()
+        stats = prewarmer.run()
+        self.assertTrue(stats["cancelled"])
+        self.assertEqual(stats["bytes"], 0)
+
+
+LOAD_LOG = """load_tensors: offloaded 29/29 layers to GPU
+load_tensors:        CUDA0 model buffer size =  3577.56 MiB
+load_tensors:   CPU_Mapped model buffer size =   281.81 MiB
+llama_kv_cache:      CUDA0 KV buffer size =   512.00 MiB
+llama_kv_cache: size =  512.00 MiB (  4096 cells,  32 layers,  1/1 seqs), K (f16):  256.00 MiB, V (f16):  256.00 MiB
+llama_context:      CUDA0 compute buffer size =   300.01 MiB
+llama_params_fit_impl: projected to use 4500 MiB of device memory vs. 23000 MiB of free device memory
+slot   load_model: id  0 | task -1 | new slot, n_ctx = 4096
+main: model loaded
+main: server is listening on http://127.0.0.1:8080 - starting the main loop
+prompt eval time =     123.45 ms /   100 tokens (    1.23 ms per token,   810.04 tokens per second)
+       eval time =    1234.56 ms /   128 tokens (    9.64 ms per token,   103.68 tokens per second)"""
+
+
+class TestServerLog(unittest.TestCase):
+    def test_parse_log_lines(self):
+        events = [parse_log_line(line) for line in LOAD_LOG.splitlines()]
+        self.assertIsNone(events[0])
+        self.assertEqual(
+            events[1],
+            {"type": "buffer", "device": "CUDA0", "kind": "model", "mib": 3577.56},
+        )
+        self.assertEqual(events[3]["kind"], "KV")
+        self.assertEqual((events[4]["cells"], events[4]["layers"]), (4096, 32))
+        self.assertEqual(events[6]["type"], "fit")
+        self.assertEqual((events[7]["id"], events[7]["n_ctx"]), (0, 4096))
+        self.assertEqual(events[8]["type"], "loaded")
+        self.assertEqual(events[9]["url"], "http://127.0.0.1:8080")
+        self.assertEqual((events[10]["phase"], events[10]["tps"]), ("prompt", 810.04))
+        self.assertEqual((events[11]["phase"], events[11]["tokens"]), ("eval", 128))
+
+        report = format_load_report([e for e in events if e], 12.5)
+        self.assertIn("Model loaded in 12.5s", report)
+        self.assertIn("CUDA0: 4390 MiB", report)
+        self.assertIn("Slots: 1 (n_ctx 4096)", report)
+
+    def test_server_process_captures_output(self):
+        script = "import sys; print('main: model loaded'); print('boom', file=sys.stderr)"
+        proc = ServerProcess([sys.executable, "-c", script])
+        proc.wait(10)
+        seq, lines = proc.lines_since(0)
+        self.assertEqual(
+            lines, ["main: model loaded", "boom", "Server exited with code 0"]
+        )
+        self.assertEqual(proc.lines_since(seq), (seq, []))
+        self.assertIsNotNone(proc.load_seconds)
+        self.assertEqual(proc.tail(2), ["boom", "Server exited with code 0"])
+
+
+HEALTH_STUB = """
+import http.server, socket, sys, time
+start = time.monotonic()
+class H(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if time.monotonic() - start > 0.3 else 503)
+        self.end_headers()
+    def log_message(self, *args):
+        pass
+server = http.server.HTTPServer(("127.0.0.1", 0), H)
+print(server.server_address[1], flush=True)
+server.serve_forever()
+"""
+
+
+class TestServerLifecycle(unittest.TestCase):
+    def test_ready_then_stopped(self):
+        proc = ServerProcess([sys.executable, "-c", HEALTH_STUB])
+        # The stub picks a free port and prints it; probe it from here on
+        for _ in range(100):
+            if proc.tail(1):
+                break
+            time.sleep(0.05)
+        proc.port = int(proc.tail(1)[0])
+        for _ in range(100):
+            if proc.state == READY:
+                break
+            time.sleep(0.05)
+        self.assertEqual(proc.state, READY)
+        self.assertIn("loading", [s for s, _ in proc.state_times])
+        self.assertGreaterEqual(proc.time_to_ready, 0.3)
+
+        proc.stop()
+        proc.wait(10)
+        self.assertEqual(proc.state, STOPPED)
+
+    def test_crash_before_ready(self):
+        proc = ServerProcess([sys.executable, "-c", "raise SystemExit(3)"], port=1)
+        proc.wait(10)
+        self.assertEqual(proc.state, CRASHED)
+        self.assertIsNone(proc.time_to_ready)
+
+    def test_launch_history(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "history.json")
+            history = LaunchHistory(path)
+            history.record({"profile": "a", "time_to_ready": 2.0})
+            history.record({"profile": "a", "time_to_ready": 4.0})
+            history.record({"profile": "a", "time_to_ready": None})
+            history.record({"profile": "b", "time_to_ready": 9.0})
+            reloaded = LaunchHistory(path)
+            self.assertEqual(len(reloaded.for_profile("a")), 3)
+            self.assertEqual(reloaded.average_time_to_ready("a"), 3.0)
+            self.assertIsNone(reloaded.average_time_to_ready("c"))
+        finally:
+            shutil.rmtree(tmp)
+
+
+STUB_SERVER = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "stub_llama_server.py"
+)
+
+
+class StubCommandBuilder:
+    """Builds commands that start the stub server instead of llama-server."""
+
+    def build_command(self, params):
+        cmd = [sys.executable, STUB_SERVER, "--port", str(params["port"])]
+        if params.get("model"):
+            cmd += ["-m", params["model"]]
+        if params.get("metrics"):
+            cmd.append("--metrics")
+        if params.get("slot-save-path"):
+            cmd += ["--slot-save-path", params["slot-save-path"]]
+        return cmd, None
+
+    def build_command_string(self, params):
+        return " ".join(self.build_command(params)[0])
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def free_port():
+    for port in range(18080, 18180):
+        if port_is_free(port):
+            return port
+    raise RuntimeError("no free port")
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.supervisor = Supervisor(StubCommandBuilder())
+
+    def tearDown(self):
+        self.supervisor.stop_all()
+        for inst in self.supervisor.list():
+            self.supervisor.wait_stopped(inst)
+
+    def test_port_collisions_and_restart(self):
+        port = free_port()
+        a = self.supervisor.start("a", {"port": port, "model": "a.gguf"})
+        b = self.supervisor.start("b", {"port": port, "model": "b.gguf"})
+        self.assertEqual(a.port, port)
+        self.assertNotEqual(b.port, port)
+        self.assertIs(self.supervisor.start("a", {"port": port}), a)
+        self.assertTrue(wait_for(lambda: a.state == READY and b.state == READY))
+        self.assertFalse(port_is_free(b.port))
+
+        self.supervisor.sample_resources()
+        if sys.platform.startswith("linux"):
+            self.assertGreater(a.rss, 0)
+
+        a2 = self.supervisor.restart("a")
+        self.assertEqual(a.state, STOPPED)
+        self.assertEqual((a2.restarts, a2.port), (1, port))
+        self.assertEqual([i.key for i in self.supervisor.list()], ["b", "a"])
+
+        self.supervisor.stop("b")
+        self.supervisor.wait_stopped(b)
+        self.supervisor.remove("b")
+        self.assertEqual([i.key for i in self.supervisor.live()], ["a"])
+
+    def test_parse_compute_apps(self):
+        usage = parse_compute_apps("1234, 4096\n1234, 512\n99, [N/A]\n")
+        self.assertEqual(usage, {1234: 4608.0, 99: None})
+
+
+STUBBORN_PARENT = """
+import signal, subprocess, sys, time
+for name in ("SIGTERM", "SIGBREAK"):
+    if hasattr(signal, name):
+        signal.signal(getattr(signal, name), signal.SIG_IGN)
+child = subprocess.Popen([sys.executable, "-c", sys.argv[1]])
+print("child", child.pid, flush=True)
+time.sleep(60)
+"""
+LISTENING_CHILD = """
+import signal, socket, sys, time
+for name in ("SIGTERM", "SIGBREAK"):
+    if hasattr(signal, name):
+        signal.signal(getattr(signal, name), signal.SIG_IGN)
+s = socket.socket()
+s.bind(("127.0.0.1", %d))
+s.listen()
+time.sleep(60)
+"""
+
+
+class TestProcessBackend(unittest.TestCase):
+    def test_stop_kills_process_group_and_frees_port(self):
+        port = free_port()
+        proc = ServerProcess(
+            [sys.executable, "-c", STUBBORN_PARENT, LISTENING_CHILD % port]
+        )
+        self.assertTrue(wait_for(lambda: not port_is_free(port)))
+        started = time.monotonic()
+        proc.stop(grace=0.3)
+        proc.wait(10)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(proc.state, STOPPED)
+        # The child ignored SIGTERM too; only the group kill releases its port
+        self.assertTrue(wait_port_free(port, timeout=5))
+
+
+class TestModelProxy(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.profiles = ProfileManager(os.path.join(self.tmp, "profiles.json"))
+        port = free_port()
+        for name in ("a", "b"):
+            self.profiles.save_profile(
+                name,
+                {"name": name, "parameters": {"model": f"{name}.gguf", "port": port}},
+            )
+        self.supervisor = Supervisor(StubCommandBuilder())
+        self.proxy = ModelProxy(self.supervisor, self.profiles, port=0)
+        self.proxy.start()
+
+    def tearDown(self):
+        self.proxy.stop()
+        self.supervisor.stop_all()
+        for inst in self.supervisor.list():
+            self.supervisor.wait_stopped(inst)
+        shutil.rmtree(self.tmp)
+
+    def request(self, method, path, body=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.proxy.port, timeout=30)
+        try:
+            data = json.dumps(body).encode() if body is not None else None
+            conn.request(method, path, data, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            return resp.status, resp.read().decode()
+        finally:
+            conn.close()
+
+    def test_routes_and_swaps_models(self):
+        status, body = self.request("GET", "/v1/models")
+        self.assertEqual([m["id"] for m in json.loads(body)["data"]], ["a", "b"])
+
+        messages = [{"role": "user", "content": "hi"}]
+        status, body = self.request(
+            "POST", "/v1/chat/completions", {"model": "a", "messages": messages}
+        )
+        self.assertEqual(status, 200)
+        reply = json.loads(body)["choices"][0]["message"]["content"]
+        self.assertEqual(reply, "reply from a.gguf")
+
+        # Matching by model file name, streamed, swaps "a" out
+        status, body = self.request(
+            "POST",
+            "/v1/chat/completions",
+            {"model": "b.gguf", "messages": messages, "stream": True},
+        )
+        self.assertEqual(status, 200)
+        chunks = [line for line in body.splitlines() if line.startswith("data: ")]
+        self.assertEqual(chunks[-1], "data: [DONE]")
+        content = "".join(
+            json.loads(c[6:])["choices"][0]["delta"]["content"] for c in chunks[:-1]
+        )
+        self.assertEqual(content, "reply from b.gguf")
+        self.assertEqual([i.key for i in self.supervisor.live()], ["b"])
+
+        status, body = self.request("POST", "/v1/chat/completions", {"model": "zz"})
+        self.assertEqual(status, 404)
+        self.assertEqual(json.loads(body)["error"]["code"], "model_not_found")
+
+    def test_launch_error_answers_with_json(self):
+        def broken(params):
+            raise RuntimeError("No free port in 8080-8180")
+
+        self.supervisor.command_builder.build_command = broken
+        status, body = self.request("POST", "/v1/chat/completions", {"model": "a"})
+        self.assertEqual(status, 503)
+        self.assertIn("No free port", json.loads(body)["error"]["message"])
+        self.assertEqual(self.proxy._inflight.get("a", 0), 0)
+
+    def test_concurrent_requests_for_different_models(self):
+        # Requests still waiting for their model don't hold up the other's swap
+        os.environ["STUB_LOAD_DELAY"] = "1"
+        try:
+            results = {}
+
+            def send(name, i):
+                body = {"model": name, "messages": [{"role": "user", "content": "hi"}]}
+                results[(name, i)] = self.request("POST", "/v1/chat/completions", body)
+
+            threads = [
+                threading.Thread(target=send, args=(name, i))
+                for i in range(2)
+                for name in ("a", "b")
+            ]
+            start = time.monotonic()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            del os.environ["STUB_LOAD_DELAY"]
+        self.assertLess(time.monotonic() - start, 20)
+        for (name, _), (status, body) in results.items():
+            self.assertEqual(status, 200)
+            reply = json.loads(body)["choices"][0]["message"]["content"]
+            self.assertEqual(reply, f"reply from {name}.gguf")
+
+
+class TestResidency(unittest.TestCase):
+    def setUp(self):
+        self.supervisor = Supervisor(StubCommandBuilder())
+        self.port = free_port()
+
+    def tearDown(self):
+        self.supervisor.stop_all()
+        for inst in self.supervisor.list():
+            self.supervisor.wait_stopped(inst)
+
+    def start(self, key, **params):
+        inst = self.supervisor.start(key, dict(params, port=self.port))
+        self.assertTrue(wait_for(lambda: inst.state == READY))
+        return inst
+
+    def test_activity_parsing(self):
+        busy, sig = slots_activity(
+            [{"id": 0, "id_task": 5, "is_processing": True, "next_token": [{"n_decoded": 7}]}]
+        )
+        self.assertEqual((busy, sig), (True, ((0, 5, 7),)))
+        busy, sig = metrics_activity(
+            "# HELP x\nllamacpp:prompt_tokens_total 120\n"
+            "llamacpp:tokens_predicted_total 30\nllamacpp:requests_processing 0\n"
+        )
+        self.assertEqual((busy, sig), (False, (120.0, 30.0)))
+
+    def test_idle_ttl(self):
+        residency = ResidencyManager(self.supervisor)
+        a = self.start("a", **{"idle-ttl": 1})
+        pinned = self.start("p", **{"idle-ttl": 1, "pin-resident": True})
+        residency.poll()
+
+        # A request in between checks counts as activity
+        a.last_activity -= 30
+        conn = http.client.HTTPConnection("127.0.0.1", a.port, timeout=10)
+        conn.request("POST", "/v1/completions", json.dumps({"prompt": "x"}))
+        conn.getresponse().read()
+        conn.close()
+        residency.poll()
+        self.assertLess(a.idle_seconds, 5)
+
+        a.last_activity -= 120
+        pinned.last_activity -= 120
+        self.assertEqual(residency.poll(), ["a"])
+        self.assertTrue(pinned.is_live)
+
+    def test_lru_eviction_for_vram_budget(self):
+        gib = 1024**3
+        residency = ResidencyManager(
+            self.supervisor, 10 * gib, lambda params: params["vram"] * gib
+        )
+        a = self.start("a", vram=4)
+        b = self.start("b", vram=3, **{"pin-resident": True})
+        c = self.start("c", vram=2)
+        a.last_activity -= 100
+        b.last_activity -= 200
+        c.last_activity -= 50
+        self.assertEqual(residency.to_evict("d", {"vram": 5}), [a])
+        self.assertTrue(a.is_live)
+
+        # Eviction runs outside the supervisor's lock
+        def try_lock(locked):
+            if self.supervisor._lock.acquire(timeout=1):
+                self.supervisor._lock.release()
+                locked.append(True)
+
+        def make_room(key, params):
+            locked = []
+            t = threading.Thread(target=try_lock, args=(locked,))
+            t.start()
+            t.join()
+            self.assertEqual(locked, [True])
+            return residency.make_room(key, params)
+
+        self.supervisor.on_before_start = make_room
+        d = self.supervisor.start("d", {"port": self.port, "vram": 5})
+        self.assertFalse(a.is_live)
+        self.assertTrue(b.is_live and c.is_live and d.is_live)
+        self.assertEqual(residency.make_room("c", {"vram": 2}), [])
+
+    def test_shadow_never_evicts_its_live_instance(self):
+        gib = 1024**3
+        residency = ResidencyManager(
+            self.supervisor, 10 * gib, lambda params: params["vram"] * gib
+        )
+        a = self.start("a", vram=4)
+        b = self.start("b", vram=4)
+        a.last_activity -= 200
+        b.last_activity -= 100
+        self.assertEqual(residency.to_evict(shadow_key("a"), {"vram": 4}), [b])
+
+
+class CrashingCommandBuilder:
+    def build_command(self, params):
+        script = "import sys; print('CUDA error: out of memory'); sys.exit(1)"
+        return [sys.executable, "-c", script], None
+
+
+class BadFlagCommandBuilder:
+    def build_command(self, params):
+        script = "import sys; print('error: unknown argument: --foo'); sys.exit(1)"
+        return [sys.executable, "-c", script], None
+
+
+class TestRestartPolicy(unittest.TestCase):
+    def setUp(self):
+        self.backoff = restart_policy.BACKOFF_BASE
+        restart_policy.BACKOFF_BASE = 0.01
+        self.tmp = tempfile.mkdtemp()
+        self.supervisor = Supervisor(CrashingCommandBuilder())
+        self.manager = RestartManager(
+            self.supervisor, os.path.join(self.tmp, "crashes.json")
+        )
+
+    def tearDown(self):
+        restart_policy.BACKOFF_BASE = self.backoff
+        self.supervisor.stop_all()
+        for inst in self.supervisor.list():
+            self.supervisor.wait_stopped(inst)
+        shutil.rmtree(self.tmp)
+
+    def poll_until(self, predicate):
+        def step():
+            self.manager.poll()
+            return predicate()
+
+        return wait_for(step)
+
+    def test_crash_loop_is_quarantined(self):
+        self.supervisor.start("a", {"port": free_port(), "restart-policy": "on-failure"})
+        self.assertTrue(self.poll_until(lambda: "a" in self.manager.quarantined))
+        self.assertEqual(self.supervisor.get("a").restarts, 4)
+        self.assertEqual(self.manager.status("a"), "quarantined")
+
+        records = RestartManager(None, self.manager.filepath).records
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]["exit_code"], 1)
+        self.assertIn("CUDA error: out of memory", records[0]["log_tail"])
+
+        self.manager.release("a")
+        self.assertEqual(self.manager.status("a"), "")
+
+    def test_no_restart_for_never_or_requested_stop(self):
+        self.supervisor.start("a", {"port": free_port()})
+        self.assertTrue(self.poll_until(lambda: len(self.manager.records) == 1))
+        self.assertFalse(self.manager.has_pending)
+
+        self.supervisor.command_builder = StubCommandBuilder()
+        inst = self.supervisor.start("b", {"port": free_port(), "restart-policy": "always"})
+        self.supervisor.stop("b")
+        self.supervisor.wait_stopped(inst)
+        self.manager.poll()
+        self.assertFalse(self.manager.has_pending)
+        self.assertIs(self.supervisor.get("b"), inst)
+
+    def test_ignores_autotune_and_shadow_instances(self):
+        params = {"port": free_port(), "restart-policy": "always"}
+        trial = self.supervisor.start(AUTOTUNE_KEY, params)
+        shadow = self.supervisor.start(shadow_key("a"), params)
+        self.assertTrue(wait_for(lambda: trial.state == CRASHED))
+        self.assertTrue(wait_for(lambda: shadow.state == CRASHED))
+        self.manager.poll()
+        self.assertEqual(self.manager.records, [])
+        self.assertFalse(self.manager.has_pending)
+
+
+
+class TestBlueGreenSwitch(unittest.TestCase):
+    def setUp(self):
+        self.supervisor = Supervisor(StubCommandBuilder())
+        self.port = free_port()
+        self.old = self.supervisor.start("a", {"port": self.port, "model": "a.gguf"})
+        self.assertTrue(wait_for(lambda: self.old.state == READY))
+
+    def tearDown(self):
+        self.supervisor.stop_all()
+        for inst in self.supervisor.list():
+            self.supervisor.wait_stopped(inst)
+
+    def test_switches_without_downtime(self):
+        switch = BlueGreenSwitch(self.supervisor, "a", {"port": self.port, "model": "b.gguf"})
+        switch.start()
+        failures = []
+        while not switch.done:
+            port = self.supervisor.get("a").port
+            if probe_health("127.0.0.1", port) != 200:
+                failures.append(port)
+            time.sleep(0.02)
+
+        self.assertEqual(switch.phase, blue_green.DONE)
+        self.assertFalse(switch.fell_back)
+        self.assertEqual(failures, [])
+        new = self.supervisor.get("a")
+        self.assertIs(new, switch.instance)
+        self.assertNotEqual(new.port, self.port)
+        self.assertEqual(self.old.state, STOPPED)
+        self.assertEqual([i.key for i in self.supervisor.list()], ["a"])
+
+    def test_falls_back_to_stop_then_start(self):
+        switch = BlueGreenSwitch(
+            self.supervisor,
+            "a",
+            {"port": self.port, "model": "b.gguf"},
+            has_room=lambda params: False,
+        )
+        switch.run()
+        self.assertTrue(switch.fell_back)
+        self.assertEqual(self.old.state, STOPPED)
+        self.assertEqual(switch.instance.port, self.port)
+        self.assertEqual([i.key for i in self.supervisor.list()], ["a"])
+
+    def test_shadow_out_of_memory_falls_back(self):
+        self.supervisor.command_builder = CrashingCommandBuilder()
+        switch = BlueGreenSwitch(self.supervisor, "a", {"port": self.port})
+        switch.run()
+        self.assertTrue(switch.fell_back)
+        self.assertEqual(self.old.state, STOPPED)
+
+    def test_crashing_shadow_keeps_old_server(self):
+        self.supervisor.command_builder = BadFlagCommandBuilder()
+        switch = BlueGreenSwitch(self.supervisor, "a", {"port": self.port})
+        switch.run()
+        self.assertEqual(switch.phase, blue_green.FAILED)
+        self.assertFalse(switch.fell_back)
+        self.assertIn("unknown argument", switch.error)
+        self.assertIs(self.supervisor.get("a"), self.old)
+        self.assertEqual(self.old.state, READY)
+        self.assertEqual([i.key for i in self.supervisor.list()], ["a"])
+
+
+class TestMetrics(unittest.TestCase):
+    def test_ring_buffer_wraps(self):
+        buf = RingBuffer(3)
+        self.assertIsNone(buf.last())
+        for v in (1, 2, None, 4):
+            buf.append(v)
+        self.assertEqual(len(buf), 3)
+        values = buf.values()
+        self.assertEqual(values[0], 2)
+        self.assertTrue(math.isnan(values[1]))
+        self.assertEqual((values[2], buf.last()), (4, 4))
+
+    def test_rates_and_csv_export(self):
+        text = (
+            "# HELP llamacpp:prompt_tokens_total Number of prompt tokens processed.\n"
+            "llamacpp:prompt_tokens_total 100\n"
+            "llamacpp:tokens_predicted_total 20\n"
+            "llamacpp:requests_processing 1\n"
+            "llamacpp:kv_cache_usage_ratio 0.25\n"
+        )
+        series = MetricsSeries(capacity=10)
+        series.update(parse_prometheus(text), now=1000.0)
+        series.update(
+            parse_prometheus(text.replace("100", "300").replace("20\n", "60\n")),
+            now=1002.0,
+        )
+        # No rate for the first sample
+        self.assertTrue(math.isnan(series.values("prompt_tps")[0]))
+        self.assertEqual(series.last("prompt_tps"), 100.0)
+        self.assertEqual(series.last("gen_tps"), 20.0)
+        self.assertEqual(series.last("kv_cache_usage"), 25.0)
+        self.assertIsNone(series.last("requests_deferred"))
+
+        path = os.path.join(tempfile.mkdtemp(), "metrics.csv")
+        series.export_csv(path)
+        with open(path) as f:
+            rows = f.read().splitlines()
+        self.assertEqual(rows[0].split(",")[:3], ["time", "prompt_tps", "gen_tps"])
+        self.assertEqual(rows[1].split(",")[1], "")
+        self.assertEqual(rows[2].split(",")[:3], ["1002.000", "100.000", "20.000"])
+        shutil.rmtree(os.path.dirname(path))
+
+    def test_supervisor_scrapes_metrics(self):
+        supervisor = Supervisor(StubCommandBuilder())
+        inst = supervisor.start("a", {"port": free_port(), "metrics": True})
+        plain = supervisor.start("b", {"port": free_port()})
+        try:
+            self.assertTrue(wait_for(lambda: inst.state == READY))
+            supervisor.sample_resources()
+            self.assertTrue(inst.metrics.available)
+            self.assertEqual(inst.metrics.last("requests_processing"), 0)
+            self.assertIsNone(plain.metrics)
+        finally:
+            supervisor.stop_all()
+            for i in supervisor.list():
+                supervisor.wait_stopped(i)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_percentiles_and_levels(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2.5)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 90), 4.6)
+        self.assertEqual(concurrency_levels(1), [1])
+        self.assertEqual(concurrency_levels(6), [1, 2, 4, 6])
+        self.assertEqual(len(synthetic_prompt(100, salt=3).split()), 100)
+
+    def test_runs_against_stub_server(self):
+        supervisor = Supervisor(StubCommandBuilder())
+        inst = supervisor.start("a", {"port": free_port()})
+        tmp = tempfile.mkdtemp()
+        try:
+            self.assertTrue(wait_for(lambda: inst.state == READY))
+            progress = []
+            runner = BenchmarkRunner(
+                inst.port,
+                prompt_lengths=[16, 64],
+                concurrency=[1, 2],
+                n_predict=8,
+                progress=lambda done, total, result: progress.append((done, total)),
+            )
+            results = runner.run()
+            self.assertEqual(progress[-1], (4, 4))
+            level = results[-1]
+            self.assertEqual((level["prompt_length"], level["concurrency"]), (64, 2))
+            self.assertEqual((level["requests"], level["errors"]), (2, 0))
+            self.assertEqual(level["prompt_tokens"], 64)
+            self.assertGreater(level["gen_tps"], 0)
+            self.assertLessEqual(level["ttft_p50"], level["ttft_p99"])
+            self.assertLessEqual(level["itl_p50"], level["itl_p99"])
+
+            store = BenchmarkStore(os.path.join(tmp, "benchmarks.json"))
+            store.record({"profile": "a", "binary": "b1-abc", "results": results})
+            store.record({"profile": "a", "binary": "b2-def", "results": []})
+            reloaded = BenchmarkStore(store.filepath)
+            self.assertEqual(len(reloaded.for_profile("a")), 2)
+            self.assertEqual(len(reloaded.for_profile("a", "b1-abc")[0]["results"]), 4)
+            self.assertEqual(server_binary_id(os.path.join(tmp, "missing")), "missing@0")
+        finally:
+            supervisor.stop_all()
+            supervisor.wait_stopped(inst)
+            shutil.rmtree(tmp)
+
+    def test_server_dying_mid_stream_counts_as_errors(self):
+        def died(prompt_length):
+            raise http.client.IncompleteRead(b"data: ")
+
+        runner = BenchmarkRunner(free_port(), prompt_lengths=[16], concurrency=[2])
+        runner._request = died
+        level = runner.run_level(16, 2)
+        self.assertEqual((level["requests"], level["errors"]), (0, 2 * runner.rounds))
+
+
+class OomAboveUbBuilder(StubCommandBuilder):
+    """Stub servers that run out of memory when ub is 1024 or more."""
+
+    def __init__(self):
+        self.launches = []
+
+    def build_command(self, params):
+        self.launches.append(params.get("ub"))
+        if params.get("ub", 0) >= 1024:
+            return CrashingCommandBuilder().build_command(params)
+        return super().build_command(params)
+
+
+class TestAutotune(unittest.TestCase):
+    def test_pareto_front_and_validity(self):
+        trials = [
+            {"outcome": OK, "throughput": 100, "latency": 0.5},
+            {"outcome": OK, "throughput": 80, "latency": 0.2},
+            {"outcome": OK, "throughput": 70, "latency": 0.3},
+            {"outcome": "oom"},
+        ]
+        front = pareto_front(trials)
+        self.assertEqual([t["throughput"] for t in front], [100, 80])
+        self.assertEqual(pick_best(front)["throughput"], 100)
+        self.assertEqual(pick_best(front, "latency")["throughput"], 80)
+        self.assertFalse(is_valid({"ctv": "q8_0", "flash-attn": False}))
+        self.assertTrue(is_valid({"ctv": "f16", "flash-attn": False}))
+
+    def test_prunes_oom_saves_profile_and_resumes(self):
+        tmp = tempfile.mkdtemp()
+        builder = OomAboveUbBuilder()
+        supervisor = Supervisor(builder)
+        profiles = ProfileManager(os.path.join(tmp, "profiles.json"))
+        params = {"port": free_port(), "model": "a.gguf"}
+        space = {"ub": [2048, 1024, 512, 256], "flash-attn": [True]}
+        state = os.path.join(tmp, "autotune_state.json")
+
+        def tuner():
+            return Autotuner(
+                supervisor,
+                profiles,
+                "p",
+                params,
+                space=space,
+                state_path=state,
+                prompt_length=16,
+                n_predict=4,
+                load_timeout=10,
+            )
+
+        try:
+            result = tuner().run()
+            outcomes = [(t["config"]["ub"], t["outcome"]) for t in result["trials"]]
+            self.assertEqual(
+                outcomes, [(256, "ok"), (512, "ok"), (1024, "oom"), (2048, "pruned")]
+            )
+            self.assertEqual(builder.launches, [256, 512, 1024])
+            self.assertEqual(result["profile"], "p (autotuned)")
+            saved = ProfileManager(profiles.profiles_file).get_profile("p (autotuned)")
+            self.assertIn(saved["parameters"]["ub"], (256, 512))
+            self.assertEqual(saved["parameters"]["model"], "a.gguf")
+            self.assertEqual(supervisor.list(), [])
+
+            # Everything was tried; a second run only reuses the saved trials
+            resumed = tuner()
+            self.assertEqual(len(resumed.trials), 4)
+            resumed.run()
+            self.assertEqual(len(builder.launches), 3)
+        finally:
+            supervisor.stop_all()
+            shutil.rmtree(tmp)
+
+    def test_launch_error_is_a_failed_trial(self):
+        class BrokenBuilder:
+            def build_command(self, params):
+                raise RuntimeError("draft model not found")
+
+        tmp = tempfile.mkdtemp()
+        try:
+            tuner = Autotuner(
+                Supervisor(BrokenBuilder()),
+                ProfileManager(os.path.join(tmp, "profiles.json")),
+                "p",
+                {"port": free_port()},
+                space={"ub": [512]},
+            )
+            result = tuner.run()
+            self.assertEqual(result["trials"][0]["outcome"], "failed")
+            self.assertEqual(result["trials"][0]["error"], "draft model not found")
+            self.assertIsNone(result["profile"])
+        finally:
+            shutil.rmtree(tmp)
+
+
+def spec_session_log(requests):
+    """llama-server log lines for (prompt tokens, tokens, tok/s, accepted, drafted)."""
+    lines = []
+    for prompt, tokens, tps, accepted, drafted in requests:
+        lines.append(
+            f"prompt eval time = 10.00 ms / {prompt:5d} tokens "
+            f"(0.10 ms per token, 1000.00 tokens per second)"
+        )
+        lines.append(
+            f"       eval time = {tokens / tps * 1000:.2f} ms / {tokens:5d} tokens "
+            f"(1.00 ms per token, {tps:.2f} tokens per second)"
+        )
+        if drafted:
+            lines.append(
+                f"slot print_timing: id  0 | task 0 | draft acceptance rate = "
+                f"{accepted / drafted:.5f} ({accepted:5d} accepted / {drafted:5d} generated)"
+            )
+    return [parse_log_line(line) for line in lines]
+
+
+class TestSpecStats(unittest.TestCase):
+    def test_requests_from_events(self):
+        events = spec_session_log([(100, 50, 25.0, 30, 40), (2000, 10, 20.0, 0, 0)])
+        self.assertEqual(events[2]["type"], "draft")
+        requests = requests_from_events(events)
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(
+            (requests[0]["prompt_tokens"], requests[0]["accepted"]), (100, 30)
+        )
+        self.assertEqual((requests[1]["gen_tokens"], requests[1]["generated"]), (10, 0))
+
+    def test_recommends_fastest_measured_draft_length(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "spec_stats.json")
+            stats = SpecStats(path)
+            spec = {"spec-type": "draft-mtp"}
+            stats.record_session("p", {}, spec_session_log([(100, 50, 30.0, 0, 0)] * 3))
+            stats.record_session(
+                "p",
+                dict(spec, **{"spec-draft-n-max": 2}),
+                spec_session_log([(100, 50, 40.0, 45, 50)] * 3),
+            )
+            stats.record_session(
+                "p",
+                dict(spec, **{"spec-draft-n-max": 4}),
+                spec_session_log([(100, 50, 35.0, 40, 80)] * 3),
+            )
+            # Too few requests to count, and a different workload
+            stats.record_session(
+                "p",
+                dict(spec, **{"spec-draft-n-max": 3}),
+                spec_session_log([(100, 50, 90.0, 1, 1), (9000, 50, 90.0, 1, 1)]),
+            )
+
+            stats = SpecStats(path)
+            self.assertEqual(stats.main_workload("p"), "short")
+            best = stats.recommend("p", "draft-mtp", "short")
+            self.assertEqual(best["draft_n_max"], 2)
+            self.assertAlmostEqual(best["gen_tps"], 40.0, places=1)
+            self.assertAlmostEqual(best["acceptance"], 0.9)
+            self.assertAlmostEqual(best["baseline_tps"], 30.0, places=1)
+            self.assertIsNone(stats.recommend("p", "draft-mtp,ngram-mod"))
+
+            report = "\n".join(
+                stats.format_report("p", dict(spec, **{"spec-draft-n-max": 4}))
+            )
+            self.assertIn("draft-mtp draft max 2: 40.0 tok/s over 3 requests", report)
+            self.assertIn("Recommended draft max: 2", report)
+        finally:
+            shutil.rmtree(tmp)
+
+
+class TestSlotCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.supervisor = Supervisor(StubCommandBuilder())
+        self.cache = SlotCache(self.supervisor, os.path.join(self.tmp, "slots"))
+        self.supervisor.slot_cache = self.cache
+
+    def tearDown(self):
+        self.supervisor.stop_all()
+        for inst in self.supervisor.list():
+            self.supervisor.wait_stopped(inst)
+        shutil.rmtree(self.tmp)
+
+    def test_save_on_stop_and_restore_when_ready(self):
+        saved = []
+        self.cache.on_saved = lambda *args: saved.append(args)
+        params = {"port": free_port(), "slot-cache": True}
+        os.environ["STUB_SAVE_DELAY"] = "0.5"
+        try:
+            inst = self.supervisor.start("My Profile (shadow)", params)
+        finally:
+            del os.environ["STUB_SAVE_DELAY"]
+        self.assertEqual(
+            inst.params["slot-save-path"],
+            os.path.join(self.tmp, "slots", "My_Profile"),
+        )
+        self.assertTrue(wait_for(lambda: inst.state == READY))
+        conn = http.client.HTTPConnection("127.0.0.1", inst.port, timeout=5)
+        conn.request("POST", "/v1/completions", json.dumps({"prompt": "hi"}))
+        conn.getresponse().read()
+        conn.close()
+
+        # The save runs in the background; stop() returns right away
+        started = time.monotonic()
+        self.supervisor.stop(inst.key)
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.assertTrue(inst.process.draining)
+        self.assertEqual(inst.state, DRAINING)
+        self.supervisor.wait_stopped(inst)
+        self.assertEqual(saved, [(inst.key, 1, 13)])
+        files = self.cache.files()
+        self.assertEqual(
+            [(f["profile"], f["name"]) for f in files], [("My_Profile", "slot0.bin")]
+        )
+        self.assertEqual(self.cache.status[inst.key], "saved 1 slots (13 tokens)")
+
+        inst = self.supervisor.restart(inst.key)
+        self.assertTrue(wait_for(lambda: inst.state == READY))
+        self.cache.poll()
+        self.assertEqual(self.cache.status[inst.key], "restored 1 slots (13 tokens)")
+        # The restored slot is the one that served the request before
+        self.assertEqual(list_slots(inst.port)[0]["id_task"], 0)
+
+        # Profiles without slot-cache keep no slots
+        other = self.supervisor.start("b", {"port": free_port()})
+        self.assertNotIn("slot-save-path", other.params)
+
+    def test_lru_eviction(self):
+        for i, profile in enumerate(["a", "b", "c"]):
+            path = os.path.join(self.tmp, "slots", profile)
+            os.makedirs(path)
+            name = os.path.join(path, "slot0.bin")
+            with open(name, "wb") as f:
+                f.write(b"x" * 100)
+            os.utime(name, (1000 + i, 1000 + (i if profile != "a" else 10)))
+        self.cache.max_bytes = 250
+        evicted = self.cache.enforce_limit()
+        self.assertEqual([e["profile"] for e in evicted], ["b"])
+        self.assertEqual([f["profile"] for f in self.cache.files()], ["c", "a"])
+        self.assertEqual(self.cache.total_bytes(), 200)
+
+
+class TestWarmup(unittest.TestCase):
+    def setUp(self):
+        self.supervisor = Supervisor(StubCommandBuilder())
+        self.prompts = {"p": ["You are a helpful assistant", "Tools: search fetch"]}
+        self.manager = WarmupManager(
+            self.supervisor, lambda profile: self.prompts.get(profile)
+        )
+
+    def tearDown(self):
+        self.supervisor.stop_all()
+        for inst in self.supervisor.list():
+            self.supervisor.wait_stopped(inst)
+
+    def test_slot_assignments(self):
+        self.assertEqual(slot_assignments(1, 3), [(0, 0), (1, 0), (2, 0)])
+        self.assertEqual(slot_assignments(3, 2), [(0, 0), (1, 1), (0, 2)])
+        self.assertEqual(slot_assignments(0, 4), [])
+
+    def test_warmup_after_ready(self):
+        inst = self.supervisor.start("p (shadow)", {"port": free_port(), "parallel": 3})
+        other = self.supervisor.start("q", {"port": free_port()})
+        self.assertTrue(
+            wait_for(lambda: inst.state == READY and other.state == READY)
+        )
+        self.manager.poll()
+        self.assertTrue(wait_for(lambda: inst.key in self.manager.results))
+        self.manager.poll()
+        self.assertNotIn(other.key, self.manager.status)
+
+        result = self.manager.results[inst.key]
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(
+            [(s["slot"], s["prompts"], s["tokens"]) for s in result["slots"]],
+            [(0, 1, 5), (1, 1, 3), (2, 1, 5)],
+        )
+        self.assertEqual(result["slots"][0]["tps"], 2500.0)
+        self.assertTrue(self.manager.status[inst.key].startswith("warmed up in"))
+        report = "\n".join(format_report(result))
+        self.assertIn("Warmup: 3 prompts in", report)
+        self.assertIn("Slot 1: 3 tokens at 1500.0 tok/s prefill", report)
+
+
+def read_fixture(name):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", name)
+    with open(path) as f:
+        return f.read()
+
+
+class TestGpuTelemetry(unittest.TestCase):
+    def test_recorded_nvidia_smi_output(self):
+        gpus = parse_gpu_query(read_fixture("nvidia_smi_2gpu.csv"), TELEMETRY_FIELDS)
+        self.assertEqual([g["index"] for g in gpus], [0, 1])
+        self.assertEqual(gpus[0]["name"], "NVIDIA GeForce RTX 4090")
+        self.assertEqual(gpus[0]["power.draw"], 412.35)
+        self.assertEqual(gpus[1]["clocks.mem"], 405.0)
+
+        old = parse_gpu_query(
+            read_fixture("nvidia_smi_not_supported.csv"), TELEMETRY_FIELDS
+        )
+        self.assertIsNone(old[0]["utilization.gpu"])
+        self.assertIsNone(old[0]["power.draw"])
+        self.assertEqual(old[0]["clocks.sm"], 139.0)
+
+    def test_ring_buffers_and_headroom(self):
+        telemetry = GpuTelemetry(capacity=3)
+        self.assertIsNone(telemetry.available)
+        self.assertEqual(telemetry.headroom(), {})
+        gpus = parse_gpu_query(read_fixture("nvidia_smi_2gpu.csv"), TELEMETRY_FIELDS)
+        for used in (1000.0, 2000.0, 3000.0, 4000.0):
+            gpus[0]["memory.used"] = used
+            telemetry.update(gpus, now=used)
+        self.assertTrue(telemetry.available)
+        gpu0, gpu1 = telemetry.snapshot()
+        self.assertEqual(gpu0.values("memory.used"), [2000.0, 3000.0, 4000.0])
+        self.assertEqual(gpu0.times.values(), [2000.0, 3000.0, 4000.0])
+        self.assertEqual(telemetry.headroom(), {0: 20564.0, 1: 23373.0})
+
+        old = parse_gpu_query(
+            read_fixture("nvidia_smi_not_supported.csv"), TELEMETRY_FIELDS
+        )
+        telemetry = GpuTelemetry()
+        telemetry.update(old)
+        self.assertIsNone(telemetry.snapshot()[0].last("power.draw"))
+        self.assertTrue(math.isnan(telemetry.snapshot()[0].values("power.draw")[0]))
+        telemetry.update([])
+        self.assertFalse(telemetry.available)
+
+    def test_stop_waits_for_sample_before_nvml_shutdown(self):
+        calls = []
+
+        class FakeNvml:
+            NVMLError = Exception
+
+            def nvmlInit(self):
+                calls.append("init")
+
+            def nvmlDeviceGetCount(self):
+                calls.append("sampling")
+                time.sleep(0.3)
+                calls.append("sampled")
+                return 0
+
+            def nvmlShutdown(self):
+                calls.append("shutdown")
+
+        saved = gpu_telemetry.pynvml
+        gpu_telemetry.pynvml = FakeNvml()
+        try:
+            telemetry = GpuTelemetry(interval=10)
+            telemetry.start()
+            self.assertTrue(wait_for(lambda: "sampling" in calls))
+            telemetry.stop()
+        finally:
+            gpu_telemetry.pynvml = saved
+        self.assertEqual(calls, ["init", "sampling", "sampled", "shutdown"])
+        self.assertIsNone(telemetry.backend)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,193 @@
+from PyQt5.QtWidgets import (
+    QComboBox,
+    QDialog,
+    QFormLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from core.autotune import OBJECTIVES, OK, Autotuner, default_search_space
+from ui.workers import AutotuneWorker
+
+TRIAL_COLUMNS = ["Configuration", "Outcome", "Total gen tok/s", "TTFT p50 ms"]
+
+
+def _format_value(value):
+    if value is True:
+        return "on"
+    if value is False:
+        return "off"
+    return str(value)
+
+
+def _parse_value(key, text):
+    text = text.strip()
+    if key == "flash-attn":
+        if text.lower() in ("on", "true", "1"):
+            return True
+        if text.lower() in ("off", "false", "0"):
+            return False
+        raise ValueError(f"{key}: use on/off")
+    if key in ("ctk", "ctv"):
+        return text
+    return int(text)
+
+
+class AutotuneDialog(QDialog):
+    """Configures and runs an Autotuner for one saved profile."""
+
+    def __init__(self, supervisor, profile_manager, profile, state_path, parent=None):
+        super().__init__(parent)
+        self.supervisor = supervisor
+        self.profile_manager = profile_manager
+        self.profile = profile
+        self.params = (profile_manager.get_profile(profile) or {}).get("parameters", {})
+        self.state_path = state_path
+        self.worker = None
+        self.setWindowTitle(f"Autotune - {profile}")
+        self.resize(700, 500)
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(
+            QLabel(
+                "Each configuration is launched and benchmarked in turn. "
+                "Other running instances share the GPU and skew the results."
+            )
+        )
+        form = QFormLayout()
+        self.space_inputs = {}
+        for key, values in default_search_space(self.params).items():
+            edit = QLineEdit(", ".join(_format_value(v) for v in values))
+            form.addRow(f"{key}:", edit)
+            self.space_inputs[key] = edit
+        self.budget = QSpinBox()
+        self.budget.setRange(1, 24 * 60)
+        self.budget.setValue(60)
+        self.budget.setSuffix(" min")
+        form.addRow("Time budget:", self.budget)
+        self.objective = QComboBox()
+        self.objective.addItems(OBJECTIVES)
+        form.addRow("Optimize for:", self.objective)
+        layout.addLayout(form)
+
+        self.table = QTableWidget(0, len(TRIAL_COLUMNS))
+        self.table.setHorizontalHeaderLabels(TRIAL_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.status = QLabel()
+        self.status.setWordWrap(True)
+        layout.addWidget(self.status)
+
+        btn_box = QHBoxLayout()
+        btn_box.addStretch()
+        self.btn_run = QPushButton("Run")
+        self.btn_run.clicked.connect(self.run_autotune)
+        self.btn_cancel = QPushButton("Stop")
+        self.btn_cancel.setToolTip("Stop after the current configuration; Run resumes")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_autotune)
+        self.btn_close = QPushButton("Close")
+        self.btn_close.clicked.connect(self.reject)
+        btn_box.addWidget(self.btn_run)
+        btn_box.addWidget(self.btn_cancel)
+        btn_box.addWidget(self.btn_close)
+        layout.addLayout(btn_box)
+
+    def _space(self):
+        space = {}
+        for key, edit in self.space_inputs.items():
+            values = [_parse_value(key, v) for v in edit.text().split(",") if v.strip()]
+            if values:
+                space[key] = values
+        return space
+
+    def _add_row(self, trial):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        config = ", ".join(
+            f"{k}={_format_value(v)}" for k, v in trial["config"].items()
+        )
+        values = [config, trial["outcome"], "", ""]
+        if trial["outcome"] == OK:
+            values[2] = f"{trial['throughput']:.1f}"
+            values[3] = f"{trial['latency'] * 1000:.0f}"
+        elif trial.get("error"):
+            values[1] += f": {trial['error']}"
+        for col, value in enumerate(values):
+            self.table.setItem(row, col, QTableWidgetItem(value))
+
+    def run_autotune(self):
+        try:
+            space = self._space()
+        except ValueError as e:
+            self.status.setText(f"Invalid search space: {e}")
+            return
+        if not space:
+            self.status.setText("The search space is empty.")
+            return
+
+        tuner = Autotuner(
+            self.supervisor,
+            self.profile_manager,
+            self.profile,
+            self.params,
+            space=space,
+            budget=self.budget.value() * 60,
+            state_path=self.state_path,
+            objective=self.objective.currentText(),
+        )
+        self.table.setRowCount(0)
+        for trial in tuner.trials:
+            self._add_row(trial)
+        if tuner.trials:
+            self.status.setText(f"Resuming after {len(tuner.trials)} configurations")
+        self.worker = AutotuneWorker(tuner)
+        self.worker.progress.connect(self._on_progress)
+        self.worker.autotune_finished.connect(self._on_finished)
+        self.btn_run.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.worker.start()
+
+    def cancel_autotune(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.status.setText("Stopping after the current configuration...")
+
+    def _on_progress(self, trial, done, total):
+        self._add_row(trial)
+        self.status.setText(f"{done}/{total} configurations tried")
+
+    def _on_finished(self, result):
+        self.worker = None
+        self.btn_run.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        if result.get("error"):
+            self.status.setText(f"Autotune failed: {result['error']}")
+        elif result["cancelled"]:
+            self.status.setText("Stopped; Run resumes the search.")
+        elif result["profile"] is None:
+            self.status.setText("No configuration loaded and answered requests.")
+        else:
+            best = result["best"]
+            text = (
+                f"Saved profile '{result['profile']}': {best['throughput']:.1f} tok/s, "
+                f"TTFT {best['latency'] * 1000:.0f} ms "
+                f"({len(result['front'])} on the Pareto front)"
+            )
+            if result["out_of_time"]:
+                text += "; the time budget ran out, Run continues the search"
+            self.status.setText(text)
+
+    def done(self, result):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().done(result)
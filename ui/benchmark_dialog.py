@@ -0,0 +1,185 @@
+import time
+
+from PyQt5.QtWidgets import (
+    QDialog,
+    QFormLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from core.benchmark import (
+    DEFAULT_N_PREDICT,
+    DEFAULT_PROMPT_LENGTHS,
+    BenchmarkRunner,
+    concurrency_levels,
+)
+from ui.workers import BenchmarkWorker
+
+# (result key, header, scale); latencies are shown in milliseconds
+RESULT_COLUMNS = [
+    ("prompt_length", "Prompt", 1),
+    ("concurrency", "Concurrency", 1),
+    ("prompt_tps", "Prompt tok/s", 1),
+    ("gen_tps", "Gen tok/s", 1),
+    ("total_gen_tps", "Total gen tok/s", 1),
+    ("ttft_p50", "TTFT p50 ms", 1000),
+    ("ttft_p90", "TTFT p90 ms", 1000),
+    ("ttft_p99", "TTFT p99 ms", 1000),
+    ("itl_p50", "ITL p50 ms", 1000),
+    ("itl_p90", "ITL p90 ms", 1000),
+    ("itl_p99", "ITL p99 ms", 1000),
+    ("errors", "Errors", 1),
+]
+
+
+class BenchmarkDialog(QDialog):
+    """Runs the throughput benchmark against one instance and shows results.
+
+    Finished runs are recorded in the BenchmarkStore under the instance's
+    profile and the server binary id; the last such run is shown on open.
+    """
+
+    def __init__(self, inst, store, binary, parent=None):
+        super().__init__(parent)
+        self.inst = inst
+        self.store = store
+        self.binary = binary
+        self.worker = None
+        self.setWindowTitle(f"Benchmark - {inst.key}")
+        self.resize(900, 420)
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self.prompt_lengths = QLineEdit(", ".join(map(str, DEFAULT_PROMPT_LENGTHS)))
+        form.addRow("Prompt lengths (tokens):", self.prompt_lengths)
+        self.n_predict = QSpinBox()
+        self.n_predict.setRange(1, 8192)
+        self.n_predict.setValue(DEFAULT_N_PREDICT)
+        form.addRow("Tokens to generate:", self.n_predict)
+        self.max_concurrency = QSpinBox()
+        self.max_concurrency.setRange(1, 256)
+        self.max_concurrency.setValue(max(int(inst.params.get("parallel") or 1), 1))
+        self.max_concurrency.setToolTip(
+            "Levels 1, 2, 4, ... up to this; defaults to the profile's --parallel"
+        )
+        form.addRow("Max concurrency:", self.max_concurrency)
+        self.rounds = QSpinBox()
+        self.rounds.setRange(1, 100)
+        self.rounds.setValue(1)
+        form.addRow("Rounds per level:", self.rounds)
+        layout.addLayout(form)
+
+        self.table = QTableWidget(0, len(RESULT_COLUMNS))
+        self.table.setHorizontalHeaderLabels([h for _, h, _ in RESULT_COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        self.status = QLabel()
+        layout.addWidget(self.status)
+
+        btn_box = QHBoxLayout()
+        btn_box.addStretch()
+        self.btn_run = QPushButton("Run")
+        self.btn_run.clicked.connect(self.run_benchmark)
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_benchmark)
+        self.btn_close = QPushButton("Close")
+        self.btn_close.clicked.connect(self.reject)
+        btn_box.addWidget(self.btn_run)
+        btn_box.addWidget(self.btn_cancel)
+        btn_box.addWidget(self.btn_close)
+        layout.addLayout(btn_box)
+
+        previous = store.for_profile(inst.key, binary)
+        if previous:
+            last = previous[-1]
+            for result in last["results"]:
+                self._add_row(result)
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(last["time"]))
+            self.status.setText(f"Last run on {binary} at {when}")
+
+    def _add_row(self, result):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for col, (key, _, scale) in enumerate(RESULT_COLUMNS):
+            value = result.get(key)
+            if value is None:
+                text = ""
+            elif isinstance(value, int):
+                text = str(value)
+            else:
+                text = f"{value * scale:.1f}"
+            self.table.setItem(row, col, QTableWidgetItem(text))
+
+    def run_benchmark(self):
+        try:
+            lengths = [
+                int(p) for p in self.prompt_lengths.text().replace(",", " ").split()
+            ]
+        except ValueError:
+            self.status.setText("Prompt lengths must be whole numbers.")
+            return
+        if not lengths or min(lengths) < 1:
+            self.status.setText("Enter at least one prompt length.")
+            return
+
+        runner = BenchmarkRunner(
+            self.inst.port,
+            prompt_lengths=lengths,
+            concurrency=concurrency_levels(self.max_concurrency.value()),
+            n_predict=self.n_predict.value(),
+            rounds=self.rounds.value(),
+        )
+        self.table.setRowCount(0)
+        self.worker = BenchmarkWorker(runner)
+        self.worker.progress.connect(self._on_progress)
+        self.worker.benchmark_finished.connect(self._on_finished)
+        self.btn_run.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.status.setText("Running...")
+        self.worker.start()
+
+    def cancel_benchmark(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.status.setText("Cancelling after the current level...")
+
+    def _on_progress(self, done, total, result):
+        self._add_row(result)
+        self.status.setText(f"Level {done}/{total} done")
+
+    def _on_finished(self, results):
+        cancelled = self.worker.runner.cancelled
+        error = self.worker.error
+        self.worker = None
+        self.btn_run.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        if error is not None:
+            self.status.setText(f"Benchmark failed: {error}")
+            return
+        if cancelled or not results:
+            self.status.setText("Cancelled; results were not saved.")
+            return
+        self.store.record(
+            {
+                "profile": self.inst.key,
+                "binary": self.binary,
+                "params": self.inst.requested_params,
+                "n_predict": self.n_predict.value(),
+                "results": results,
+            }
+        )
+        self.status.setText(f"Saved {len(results)} levels for {self.binary}")
+
+    def done(self, result):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().done(result)
@@ -1,5 +1,5 @@
+import bisect
 import os
-import subprocess
 import webbrowser
 from PyQt5.QtWidgets import (
     QMainWindow,
@@ -17,18 +17,79 @@ from PyQt5.QtWidgets import (
     QDialog,
     QFormLayout,
     QComboBox,
+    QCheckBox,
+    QSpinBox,
+    QSplitter,
     QApplication,
 )
-from PyQt5.QtCore import Qt, QTimer
-
-from core.model_scanner import ModelScanner
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from core.model_scanner import ModelScanner, model_sort_key
+from core.memory_estimator import (
+    GIB,
+    MIB,
+    estimate_memory,
+    format_estimate,
+    gpu_total,
+)
+from core.prewarm import available_memory
+from core.offload_planner import max_context_size, plan_offload
+from core.gpu_info import query_gpus
+from core.gpu_telemetry import DEFAULT_INTERVAL, GpuTelemetry
 from core.profile_manager import ProfileManager
-from core.command_builder import CommandBuilder
+from core.command_builder import DRAFT_MODEL_SPEC_TYPE, CommandBuilder
 from core.settings_manager import SettingsManager
-from ui.widgets import ParameterInput
+from core.server_log import format_load_report
+from core.launch_history import LaunchHistory
+from core.model_proxy import DEFAULT_PROXY_PORT, ModelProxy
+from core.server_process import CRASHED, FINAL_STATES, READY
+from core.process_backend import server_executable_name
+from core.supervisor import DEFAULT_PORT, Supervisor
+from core.residency import ResidencyManager
+from core.restart_policy import RestartManager
+from core.slot_cache import DEFAULT_MAX_BYTES, SlotCache
+from core.warmup import WarmupManager, format_report as format_warmup_report
+from core.blue_green import (
+    DONE,
+    DRAINING,
+    FAILED,
+    BlueGreenSwitch,
+    profile_key,
+    retired_key,
+    shadow_key,
+)
+from core.benchmark import BenchmarkStore, server_binary_id
+from core.spec_stats import SpecStats, spec_config
+from ui.widgets import (
+    GpuPanel,
+    InstancesPanel,
+    MetricsPanel,
+    ParameterInput,
+    ServerLogPanel,
+)
 from core.gui_config import GuiConfig
 from core.theme_manager import ThemeManager
 from ui.theme_editor import ThemeEditorDialog
+from ui.benchmark_dialog import BenchmarkDialog
+from ui.autotune_dialog import AutotuneDialog
+from ui.slot_cache_dialog import SlotCacheDialog
+from ui.warmup_dialog import WarmupPromptsDialog
+from ui.workers import (
+    FileRefreshWorker,
+    MakeRoomWorker,
+    ModelDirWatcher,
+    ModelScanWorker,
+    PrewarmWorker,
+)
+
+# How often server state and captured output are moved into the UI
+STATUS_POLL_MS = 250
+# How often the GPU charts and VRAM headroom are refreshed
+GPU_POLL_MS = 1000
+# How long a restart waits for the old server to exit
+STOP_WAIT_SECONDS = 10
+# Instance key for launches from a form that isn't a saved profile
+UNSAVED_PROFILE_KEY = "(unsaved)"
 
 
 class ParameterEditDialog(QDialog):
@@ -113,8 +174,63 @@ class ParameterEditDialog(QDialog):
         return data
 
 
+# Extra app settings edited in the Settings dialog, stored in settings.json
+SETTINGS_OPTIONS = [
+    {
+        "key": "prewarm_next_profile",
+        "label": "Prewarm the next likely profile while a server is running",
+        "type": "bool",
+        "default": False,
+    },
+    {
+        "key": "proxy_port",
+        "label": "Proxy Port:",
+        "type": "int",
+        "default": DEFAULT_PROXY_PORT,
+        "min": 1,
+        "max": 65535,
+    },
+    {
+        "key": "resident_vram_budget_mib",
+        "label": "Resident Models VRAM Budget (MiB, 0 = unlimited):",
+        "type": "int",
+        "default": 0,
+        "min": 0,
+    },
+    {
+        "key": "proxy_exclusive",
+        "label": "Proxy stops other models it started when switching models",
+        "type": "bool",
+        "default": True,
+    },
+    {
+        "key": "zero_downtime_restart",
+        "label": "Keep a running profile up until its relaunch is ready (when memory allows)",
+        "type": "bool",
+        "default": True,
+    },
+    {
+        "key": "gpu_sample_interval",
+        "label": "GPU Telemetry Interval (s):",
+        "type": "int",
+        "default": int(DEFAULT_INTERVAL),
+        "min": 1,
+        "max": 3600,
+    },
+    {
+        "key": "slot_cache_max_mib",
+        "label": "Saved KV Cache Slots Limit (MiB, 0 = unlimited):",
+        "type": "int",
+        "default": DEFAULT_MAX_BYTES // MIB,
+        "min": 0,
+    },
+]
+
+
 class SettingsDialog(QDialog):
-    def __init__(self, current_server_dir, current_models_dir, parent=None):
+    def __init__(
+        self, current_server_dir, current_models_dir, options=None, parent=None
+    ):
         super().__init__(parent)
         self.setWindowTitle("Settings")
         self.resize(500, 200)
@@ -141,6 +257,21 @@ class SettingsDialog(QDialog):
         form_layout.addRow("Llama Server Folder:", server_layout)
         form_layout.addRow("Models Folder:", models_layout)
 
+        options = options or {}
+        self.option_widgets = {}
+        for option in SETTINGS_OPTIONS:
+            value = options.get(option["key"], option["default"])
+            if option["type"] == "bool":
+                widget = QCheckBox(option["label"])
+                widget.setChecked(bool(value))
+                form_layout.addRow("", widget)
+            else:
+                widget = QSpinBox()
+                widget.setRange(option.get("min", 0), option.get("max", 2**31 - 1))
+                widget.setValue(int(value))
+                form_layout.addRow(option["label"], widget)
+            self.option_widgets[option["key"]] = widget
+
         self.layout.addLayout(form_layout)
 
         btn_box = QHBoxLayout()
@@ -172,8 +303,20 @@ class SettingsDialog(QDialog):
     def get_paths(self):
         return self.server_dir_edit.text(), self.models_dir_edit.text()
 
+    def get_options(self):
+        options = {}
+        for key, widget in self.option_widgets.items():
+            if isinstance(widget, QCheckBox):
+                options[key] = widget.isChecked()
+            else:
+                options[key] = widget.value()
+        return options
+
 
 class MainWindow(QMainWindow):
+    # (instance key, slots saved, tokens saved), from the slot-saving thread
+    slots_saved = pyqtSignal(str, int, int)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Llama.cpp Launcher")
@@ -202,16 +345,83 @@ class MainWindow(QMainWindow):
         )
         self.scanner = None
         self.command_builder = None
+        self.scan_worker = None
+        self.model_watcher = ModelDirWatcher(None, self)
+        self.model_watcher.changed.connect(self.refresh_models)
+        self.model_watcher.completeness_changed.connect(self._update_incomplete_items)
 
         self.refresh_components()
 
         self.available_models = []
+        self._model_sort_keys = []
+        # Model/mmproj of a profile whose model hasn't been found by the scan yet
+        self._pending_model_params = None
         self.current_profile_name = None
-        self.server_process = None
-
-        # Timer to monitor server process
+        self.supervisor = Supervisor(self.command_builder, self.server_dir)
+        self.residency = ResidencyManager(
+            self.supervisor,
+            self.settings_manager.get("resident_vram_budget_mib", 0) * MIB,
+            self._estimate_profile_vram,
+        )
+        self.residency.start()
+        self.restart_manager = RestartManager(
+            self.supervisor, os.path.join(self.base_dir, "crash_history.json")
+        )
+        self.restart_manager.start()
+        self.slot_cache = SlotCache(
+            self.supervisor,
+            os.path.join(self.base_dir, "slot_cache"),
+            self.settings_manager.get("slot_cache_max_mib", DEFAULT_MAX_BYTES // MIB)
+            * MIB,
+        )
+        self.supervisor.slot_cache = self.slot_cache
+        self.slot_cache.on_saved = self.slots_saved.emit
+        self.slots_saved.connect(self._on_slots_saved)
+        self.slot_cache.start()
+        self.warmup = WarmupManager(
+            self.supervisor, self._warmup_prompts, self.slot_cache
+        )
+        self.warmup.start()
+        # Processes whose warmup result is in the shown load report
+        self._warmup_reported = set()
+        self.gpu_telemetry = GpuTelemetry(
+            self.settings_manager.get("gpu_sample_interval", DEFAULT_INTERVAL)
+        )
+        self.gpu_telemetry.start()
+        self.proxy = None
+        self.prewarm_worker = None
+        # Frees VRAM for a launch before its server is spawned
+        self.make_room_worker = None
+        # (key, params) to launch once the current prewarm finishes
+        self._prewarm_launch = None
+        # Relaunch of a running profile in progress (BlueGreenSwitch)
+        self._switch = None
+        self._switch_record = None
+
+        # Timer to monitor server state and output
         self.status_timer = QTimer()
         self.status_timer.timeout.connect(self.check_server_status)
+        # Timer to show GPU telemetry, independent of running servers
+        self.gpu_timer = QTimer()
+        self.gpu_timer.timeout.connect(self.update_gpu_telemetry)
+        self.gpu_timer.start(GPU_POLL_MS)
+        # Instance whose output is shown in the log panel
+        self._view_key = None
+        self._log_seq = 0
+        self._instance_states = {}
+        # Launch details recorded in launch history once the outcome is known
+        self._launch_records = {}
+        # Key -> (stopping instance, what to run once it has exited)
+        self._after_stop_actions = {}
+        self.launch_history = LaunchHistory(
+            os.path.join(self.base_dir, "launch_history.json")
+        )
+        self.benchmark_store = BenchmarkStore(
+            os.path.join(self.base_dir, "benchmarks.json")
+        )
+        self.spec_stats = SpecStats(os.path.join(self.base_dir, "spec_stats.json"))
+        # llama-server executable path -> build id, see server_binary_id()
+        self._binary_ids = {}
 
         self.init_ui()
         self.apply_theme()
@@ -223,26 +433,292 @@ class MainWindow(QMainWindow):
         QApplication.instance().setStyleSheet(qss)
 
     def refresh_components(self):
-        self.scanner = ModelScanner(self.models_dir)
+        self.cancel_model_scan()
+        self.scanner = ModelScanner(
+            self.models_dir, os.path.join(self.base_dir, "scan_index.json")
+        )
+        self.model_watcher.set_scanner(self.scanner)
         self.command_builder = CommandBuilder(
-            base_executable=os.path.join(self.server_dir, "llama-server.exe"),
+            base_executable=os.path.join(self.server_dir, server_executable_name()),
             models_dir=self.models_dir,
         )
+        if hasattr(self, "supervisor"):
+            self.supervisor.configure(self.command_builder, self.server_dir)
 
-    def refresh_models(self):
-        self.available_models = self.scanner.scan()
-        # Update model combo box if it exists
-        if hasattr(self, "inputs") and "model" in self.inputs:
-            combo = self.inputs["model"].input_widget
-            current = combo.currentText()
-            combo.clear()
-            combo.addItems(self.available_models)
-            # Try to restore the previous selection
-            idx = combo.findText(current)
-            if idx >= 0:
-                combo.setCurrentIndex(idx)
-            # Trigger mmproj update for the current selection
+    def refresh_models(self, full=False):
+        """Rescan the models folder on a worker thread.
+
+        Models are inserted into the model combo as they are discovered;
+        entries that no longer exist are removed once the scan completes.
+        """
+        self.cancel_model_scan()
+        self.scan_worker = ModelScanWorker(self.scanner, full, self)
+        self.scan_worker.model_found.connect(self._on_model_found)
+        self.scan_worker.progress.connect(self._on_scan_progress)
+        self.scan_worker.scan_finished.connect(self._on_scan_finished)
+        self.btn_refresh_models.setText("Cancel Scan")
+        self.scan_status.setText("Scanning models...")
+        self.scan_worker.start()
+
+    def cancel_model_scan(self):
+        """Cancels a running scan without waiting for it.
+
+        The worker stops at its next folder in the background; its results
+        are ignored and it deletes itself once finished.
+        """
+        worker = self.scan_worker
+        if worker is None:
+            return
+        worker.cancel()
+        worker.model_found.disconnect()
+        worker.progress.disconnect()
+        worker.scan_finished.disconnect()
+        worker.finished.connect(worker.deleteLater)
+        if worker.isFinished():
+            worker.deleteLater()
+        self.scan_worker = None
+        self.btn_refresh_models.setText("Refresh Models")
+        self.scan_status.setText("Scan cancelled")
+
+    def _on_refresh_models_clicked(self):
+        if self.scan_worker is not None:
+            self.cancel_model_scan()
+        else:
+            self.refresh_models()
+
+    def _on_model_found(self, rel_path):
+        if self.sender() is not self.scan_worker:
+            return  # Stale signal from a cancelled scan
+        if rel_path not in self.available_models:
+            key = model_sort_key(rel_path)
+            idx = bisect.bisect_left(self._model_sort_keys, key)
+            self._model_sort_keys.insert(idx, key)
+            self.available_models.insert(idx, rel_path)
+            if "model" in self.inputs:
+                self.inputs["model"].input_widget.insertItem(idx, rel_path)
+                self._mark_incomplete_item(idx)
+
+        pending = self._pending_model_params
+        if pending and pending.get("model") == rel_path:
+            self._apply_model_params(pending)
+        elif rel_path == self._current_model():
+            # Mmproj files in the model's folder are known now
             self._update_mmproj_options()
+            self._update_draft_options()
+
+    def _on_scan_progress(self, dirs_done, rel_dir):
+        if self.sender() is not self.scan_worker:
+            return
+        self.scan_status.setText(
+            f"Scanning... {dirs_done} folders, {len(self.available_models)} models"
+        )
+
+    def _on_scan_finished(self, models, cancelled):
+        if self.sender() is not self.scan_worker:
+            return
+        worker = self.scan_worker
+        self.scan_worker = None
+        self.btn_refresh_models.setText("Refresh Models")
+        if worker.error is not None:
+            self.scan_status.setText(f"Scan failed: {worker.error}")
+            return
+        if cancelled:
+            self.scan_status.setText("Scan cancelled")
+            return
+
+        # Drop models that disappeared since the last scan
+        found = set(models)
+        combo = self.inputs["model"].input_widget if "model" in self.inputs else None
+        for i in reversed(range(len(self.available_models))):
+            if self.available_models[i] not in found:
+                del self.available_models[i]
+                del self._model_sort_keys[i]
+                if combo is not None:
+                    combo.removeItem(i)
+
+        self.scan_status.setText(f"{len(self.available_models)} models")
+        self._pending_model_params = None
+        self.model_watcher.update_paths()
+        self._update_incomplete_items()
+        # Trigger mmproj/draft update for the current selection
+        self._update_mmproj_options()
+        self._update_draft_options()
+        self._update_model_tooltip()
+
+    def _mark_incomplete_item(self, idx):
+        """Grey out a model combo entry whose file is still being written."""
+        combo = self.inputs["model"].input_widget
+        item = combo.model().item(idx)
+        if item is None:
+            return
+        shards = self.scanner.get_shards(combo.itemText(idx))
+        incomplete = any(self.scanner.is_incomplete(p) for p in shards)
+        item.setEnabled(not incomplete)
+        item.setToolTip("Still being copied or written" if incomplete else "")
+
+    def _update_incomplete_items(self):
+        if "model" not in self.inputs:
+            return
+        for i in range(self.inputs["model"].input_widget.count()):
+            self._mark_incomplete_item(i)
+
+    def _schedule_memory_estimate(self):
+        self.estimate_timer.start(150)
+
+    def _update_memory_estimate(self):
+        """Show estimated VRAM/RAM use for the current form values."""
+        params = self.get_form_data()
+        info, mmproj_info = self._selected_model_infos(params)
+        if info is None:
+            self.estimate_label.setText("")
+            return
+
+        draft_info = self._draft_info(params)
+        estimate = estimate_memory(info, params, mmproj_info, draft_info=draft_info)
+        text = f"Estimated memory: {format_estimate(estimate)}"
+        if params.get("offload-mode") == "fit":
+            text += " (full offload; --fit may move layers to RAM)"
+        if draft_info is not None:
+            draft = params["model-draft"]
+            size = self.scanner.get_model_size(draft) / 1024**3
+            text += f"\nDraft model: {os.path.basename(draft)} ({size:.2f} GiB)"
+        self.estimate_label.setText(text)
+
+    def _selected_model_infos(self, params):
+        """Returns (model GGUFInfo, mmproj GGUFInfo or None) for the form params."""
+        info = None
+        if params.get("model"):
+            info = self.scanner.get_model_info(params["model"])
+        mmproj_info = None
+        if params.get("mmproj"):
+            mmproj_info = self.scanner.get_model_info(params["mmproj"])
+        return info, mmproj_info
+
+    def _draft_info(self, params):
+        """GGUFInfo of the speculative draft model params use, or None."""
+        if params.get("spec-type") != DRAFT_MODEL_SPEC_TYPE:
+            return None
+        if not params.get("model-draft"):
+            return None
+        return self.scanner.get_model_info(params["model-draft"])
+
+    def _estimate_profile_vram(self, params):
+        """Estimated GPU bytes for launching params, or None if unknown."""
+        info, mmproj_info = self._selected_model_infos(params)
+        if info is None:
+            return None
+        estimate = estimate_memory(
+            info, params, mmproj_info, draft_info=self._draft_info(params)
+        )
+        return gpu_total(estimate)
+
+    def _ask_vram_budget(self, title):
+        """Ask for the per-GPU VRAM budget in bytes.
+
+        Defaults to the main GPU's free memory as reported by nvidia-smi,
+        falling back to the last value entered. Returns None if cancelled.
+        """
+        default = self.settings_manager.get("vram_budget_mib", 8192)
+        gpus = query_gpus()
+        if gpus:
+            main_gpu = self.get_form_data().get("main-gpu", 0)
+            gpu = next((g for g in gpus if g["index"] == main_gpu), gpus[0])
+            if gpu.get("memory.free") is not None:
+                default = int(gpu["memory.free"])
+
+        budget, ok = QInputDialog.getInt(
+            self, title, "VRAM budget per GPU (MiB):", default, 0, 10000000
+        )
+        if not ok:
+            return None
+        self.settings_manager.set("vram_budget_mib", budget)
+        return budget * MIB
+
+    def _vram_margin(self):
+        return self.settings_manager.get("vram_margin_mib", 1024) * MIB
+
+    def auto_offload(self):
+        """Fill in n-cpu-moe / ngl for manual offload mode from a VRAM budget."""
+        params = self.get_form_data()
+        info, mmproj_info = self._selected_model_infos(params)
+        if info is None:
+            QMessageBox.warning(self, "Error", "Please select a valid GGUF model.")
+            return
+        budget = self._ask_vram_budget("Auto Offload")
+        if budget is None:
+            return
+
+        plan = plan_offload(
+            info,
+            params,
+            budget,
+            self._vram_margin(),
+            mmproj_info,
+            draft_info=self._draft_info(params),
+        )
+        for key, value in (
+            ("offload-mode", "n-cpu-moe"),
+            ("ngl", plan["ngl"]),
+            ("n-cpu-moe", plan["n-cpu-moe"]),
+        ):
+            if key in self.inputs:
+                self.inputs[key].set_value(value)
+
+        QMessageBox.information(
+            self,
+            "Auto Offload",
+            f"GPU Layers: {plan['ngl']}\nCPU MoE Layers: {plan['n-cpu-moe']}\n\n"
+            f"Estimated: {format_estimate(plan['estimate'])}",
+        )
+
+    def fill_max_context(self):
+        """Set ctx-size to the largest context that fits the VRAM budget."""
+        params = self.get_form_data()
+        info, mmproj_info = self._selected_model_infos(params)
+        if info is None:
+            QMessageBox.warning(self, "Error", "Please select a valid GGUF model.")
+            return
+        budget = self._ask_vram_budget("Max Ctx")
+        if budget is None:
+            return
+
+        granularity = self.settings_manager.get("ctx_granularity", 1024)
+        draft_info = self._draft_info(params)
+        n_ctx = max_context_size(
+            info,
+            params,
+            budget,
+            self._vram_margin(),
+            mmproj_info,
+            granularity,
+            draft_info=draft_info,
+        )
+        if n_ctx == 0:
+            QMessageBox.warning(
+                self,
+                "Max Ctx",
+                "Not even the smallest context fits. "
+                "Offload more layers to the CPU first.",
+            )
+            return
+
+        if "ctx-size" in self.inputs:
+            self.inputs["ctx-size"].set_value(n_ctx)
+        params["ctx-size"] = n_ctx
+        estimate = estimate_memory(info, params, mmproj_info, draft_info=draft_info)
+        at_limit = 0 < info.n_ctx_train < n_ctx + granularity
+        limit = " (training context limit)" if at_limit else ""
+        QMessageBox.information(
+            self,
+            "Max Ctx",
+            f"Context Size: {n_ctx}{limit}\n\n"
+            f"Estimated: {format_estimate(estimate)}",
+        )
+
+    def _current_model(self):
+        if "model" not in self.inputs:
+            return ""
+        return self.inputs["model"].input_widget.currentText()
 
     def _update_mmproj_options(self):
         """Update the mmproj combo box based on the currently selected model."""
@@ -283,9 +759,71 @@ class MainWindow(QMainWindow):
         else:
             mmproj_combo.setEnabled(False)
 
+    def _update_draft_options(self, selected=None):
+        """List models that share the selected model's tokenizer as drafts.
+
+        The current draft (or selected, if given) stays chosen if it is
+        still a candidate. selected is kept even if it isn't, so a saved
+        pairing the scan can't confirm (e.g. unreadable header) survives.
+        """
+        if not hasattr(self, "inputs") or "model-draft" not in self.inputs:
+            return
+        combo = self.inputs["model-draft"].input_widget
+        current = combo.currentText() if selected is None else selected
+        model = self._current_model()
+        candidates = (
+            self.scanner.draft_candidates(model, self.available_models) if model else []
+        )
+
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem("")  # Empty = no draft model
+        for rel_path in candidates:
+            combo.addItem(rel_path)
+            size = self.scanner.get_model_size(rel_path) / 1024**3
+            combo.setItemData(combo.count() - 1, f"{size:.2f} GiB", Qt.ToolTipRole)
+        if selected and combo.findText(selected) < 0:
+            combo.addItem(selected)
+        combo.setCurrentText(current)
+        combo.blockSignals(False)
+        self.inputs["model-draft"].value_changed.emit()
+        combo.setToolTip(
+            f"{len(candidates)} smaller models share this model's tokenizer"
+            if model
+            else ""
+        )
+
     def _on_model_changed(self, text):
         """Called when the model combo box selection changes."""
         self._update_mmproj_options()
+        self._update_draft_options()
+        self._update_model_tooltip()
+
+    def _update_model_tooltip(self):
+        """Show the selected model's GGUF metadata as the combo tooltip."""
+        if "model" not in self.inputs:
+            return
+        combo = self.inputs["model"].input_widget
+        selected_model = combo.currentText()
+        info = self.scanner.get_model_info(selected_model) if selected_model else None
+        if info is None:
+            combo.setToolTip("")
+            return
+
+        parts = [info.architecture or "unknown arch", info.quant]
+        if info.block_count:
+            parts.append(f"{info.block_count} layers")
+        if info.expert_count:
+            parts.append(f"{info.expert_used_count}/{info.expert_count} experts")
+        if info.n_ctx_train:
+            parts.append(f"ctx {info.n_ctx_train}")
+        shards = self.scanner.get_shards(selected_model)
+        if len(shards) > 1:
+            parts.append(f"{len(shards)} shards")
+        parts.append(
+            f"{self.scanner.get_model_size(selected_model) / 1024 ** 3:.2f} GiB"
+        )
+        combo.setToolTip(" | ".join(p for p in parts if p))
 
     def init_ui(self):
         central_widget = QWidget()
@@ -316,6 +854,46 @@ class MainWindow(QMainWindow):
         self.btn_settings.clicked.connect(self.open_settings)
         sidebar_layout.addWidget(self.btn_settings)
 
+        self.btn_refresh_models = QPushButton("Refresh Models")
+        self.btn_refresh_models.clicked.connect(self._on_refresh_models_clicked)
+        sidebar_layout.addWidget(self.btn_refresh_models)
+
+        self.scan_status = QLabel("")
+        sidebar_layout.addWidget(self.scan_status)
+
+        self.btn_proxy = QPushButton("Start Proxy")
+        self.btn_proxy.setCheckable(True)
+        self.btn_proxy.setToolTip(
+            "Serve all profiles behind one OpenAI-compatible URL, "
+            "starting each profile when a request names it"
+        )
+        self.btn_proxy.clicked.connect(self.toggle_proxy)
+        sidebar_layout.addWidget(self.btn_proxy)
+
+        self.btn_autotune = QPushButton("Autotune...")
+        self.btn_autotune.setToolTip(
+            "Launch and benchmark the selected profile with different batch, "
+            "KV cache and slot settings and save the best as a new profile"
+        )
+        self.btn_autotune.clicked.connect(self.autotune_profile)
+        sidebar_layout.addWidget(self.btn_autotune)
+
+        self.btn_slot_cache = QPushButton("Slot Cache...")
+        self.btn_slot_cache.setToolTip(
+            "Saved KV cache slots of profiles with Persist KV Cache Slots, "
+            "least recently used first"
+        )
+        self.btn_slot_cache.clicked.connect(self.open_slot_cache)
+        sidebar_layout.addWidget(self.btn_slot_cache)
+
+        self.btn_warmup = QPushButton("Warmup Prompts...")
+        self.btn_warmup.setToolTip(
+            "Prompts (system prompts, tool schemas) sent to every slot when the "
+            "selected profile's server is ready, so they are cached before use"
+        )
+        self.btn_warmup.clicked.connect(self.edit_warmup_prompts)
+        sidebar_layout.addWidget(self.btn_warmup)
+
         self.btn_edit_mode = QPushButton("Edit GUI Mode")
         self.btn_edit_mode.setCheckable(True)
         self.btn_edit_mode.clicked.connect(self.toggle_edit_mode)
@@ -334,7 +912,26 @@ class MainWindow(QMainWindow):
         self.param_layout.setAlignment(Qt.AlignTop)
         self.scroll.setWidget(self.param_container)
 
-        right_layout.addWidget(self.scroll)
+        # Captured llama-server output below the parameters
+        self.log_panel = ServerLogPanel()
+        self.instances_panel = InstancesPanel()
+        self.instances_panel.instance_selected.connect(self._view_instance)
+        self.instances_panel.stop_requested.connect(self.stop_instance)
+        self.instances_panel.restart_requested.connect(self.restart_instance)
+        self.instances_panel.benchmark_requested.connect(self.benchmark_instance)
+        self.log_panel.insertTab(0, self.instances_panel, "Instances")
+        self.metrics_panel = MetricsPanel()
+        self.metrics_panel.export_requested.connect(self.export_metrics)
+        self.log_panel.addTab(self.metrics_panel, "Metrics")
+        self.gpu_panel = GpuPanel()
+        self.log_panel.addTab(self.gpu_panel, "GPU")
+        self.param_splitter = QSplitter(Qt.Vertical)
+        self.param_splitter.addWidget(self.scroll)
+        self.param_splitter.addWidget(self.log_panel)
+        self.param_splitter.setStretchFactor(0, 3)
+        self.param_splitter.setStretchFactor(1, 1)
+
+        right_layout.addWidget(self.param_splitter)
 
         # Edit Mode List (Hidden by default)
         self.edit_list = QListWidget()
@@ -359,6 +956,15 @@ class MainWindow(QMainWindow):
         self.edit_controls.setVisible(False)
         right_layout.addWidget(self.edit_controls)
 
+        # Live memory estimate for the current form values
+        self.estimate_label = QLabel("")
+        self.estimate_label.setWordWrap(True)
+        right_layout.addWidget(self.estimate_label)
+
+        self.estimate_timer = QTimer(self)
+        self.estimate_timer.setSingleShot(True)
+        self.estimate_timer.timeout.connect(self._update_memory_estimate)
+
         # Action Buttons
         action_layout = QHBoxLayout()
 
@@ -367,8 +973,24 @@ class MainWindow(QMainWindow):
         self.btn_open_chat.setEnabled(False)
 
         self.btn_monitor_gpu = QPushButton("Monitor GPU")
+        self.btn_monitor_gpu.setToolTip(
+            "Show GPU memory, utilization, power and clock charts"
+        )
         self.btn_monitor_gpu.clicked.connect(self.monitor_gpu)
 
+        self.btn_auto_offload = QPushButton("Auto Offload")
+        self.btn_auto_offload.setToolTip(
+            "Pick the smallest CPU MoE Layers (or largest GPU Layers) "
+            "that fits a VRAM budget"
+        )
+        self.btn_auto_offload.clicked.connect(self.auto_offload)
+
+        self.btn_max_ctx = QPushButton("Max Ctx")
+        self.btn_max_ctx.setToolTip(
+            "Set Context Size to the largest value that fits a VRAM budget"
+        )
+        self.btn_max_ctx.clicked.connect(self.fill_max_context)
+
         self.btn_stop = QPushButton("Stop Server")
         self.btn_stop.setObjectName("btn_stop")  # For styling
         self.btn_stop.clicked.connect(self.stop_server)
@@ -382,9 +1004,15 @@ class MainWindow(QMainWindow):
 
         action_layout.addWidget(self.btn_open_chat)
         action_layout.addWidget(self.btn_monitor_gpu)
+        action_layout.addWidget(self.btn_auto_offload)
+        action_layout.addWidget(self.btn_max_ctx)
         action_layout.addStretch()
+        self.status_label = QLabel("")
+        action_layout.addWidget(self.status_label)
         action_layout.addWidget(self.btn_stop)
         action_layout.addWidget(self.btn_save)
+        self.vram_headroom_label = QLabel("")
+        action_layout.addWidget(self.vram_headroom_label)
         action_layout.addWidget(self.btn_launch)
 
         right_layout.addLayout(action_layout)
@@ -417,10 +1045,19 @@ class MainWindow(QMainWindow):
             if key == "mmproj":
                 options = [""]  # Start with just empty (no mmproj)
 
+            # Draft candidates depend on the selected model, like mmproj
+            if key == "model-draft":
+                options = [""]
+
             inp = ParameterInput(label, type_, default, options)
             self.param_layout.addWidget(inp)
             self.inputs[key] = inp
 
+        # Recompute the memory estimate (debounced) whenever any input changes
+        for inp in self.inputs.values():
+            inp.value_changed.connect(self._schedule_memory_estimate)
+        self._schedule_memory_estimate()
+
         # Connect model combo change to update mmproj options
         if "model" in self.inputs:
             model_widget = self.inputs["model"].input_widget
@@ -540,9 +1177,25 @@ class MainWindow(QMainWindow):
         self.apply_theme()
 
     def open_settings(self):
-        dialog = SettingsDialog(self.server_dir, self.models_dir, self)
+        options = {
+            o["key"]: self.settings_manager.get(o["key"], o["default"])
+            for o in SETTINGS_OPTIONS
+        }
+        dialog = SettingsDialog(self.server_dir, self.models_dir, options, self)
         if dialog.exec_() == QDialog.Accepted:
             new_server_dir, new_models_dir = dialog.get_paths()
+            for key, value in dialog.get_options().items():
+                self.settings_manager.set(key, value)
+            self.residency.vram_budget = (
+                self.settings_manager.get("resident_vram_budget_mib", 0) * MIB
+            )
+            self.gpu_telemetry.interval = self.settings_manager.get(
+                "gpu_sample_interval", DEFAULT_INTERVAL
+            )
+            self.slot_cache.max_bytes = (
+                self.settings_manager.get("slot_cache_max_mib", 0) * MIB
+            )
+            self.slot_cache.enforce_limit()
 
             if new_server_dir != self.server_dir or new_models_dir != self.models_dir:
                 self.server_dir = new_server_dir
@@ -567,6 +1220,10 @@ class MainWindow(QMainWindow):
         self.current_profile_name = name
         data = self.profile_manager.get_profile(name)
         self.load_form_data(data)
+        if self.supervisor.get(name) is not None:
+            self._view_instance(name)
+        else:
+            self._update_server_buttons()
 
     def load_form_data(self, data):
         if not data:
@@ -576,10 +1233,35 @@ class MainWindow(QMainWindow):
         # Reset all inputs to defaults first, so parameters missing from the
         # profile don't retain stale values from a previously selected profile.
         for key, inp in self.inputs.items():
-            if key in ("model", "mmproj"):
+            if key in ("model", "mmproj", "model-draft"):
                 continue  # Handled specially below
             inp.reset_to_default()
 
+        self._apply_model_params(params)
+
+        # Load all other parameters
+        for key, inp in self.inputs.items():
+            if key in ("model", "mmproj", "model-draft"):
+                continue  # Already handled above
+            if key in params:
+                inp.set_value(params[key])
+
+    def _apply_model_params(self, params):
+        """Select a profile's model, mmproj and draft model.
+
+        If the model hasn't been discovered yet because a scan is still
+        running, the selection is applied once the scan streams it in.
+        """
+        self._pending_model_params = None
+        model = params.get("model")
+        if model and self.scan_worker is not None and "model" in self.inputs:
+            if self.inputs["model"].input_widget.findText(model) < 0:
+                self._pending_model_params = {
+                    "model": model,
+                    "mmproj": params.get("mmproj", ""),
+                    "model-draft": params.get("model-draft", ""),
+                }
+
         # Load model first so that mmproj options get populated via the signal
         if "model" in params and "model" in self.inputs:
             self.inputs["model"].set_value(params["model"])
@@ -604,12 +1286,7 @@ class MainWindow(QMainWindow):
                             combo.setCurrentIndex(i)
                             break
 
-        # Load all other parameters
-        for key, inp in self.inputs.items():
-            if key in ("model", "mmproj"):
-                continue  # Already handled above
-            if key in params:
-                inp.set_value(params[key])
+        self._update_draft_options(params.get("model-draft") or "")
 
     def get_form_data(self):
         data = {}
@@ -687,23 +1364,37 @@ class MainWindow(QMainWindow):
             return
 
         data = {"name": self.current_profile_name, "parameters": self.get_form_data()}
+        # Warmup prompts are edited in their own dialog, not the form
+        existing = self.profile_manager.get_profile(self.current_profile_name) or {}
+        if existing.get("warmup_prompts"):
+            data["warmup_prompts"] = existing["warmup_prompts"]
         self.profile_manager.save_profile(self.current_profile_name, data)
         QMessageBox.information(
             self, "Saved", f"Profile '{self.current_profile_name}' saved."
         )
 
+    def _launch_key(self):
+        return self.current_profile_name or UNSAVED_PROFILE_KEY
+
     def launch_model(self):
-        if self.server_process:
+        key = self._launch_key()
+        if self._switch is not None:
+            QMessageBox.information(
+                self, "Busy", f"'{self._switch.key}' is still being relaunched."
+            )
+            return
+        inst = self.supervisor.get(key)
+        restart = False
+        if inst is not None and inst.is_live:
             reply = QMessageBox.question(
                 self,
                 "Server Running",
-                "A server is already running. Stop it and start new?",
+                f"'{key}' is already running on port {inst.port}. Restart it?",
                 QMessageBox.Yes | QMessageBox.No,
             )
-            if reply == QMessageBox.Yes:
-                self.stop_server()
-            else:
+            if reply != QMessageBox.Yes:
                 return
+            restart = True
 
         params = self.get_form_data()
 
@@ -712,69 +1403,609 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Please select a model.")
             return
 
-        cmd_list, env = self.command_builder.build_command(params)
-        cmd_str = self.command_builder.build_command_string(params)
+        # Catch missing/partial shards before llama-server spends minutes loading
+        problems = self.scanner.validate_model(params["model"])
+        if params.get("mmproj"):
+            problems += self.scanner.validate_model(params["mmproj"])
+        if params.get("spec-type") == DRAFT_MODEL_SPEC_TYPE and params.get(
+            "model-draft"
+        ):
+            problems += self.scanner.validate_model(params["model-draft"])
+        if problems:
+            QMessageBox.warning(
+                self, "Model Not Ready", "Cannot launch:\n\n" + "\n".join(problems)
+            )
+            return
 
-        print(f"Launching: {cmd_str}")
+        if restart and not self.settings_manager.get("zero_downtime_restart", True):
+            self.supervisor.stop(key)
+            self._after_stop(inst, lambda: self._continue_launch(key, params))
+            return
+        self._continue_launch(key, params)
 
-        try:
-            # Launch in new terminal
-            # Use server_dir as cwd
-            self.server_process = subprocess.Popen(
-                cmd_list,
-                cwd=self.server_dir,
-                env=env,
-                creationflags=subprocess.CREATE_NEW_CONSOLE,
+    def _continue_launch(self, key, params):
+        self._record_recent_profile()
+        self._apply_best_draft(params)
+
+        if params.get("prewarm"):
+            self._start_prewarm(self._model_file_paths(params), launch=(key, params))
+            return
+        self._launch(key, params)
+
+    def _apply_best_draft(self, params):
+        """Sets the best measured draft length if the profile asks for it."""
+        spec_type, current = spec_config(params)
+        profile = self.current_profile_name
+        if not params.get("spec-auto-draft") or spec_type == "none" or not profile:
+            return
+        workload = self.spec_stats.main_workload(profile)
+        best = self.spec_stats.recommend(profile, spec_type, workload)
+        if best is not None and best["draft_n_max"] != current:
+            print(
+                f"{profile}: using draft max {best['draft_n_max']} "
+                f"({best['gen_tps']:.1f} tok/s measured)"
             )
+            params["spec-draft-n-max"] = best["draft_n_max"]
 
-            self.btn_launch.setEnabled(False)
-            self.btn_stop.setEnabled(True)
-            self.btn_open_chat.setEnabled(True)
+    def _launch(self, key, params):
+        inst = self.supervisor.get(key)
+        if inst is not None and inst.is_live:
+            self._switch_server(key, params)
+        else:
+            self._start_server(key, params)
+
+    def _new_launch_record(self, params):
+        return {
+            "profile": self.current_profile_name,
+            "model": params.get("model"),
+            "models_dir": self.models_dir,
+            "prewarm": bool(params.get("prewarm")),
+        }
+
+    def _start_server(self, key, params):
+        # Evicting other models waits for them to exit, so do it off the GUI
+        # thread; supervisor.start() then finds nothing left to stop
+        evict = self.residency.to_evict(key, params)
+        if evict:
+            names = ", ".join(inst.key for inst in evict)
+            self.status_label.setText(f"{key}: stopping {names} to make room")
+            self.make_room_worker = MakeRoomWorker(self.residency, key, params, self)
+            self.make_room_worker.room_made.connect(self._on_room_made)
+            # Also cleans up a worker whose launch was cancelled meanwhile
+            self.make_room_worker.finished.connect(self.make_room_worker.deleteLater)
+            self._update_server_buttons()
+            self.make_room_worker.start()
+            self.status_timer.start(STATUS_POLL_MS)
+            return
+        self._spawn_server(key, params)
 
-            # Start monitoring
-            self.status_timer.start(1000)
+    def _on_room_made(self, evicted):
+        worker = self.sender()
+        if worker is not self.make_room_worker:
+            return  # The launch was cancelled meanwhile
+        self.make_room_worker = None
+        self._spawn_server(worker.key, worker.params)
 
+    def _spawn_server(self, key, params):
+        cmd_str = self.command_builder.build_command_string(params)
+        print(f"Launching {key}: {cmd_str}")
+        # An explicit launch lifts crash-loop quarantine
+        self.restart_manager.release(key)
+
+        try:
+            inst = self.supervisor.start(key, params)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to launch: {e}")
+            return
+
+        if inst.port != int(params.get("port") or DEFAULT_PORT):
+            print(f"Port {params.get('port')} is taken, {key} uses {inst.port}")
+        self._instance_states.pop(key, None)
+        self._launch_records[key] = self._new_launch_record(params)
+        self._view_instance(key)
+
+        # Start monitoring
+        self.supervisor.start_sampling()
+        self.status_timer.start(STATUS_POLL_MS)
+        self.check_server_status()
+
+    def _switch_server(self, key, params):
+        """Relaunches a running profile; it keeps serving until the new one is ready."""
+        cmd_str = self.command_builder.build_command_string(params)
+        print(f"Relaunching {key}: {cmd_str}")
+        self.restart_manager.release(key)
+
+        self._switch_record = self._new_launch_record(params)
+        self._launch_records[shadow_key(key)] = dict(self._switch_record)
+        self._instance_states.pop(shadow_key(key), None)
+        self._instance_states.pop(retired_key(key), None)
+        self._switch = BlueGreenSwitch(
+            self.supervisor, key, params, has_room=self._fits_alongside
+        )
+        self._switch.start()
+        self.status_label.setText(
+            f"{key}: loading the new server next to the running one"
+        )
+        self._view_instance(shadow_key(key))
+
+        self.supervisor.start_sampling()
+        self.status_timer.start(STATUS_POLL_MS)
+        self.check_server_status()
+
+    def _fits_alongside(self, params):
+        """Whether params fit in memory next to everything already running."""
+        gpus = query_gpus()
+        free = None
+        if gpus:
+            free = sum(g.get("memory.free") or 0 for g in gpus) * MIB
+        return self.residency.fits_alongside(params, free)
+
+    def _poll_switch(self):
+        switch = self._switch
+        key = switch.key
+        shadow = shadow_key(key)
+        if switch.phase in (DRAINING, DONE) and not switch.fell_back:
+            # Switched over: the new server now answers under the profile's key
+            if shadow in self._launch_records:
+                self._launch_records[key] = self._launch_records.pop(shadow)
+                self._instance_states[key] = READY
+                self._on_server_state(switch.instance, READY)
+            if self._view_key == shadow:
+                self._view_instance(key)
+            # The old server moved to another key; don't report it as a new one
+            old = self.supervisor.get(retired_key(key))
+            if old is not None:
+                self._instance_states.setdefault(old.key, old.state)
+        if not switch.done:
+            return
+
+        self._switch = None
+        self._launch_records.pop(shadow, None)
+        if switch.phase == FAILED:
+            self.status_label.setText(f"{key}: relaunch failed ({switch.error})")
+        elif switch.phase == DONE and not switch.fell_back:
+            self.status_label.setText(f"{key}: switched to port {switch.instance.port}")
+        elif switch.phase == DONE and switch.fell_back:
+            # Restarted in place; report it like a fresh launch
+            self._launch_records[key] = self._switch_record
+            self._instance_states.pop(key, None)
+            if self._view_key == shadow:
+                self._view_instance(key)
+        self._switch_record = None
+
+    def _view_instance(self, key):
+        """Shows an instance's log and load report in the log panel."""
+        self._view_key = key
+        self._log_seq = 0
+        self.log_panel.clear()
+        inst = self.supervisor.get(key)
+        if inst is not None:
+            cmd_str = self.command_builder.build_command_string(inst.params)
+            self.log_panel.append_lines([f"$ {cmd_str}"])
+            if inst.state == READY or not inst.is_live:
+                self._show_load_report(inst)
+            self.instances_panel.select(key)
+        self.metrics_panel.update_series(inst.metrics if inst is not None else None)
+        self._update_server_buttons()
+
+    def _viewed_instance(self):
+        return self.supervisor.get(self._view_key) if self._view_key else None
+
+    def _update_server_buttons(self):
+        inst = self.supervisor.get(self._launch_key())
+        viewed = self._viewed_instance()
+        launching = (
+            self._prewarm_launch is not None or self.make_room_worker is not None
+        )
+        self.btn_launch.setEnabled(not launching and self._switch is None)
+        self.btn_stop.setEnabled(launching or (inst is not None and inst.is_live))
+        self.btn_open_chat.setEnabled(viewed is not None and viewed.state == READY)
 
     def check_server_status(self):
-        if self.server_process:
-            if self.server_process.poll() is not None:
-                # Process has exited
-                self.server_process = None
-                self.status_timer.stop()
-                self.btn_launch.setEnabled(True)
-                self.btn_stop.setEnabled(False)
-                self.btn_open_chat.setEnabled(False)
+        if self._switch is not None:
+            self._poll_switch()
+        for inst in self.supervisor.list():
+            state = inst.state
+            if state != self._instance_states.get(inst.key):
+                self._instance_states[inst.key] = state
+                self._on_server_state(inst, state)
+
+        viewed = self._viewed_instance()
+        if (
+            viewed is not None
+            and viewed.state == READY
+            and viewed.key in self.warmup.results
+            and viewed.process not in self._warmup_reported
+        ):
+            self._show_load_report(viewed)
+        if viewed is not None:
+            self._log_seq, lines = viewed.process.lines_since(self._log_seq)
+            self.log_panel.append_lines(lines)
+            if self.log_panel.currentWidget() is self.metrics_panel:
+                self.metrics_panel.update_series(viewed.metrics)
+
+        instances = self.supervisor.list()
+        notes = {inst.key: self.restart_manager.status(inst.key) for inst in instances}
+        for inst in instances:
+            for manager in (self.warmup, self.slot_cache):
+                if not notes[inst.key] and inst.key in manager.status:
+                    notes[inst.key] = manager.status[inst.key]
+        if self._switch is not None:
+            notes[shadow_key(self._switch.key)] = f"replaces {self._switch.key}"
+            notes[retired_key(self._switch.key)] = "finishing requests"
+        self.instances_panel.update_instances(instances, notes)
+        self._update_server_buttons()
+        if (
+            not self.supervisor.live()
+            and self._switch is None
+            and self.proxy is None
+            and not self.restart_manager.has_pending
+        ):
+            self.status_timer.stop()
+            self.supervisor.stop_sampling()
+
+    def _on_server_state(self, inst, state):
+        text = f"{inst.key}: {state}"
+        if state == READY:
+            text += f" in {inst.process.time_to_ready:.1f}s (port {inst.port})"
+        elif state == CRASHED:
+            text += f" (exit code {inst.process.returncode})"
+        self.status_label.setText(text)
+
+        if state == READY:
+            self._record_launch(inst, state)
+            if inst.key == self._view_key:
+                self._show_load_report(inst)
+            if self.settings_manager.get("prewarm_next_profile", False):
+                self._prewarm_next_profile()
+        elif state in FINAL_STATES:
+            self._record_spec_stats(inst)
+            pending = self._after_stop_actions.get(inst.key)
+            if pending is not None and pending[0] is inst:
+                del self._after_stop_actions[inst.key]
+                self.supervisor.wait_stopped(inst, STOP_WAIT_SECONDS)
+                # Not from inside the status poll that saw the exit
+                QTimer.singleShot(0, pending[1])
+            if inst.key in self._launch_records:
+                # Never got ready: report what the load got through
+                self._record_launch(inst, state)
+                if inst.key == self._view_key:
+                    self._show_load_report(inst)
+            if state == CRASHED and inst.key == self._view_key:
+                self.log_panel.setCurrentWidget(self.log_panel.log_view)
+
+    def _show_load_report(self, inst):
+        proc = inst.process
+        report = format_load_report(
+            proc.load_events, proc.load_seconds, proc.time_to_ready
+        )
+        if inst.key != UNSAVED_PROFILE_KEY:
+            avg = self.launch_history.average_time_to_ready(inst.key)
+            if avg is not None:
+                report += f"\nAverage time to ready for this profile: {avg:.2f}s"
+            spec = self.spec_stats.format_report(inst.key, inst.params)
+            if spec:
+                report += "\n" + "\n".join(spec)
+        warmup = self.warmup.results.get(inst.key)
+        if warmup is not None and inst.state == READY:
+            report += "\n" + "\n".join(format_warmup_report(warmup))
+            self._warmup_reported.add(inst.process)
+        self.log_panel.set_report(report)
+
+    def _record_launch(self, inst, outcome):
+        record = self._launch_records.pop(inst.key, None)
+        if record is None:
+            return
+        proc = inst.process
+        record.update(
+            {
+                "outcome": outcome,
+                "time_to_ready": proc.time_to_ready,
+                "load_seconds": proc.load_seconds,
+            }
+        )
+        self.launch_history.record(record)
+
+    def _record_spec_stats(self, inst):
+        """Stores the draft acceptance and tok/s of an instance's requests."""
+        profile = profile_key(inst.key)
+        if self.profile_manager.get_profile(profile) is None:
+            return
+        self.spec_stats.record_session(profile, inst.params, inst.process.get_events())
+
+    def _model_file_paths(self, params):
+        """Absolute paths of every file llama-server will mmap for params."""
+        paths = []
+        if params.get("model"):
+            for shard in self.scanner.get_shards(params["model"]):
+                paths.append(self.scanner.get_full_path(shard))
+        if params.get("mmproj"):
+            paths.append(self.scanner.get_full_path(params["mmproj"]))
+        if params.get("spec-type") == DRAFT_MODEL_SPEC_TYPE and params.get(
+            "model-draft"
+        ):
+            for shard in self.scanner.get_shards(params["model-draft"]):
+                paths.append(self.scanner.get_full_path(shard))
+        return paths
+
+    def _record_recent_profile(self):
+        """Keep a most-recently-launched list used to guess the next profile."""
+        if not self.current_profile_name:
+            return
+        recent = self.settings_manager.get("recent_profiles", [])
+        recent = [self.current_profile_name] + [
+            n for n in recent if n != self.current_profile_name
+        ]
+        self.settings_manager.set("recent_profiles", recent[:10])
+
+    def _prewarm_next_profile(self):
+        """Warm the most recently launched profile that isn't running."""
+        if not self.supervisor.live() or self.prewarm_worker is not None:
+            return
+        for name in self.settings_manager.get("recent_profiles", []):
+            inst = self.supervisor.get(name)
+            if inst is not None and inst.is_live:
+                continue
+            profile = self.profile_manager.get_profile(name)
+            if profile:
+                paths = self._model_file_paths(profile.get("parameters", {}))
+                self._start_prewarm(paths, workers=1)
+                return
+
+    def _start_prewarm(self, paths, launch=None, workers=4):
+        """Starts prewarming; launch is a (key, params) to start afterwards."""
+        self.cancel_prewarm()
+        self.prewarm_worker = PrewarmWorker(paths, workers, available_memory(), self)
+        self.prewarm_worker.progress.connect(self._on_prewarm_progress)
+        self.prewarm_worker.prewarm_finished.connect(self._on_prewarm_finished)
+        self._prewarm_launch = launch
+        self._update_server_buttons()
+        self.status_label.setText("Prewarming...")
+        self.prewarm_worker.start()
+
+    def cancel_prewarm(self):
+        if self.prewarm_worker is None:
+            return
+        self.prewarm_worker.cancel()
+        self.prewarm_worker.wait()
+        self.prewarm_worker = None
+        self._prewarm_launch = None
+        self._update_server_buttons()
+        self.status_label.setText("Prewarm cancelled")
+
+    def _on_prewarm_progress(self, done, total, rate):
+        if self.sender() is not self.prewarm_worker:
+            return
+        self.status_label.setText(
+            f"Prewarming {done / GIB:.1f}/{total / GIB:.1f} GiB "
+            f"({rate / GIB:.2f} GiB/s)"
+        )
+
+    def _on_prewarm_finished(self, stats):
+        if self.sender() is not self.prewarm_worker:
+            return
+        self.prewarm_worker = None
+        launch = self._prewarm_launch
+        self._prewarm_launch = None
+        self.status_label.setText(
+            f"Prewarmed {stats['bytes'] / GIB:.1f} GiB in {stats['seconds']:.1f}s "
+            f"({stats['throughput'] / GIB:.2f} GiB/s)"
+        )
+        if launch is not None:
+            self._launch(*launch)
+        else:
+            self._update_server_buttons()
 
     def stop_server(self):
-        if self.server_process:
-            try:
-                self.server_process.terminate()
-                self.server_process = None
-                self.status_timer.stop()
-                self.btn_launch.setEnabled(True)
-                self.btn_stop.setEnabled(False)
-                self.btn_open_chat.setEnabled(False)
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to stop server: {e}")
+        if self._prewarm_launch is not None:
+            # Stop during the prewarm stage cancels the pending launch
+            self.cancel_prewarm()
+            return
+        if self.make_room_worker is not None:
+            # The evictions finish, but the launch waiting on them is dropped
+            self.make_room_worker = None
+            self._update_server_buttons()
+            self.status_label.setText("Launch cancelled")
+            return
+        key = self._launch_key()
+        if self._switch is not None and self._switch.key == key:
+            self._switch.cancel()
+        self.stop_instance(key)
+
+    def stop_instance(self, key):
+        try:
+            # The status timer picks up the state change once the process exits
+            self.supervisor.stop(key)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to stop server: {e}")
+        self.check_server_status()
+
+    def restart_instance(self, key):
+        inst = self.supervisor.get(key)
+        if inst is None:
+            return
+        try:
+            self.supervisor.stop(key)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to stop server: {e}")
+            return
+        self._after_stop(inst, lambda: self._start_server(key, inst.requested_params))
+
+    def _after_stop(self, inst, action):
+        """Runs action once a stopping instance has exited, without blocking.
+
+        Stopping can take a while when the instance saves its KV cache
+        slots first; the status timer calls action when the exit shows up.
+        """
+        if not inst.is_live:
+            self.supervisor.wait_stopped(inst, STOP_WAIT_SECONDS)
+            action()
+            return
+        self._after_stop_actions[inst.key] = (inst, action)
+        self.status_label.setText(f"{inst.key}: waiting for the server to stop")
+        self.status_timer.start(STATUS_POLL_MS)
+        self.check_server_status()
+
+    def _on_slots_saved(self, key, saved, tokens):
+        if saved:
+            self.status_label.setText(
+                f"{key}: saved {saved} KV cache slots ({tokens} tokens)"
+            )
+
+    def benchmark_instance(self, key):
+        inst = self.supervisor.get(key)
+        if inst is None or inst.state != READY:
+            QMessageBox.information(
+                self, "Benchmark", f"'{key}' must be running and ready to benchmark."
+            )
+            return
+        executable = self.command_builder.base_executable
+        if executable not in self._binary_ids:
+            self._binary_ids[executable] = server_binary_id(executable)
+        dialog = BenchmarkDialog(
+            inst, self.benchmark_store, self._binary_ids[executable], self
+        )
+        dialog.exec_()
+
+    def autotune_profile(self):
+        name = self.current_profile_name
+        if not name or self.profile_manager.get_profile(name) is None:
+            QMessageBox.information(
+                self, "Autotune", "Select or save a profile to autotune first."
+            )
+            return
+        # Instances show up in the table while they're measured
+        self.supervisor.start_sampling()
+        self.status_timer.start(STATUS_POLL_MS)
+        dialog = AutotuneDialog(
+            self.supervisor,
+            self.profile_manager,
+            name,
+            os.path.join(self.base_dir, "autotune_state.json"),
+            self,
+        )
+        dialog.exec_()
+        self.load_profile_list()
+
+    def open_slot_cache(self):
+        SlotCacheDialog(self.slot_cache, self).exec_()
+
+    def _warmup_prompts(self, profile):
+        data = self.profile_manager.get_profile(profile)
+        return data.get("warmup_prompts", []) if data else []
+
+    def edit_warmup_prompts(self):
+        name = self.current_profile_name
+        data = self.profile_manager.get_profile(name) if name else None
+        if data is None:
+            QMessageBox.information(
+                self, "Warmup Prompts", "Select or save a profile first."
+            )
+            return
+        dialog = WarmupPromptsDialog(name, data.get("warmup_prompts", []), self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        data = dict(data)
+        prompts = dialog.get_prompts()
+        if prompts:
+            data["warmup_prompts"] = prompts
         else:
-            # Reset UI just in case
-            self.status_timer.stop()
-            self.btn_launch.setEnabled(True)
-            self.btn_stop.setEnabled(False)
-            self.btn_open_chat.setEnabled(False)
+            data.pop("warmup_prompts", None)
+        self.profile_manager.save_profile(name, data)
+
+    def export_metrics(self):
+        inst = self._viewed_instance()
+        if inst is None or inst.metrics is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Metrics", f"{inst.key}-metrics.csv", "CSV Files (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            inst.metrics.export_csv(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Failed to export metrics: {e}")
+
+    def toggle_proxy(self, checked):
+        if not checked:
+            self.proxy.stop()
+            self.proxy = None
+            self.btn_proxy.setText("Start Proxy")
+            self.status_label.setText("Proxy stopped")
+            return
+
+        self.proxy = ModelProxy(
+            self.supervisor,
+            self.profile_manager,
+            port=self.settings_manager.get("proxy_port", DEFAULT_PROXY_PORT),
+            exclusive=self.settings_manager.get("proxy_exclusive", True),
+        )
+        try:
+            self.proxy.start()
+        except OSError as e:
+            self.proxy = None
+            self.btn_proxy.setChecked(False)
+            QMessageBox.warning(self, "Error", f"Failed to start proxy: {e}")
+            return
+        self.btn_proxy.setText("Stop Proxy")
+        self.status_label.setText(f"Proxy on {self.proxy.url}/v1")
+        # Instances the proxy starts show up through the status timer
+        self.supervisor.start_sampling()
+        self.status_timer.start(STATUS_POLL_MS)
+
+    def closeEvent(self, event):
+        self.cancel_model_scan()
+        # Cancelled workers must not be destroyed with us while still running
+        for worker in self.findChildren(ModelScanWorker):
+            worker.wait()
+        # A launch still waiting for room is dropped
+        self.make_room_worker = None
+        for worker in self.findChildren(MakeRoomWorker):
+            worker.wait()
+        self.model_watcher.stop()
+        for worker in self.findChildren(FileRefreshWorker):
+            worker.wait()
+        self.cancel_prewarm()
+        if self._switch is not None:
+            self._switch.cancel()
+        if self.proxy is not None:
+            self.proxy.stop()
+        # Their output pipes go away with us, so don't leave servers running
+        self.residency.stop()
+        self.restart_manager.stop()
+        self.slot_cache.stop()
+        self.warmup.stop()
+        self.gpu_timer.stop()
+        self.gpu_telemetry.stop()
+        for inst in self.supervisor.live():
+            self._record_spec_stats(inst)
+        self.supervisor.stop_all()
+        self.supervisor.stop_sampling()
+        super().closeEvent(event)
 
     def open_chat(self):
-        params = self.get_form_data()
-        port = params.get("port", 8080)
+        inst = self._viewed_instance()
+        if inst is not None:
+            port = inst.port
+        else:
+            port = self.get_form_data().get("port", DEFAULT_PORT)
         url = f"http://localhost:{port}"
         webbrowser.open(url)
 
     def monitor_gpu(self):
-        try:
-            subprocess.Popen(
-                ["nvidia-smi", "-l", "1"], creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to launch nvidia-smi: {e}")
+        self.log_panel.setCurrentWidget(self.gpu_panel)
+        self.update_gpu_telemetry()
+
+    def update_gpu_telemetry(self):
+        """Refreshes the VRAM headroom label and, if shown, the GPU charts."""
+        free = [
+            mib for mib in self.gpu_telemetry.headroom().values() if mib is not None
+        ]
+        if free:
+            text = " | ".join(f"{mib / 1024:.1f}" for mib in free)
+            self.vram_headroom_label.setText(f"VRAM free: {text} GiB")
+        else:
+            self.vram_headroom_label.setText("")
+        if self.log_panel.currentWidget() is self.gpu_panel:
+            self.gpu_panel.update_gpus(self.gpu_telemetry)
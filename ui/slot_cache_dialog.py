@@ -0,0 +1,98 @@
+import time
+
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QMessageBox,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from core.memory_estimator import MIB
+
+
+class SlotCacheDialog(QDialog):
+    """Lists the saved KV cache slot files, least recently used first.
+
+    Files can be deleted one by one or all at once; the ones at the top are
+    the next to be evicted when the cache grows past its size limit.
+    """
+
+    def __init__(self, slot_cache, parent=None):
+        super().__init__(parent)
+        self.slot_cache = slot_cache
+        self.entries = []
+        self.setWindowTitle("Slot Cache")
+        self.resize(640, 360)
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(
+            ["Profile", "File", "Size (MiB)", "Last used"]
+        )
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.status = QLabel()
+        layout.addWidget(self.status)
+
+        btn_box = QHBoxLayout()
+        btn_box.addStretch()
+        self.btn_delete = QPushButton("Delete")
+        self.btn_delete.clicked.connect(self.delete_selected)
+        self.btn_clear = QPushButton("Clear All")
+        self.btn_clear.clicked.connect(self.clear_all)
+        self.btn_close = QPushButton("Close")
+        self.btn_close.clicked.connect(self.reject)
+        btn_box.addWidget(self.btn_delete)
+        btn_box.addWidget(self.btn_clear)
+        btn_box.addWidget(self.btn_close)
+        layout.addLayout(btn_box)
+
+        self.refresh()
+
+    def refresh(self):
+        self.entries = self.slot_cache.files()
+        self.table.setRowCount(0)
+        for entry in self.entries:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["mtime"]))
+            for col, text in enumerate(
+                [entry["profile"], entry["name"], f"{entry['size'] / MIB:.1f}", when]
+            ):
+                self.table.setItem(row, col, QTableWidgetItem(text))
+        total = sum(e["size"] for e in self.entries) / MIB
+        limit = self.slot_cache.max_bytes / MIB
+        text = f"{len(self.entries)} files, {total:.1f} MiB"
+        if limit:
+            text += f" of {limit:.0f} MiB"
+        self.status.setText(text)
+
+    def delete_selected(self):
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for row in rows:
+            self.slot_cache.delete(self.entries[row]["path"])
+        self.refresh()
+
+    def clear_all(self):
+        if not self.entries:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Clear Slot Cache",
+            "Delete all saved KV cache slots?",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        if reply != QMessageBox.Yes:
+            return
+        for entry in self.entries:
+            self.slot_cache.delete(entry["path"])
+        self.refresh()
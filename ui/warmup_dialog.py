@@ -0,0 +1,119 @@
+from PyQt5.QtWidgets import (
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QListWidget,
+    QMessageBox,
+    QPlainTextEdit,
+    QPushButton,
+    QVBoxLayout,
+)
+
+
+class WarmupPromptsDialog(QDialog):
+    """Edits the warmup prompts of a profile.
+
+    Each prompt (typically a long system prompt or tool schema) is sent to
+    the server's slots as soon as it is ready, so the first real requests
+    find it in the prompt cache.
+    """
+
+    def __init__(self, profile, prompts, parent=None):
+        super().__init__(parent)
+        self.prompts = list(prompts)
+        self._row = -1
+        self.setWindowTitle(f"Warmup Prompts - {profile}")
+        self.resize(720, 460)
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(
+            QLabel("Sent as system messages to every slot once the server is ready.")
+        )
+        body = QHBoxLayout()
+        self.list = QListWidget()
+        self.list.currentRowChanged.connect(self._on_row_changed)
+        body.addWidget(self.list, 1)
+        self.editor = QPlainTextEdit()
+        self.editor.setEnabled(False)
+        body.addWidget(self.editor, 3)
+        layout.addLayout(body)
+
+        btn_box = QHBoxLayout()
+        self.btn_add = QPushButton("Add")
+        self.btn_add.clicked.connect(lambda: self.add_prompt(""))
+        self.btn_add_file = QPushButton("Add From File...")
+        self.btn_add_file.clicked.connect(self.add_from_file)
+        self.btn_remove = QPushButton("Remove")
+        self.btn_remove.clicked.connect(self.remove_prompt)
+        btn_box.addWidget(self.btn_add)
+        btn_box.addWidget(self.btn_add_file)
+        btn_box.addWidget(self.btn_remove)
+        btn_box.addStretch()
+        self.btn_ok = QPushButton("OK")
+        self.btn_ok.clicked.connect(self.accept)
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.clicked.connect(self.reject)
+        btn_box.addWidget(self.btn_ok)
+        btn_box.addWidget(self.btn_cancel)
+        layout.addLayout(btn_box)
+
+        for prompt in self.prompts:
+            self.list.addItem(self._title(prompt))
+        if self.prompts:
+            self.list.setCurrentRow(0)
+
+    @staticmethod
+    def _title(prompt):
+        first = prompt.strip().splitlines()[0] if prompt.strip() else "(empty)"
+        return first[:60]
+
+    def _store_current(self):
+        if 0 <= self._row < len(self.prompts):
+            self.prompts[self._row] = self.editor.toPlainText()
+            self.list.item(self._row).setText(self._title(self.prompts[self._row]))
+
+    def _on_row_changed(self, row):
+        self._store_current()
+        self._row = row
+        self.editor.setEnabled(row >= 0)
+        self.editor.setPlainText(self.prompts[row] if row >= 0 else "")
+
+    def add_prompt(self, text):
+        self._store_current()
+        self.prompts.append(text)
+        self.list.addItem(self._title(text))
+        self.list.setCurrentRow(len(self.prompts) - 1)
+        self.editor.setFocus()
+
+    def add_from_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Add Warmup Prompt",
+            "",
+            "Text Files (*.txt *.md *.json);;All Files (*)",
+        )
+        if not path:
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.add_prompt(f.read())
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.warning(self, "Error", f"Failed to read {path}: {e}")
+
+    def remove_prompt(self):
+        row = self.list.currentRow()
+        if row < 0:
+            return
+        self._row = -1
+        del self.prompts[row]
+        # takeItem() moves the current row before the item is gone
+        self.list.blockSignals(True)
+        self.list.takeItem(row)
+        self.list.blockSignals(False)
+        self._on_row_changed(self.list.currentRow())
+
+    def get_prompts(self):
+        """The edited prompts, without empty ones."""
+        self._store_current()
+        return [p for p in self.prompts if p.strip()]
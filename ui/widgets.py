@@ -1,3 +1,7 @@
+import math
+
+from PyQt5.QtCore import QPointF, Qt, pyqtSignal
+from PyQt5.QtGui import QPainter, QPalette, QPen, QPolygonF
 from PyQt5.QtWidgets import (
     QWidget,
     QLabel,
@@ -8,8 +12,18 @@ from PyQt5.QtWidgets import (
     QDoubleSpinBox,
     QCheckBox,
     QComboBox,
+    QTabWidget,
+    QPlainTextEdit,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QAbstractItemView,
 )
 
+from core.gpu_telemetry import GPU_SERIES
+from core.metrics import SERIES
+from core.server_process import MAX_LOG_LINES
+
 
 class NoScrollSpinBox(QSpinBox):
     def wheelEvent(self, event):
@@ -27,6 +41,9 @@ class NoScrollComboBox(QComboBox):
 
 
 class ParameterInput(QWidget):
+    # Emitted whenever the user (or set_value) changes the input's value
+    value_changed = pyqtSignal()
+
     def __init__(
         self, label_text, widget_type, default_value=None, options=None, parent=None
     ):
@@ -74,6 +91,16 @@ class ParameterInput(QWidget):
 
         self.layout.addWidget(self.input_widget)
 
+        notify = lambda *args: self.value_changed.emit()
+        if widget_type == "text":
+            self.input_widget.textChanged.connect(notify)
+        elif widget_type in ("int", "float"):
+            self.input_widget.valueChanged.connect(notify)
+        elif widget_type == "bool":
+            self.input_widget.stateChanged.connect(notify)
+        elif widget_type == "combo":
+            self.input_widget.currentTextChanged.connect(notify)
+
     def get_value(self):
         if self.widget_type == "text":
             return self.input_widget.text()
@@ -112,3 +139,302 @@ class ParameterInput(QWidget):
             self.input_widget.setChecked(bool(value))
         elif self.widget_type == "combo":
             self.input_widget.setCurrentText(str(value))
+
+
+class ServerLogPanel(QTabWidget):
+    """Tabs with the captured llama-server output and the last load report."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(MAX_LOG_LINES)
+        self.log_view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.addTab(self.log_view, "Server Log")
+
+        self.report_view = QPlainTextEdit()
+        self.report_view.setReadOnly(True)
+        self.addTab(self.report_view, "Load Report")
+
+    def clear(self):
+        self.log_view.clear()
+        self.report_view.clear()
+
+    def append_lines(self, lines):
+        if not lines:
+            return
+        bar = self.log_view.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 4
+        self.log_view.appendPlainText("\n".join(lines))
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def set_report(self, text):
+        self.report_view.setPlainText(text)
+
+
+class InstancesPanel(QWidget):
+    """Table of supervised server instances with stop/restart/benchmark controls."""
+
+    instance_selected = pyqtSignal(str)
+    stop_requested = pyqtSignal(str)
+    restart_requested = pyqtSignal(str)
+    benchmark_requested = pyqtSignal(str)
+
+    COLUMNS = ["Profile", "Port", "State", "PID", "RAM", "VRAM", "Uptime", "Idle"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.itemSelectionChanged.connect(self._on_selection)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.btn_stop = QPushButton("Stop")
+        self.btn_stop.clicked.connect(
+            lambda: self._emit_for_selected(self.stop_requested)
+        )
+        self.btn_restart = QPushButton("Restart")
+        self.btn_restart.clicked.connect(
+            lambda: self._emit_for_selected(self.restart_requested)
+        )
+        self.btn_benchmark = QPushButton("Benchmark...")
+        self.btn_benchmark.clicked.connect(
+            lambda: self._emit_for_selected(self.benchmark_requested)
+        )
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.btn_benchmark)
+        btn_layout.addWidget(self.btn_stop)
+        btn_layout.addWidget(self.btn_restart)
+        layout.addLayout(btn_layout)
+
+        self._keys = []
+
+    def selected_key(self):
+        rows = self.table.selectionModel().selectedRows()
+        if rows and rows[0].row() < len(self._keys):
+            return self._keys[rows[0].row()]
+        return None
+
+    def _emit_for_selected(self, signal):
+        key = self.selected_key()
+        if key is not None:
+            signal.emit(key)
+
+    def _on_selection(self):
+        key = self.selected_key()
+        if key is not None:
+            self.instance_selected.emit(key)
+
+    def select(self, key):
+        if key in self._keys:
+            self.table.selectRow(self._keys.index(key))
+
+    def update_instances(self, instances, notes=None):
+        """Refreshes the rows from a list of supervisor Instances.
+
+        notes maps instance keys to text shown after the state.
+        """
+        notes = notes or {}
+        selected = self.selected_key()
+        self.table.blockSignals(True)
+        self._keys = [inst.key for inst in instances]
+        self.table.setRowCount(len(instances))
+        for row, inst in enumerate(instances):
+            values = [
+                inst.key,
+                str(inst.port),
+                (
+                    f"{inst.state} ({notes[inst.key]})"
+                    if notes.get(inst.key)
+                    else inst.state
+                ),
+                str(inst.process.pid) if inst.process else "",
+                _format_bytes(inst.rss),
+                _format_bytes(inst.vram),
+                _format_duration(inst.uptime) if inst.is_live else "",
+                _format_idle(inst),
+            ]
+            for col, value in enumerate(values):
+                item = self.table.item(row, col)
+                if item is None:
+                    self.table.setItem(row, col, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
+        if selected in self._keys:
+            self.table.selectRow(self._keys.index(selected))
+        self.table.blockSignals(False)
+
+
+class Sparkline(QWidget):
+    """Small line chart of a series, scaled from zero to its maximum."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values = []
+        self.setMinimumSize(160, 28)
+
+    def set_values(self, values):
+        self.values = values
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self.rect().adjusted(1, 2, -1, -2)
+        points = [(i, v) for i, v in enumerate(self.values) if not math.isnan(v)]
+        if len(points) < 2:
+            return
+        top = max(v for _, v in points) or 1.0
+        span = max(len(self.values) - 1, 1)
+        line = QPolygonF(
+            [
+                QPointF(
+                    rect.left() + rect.width() * i / span,
+                    rect.bottom() - rect.height() * v / top,
+                )
+                for i, v in points
+            ]
+        )
+        painter.setPen(QPen(self.palette().color(QPalette.Highlight), 1.5))
+        painter.drawPolyline(line)
+
+
+class MetricsPanel(QWidget):
+    """Sparklines of an instance's /metrics series with CSV export."""
+
+    export_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.status = QLabel()
+        self.status.setWordWrap(True)
+        layout.addWidget(self.status)
+
+        self.lines = {}
+        self.values = {}
+        for name, label in SERIES:
+            row = QHBoxLayout()
+            title = QLabel(label)
+            title.setMinimumWidth(90)
+            value = QLabel()
+            value.setMinimumWidth(70)
+            value.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            line = Sparkline()
+            row.addWidget(title)
+            row.addWidget(line, 1)
+            row.addWidget(value)
+            layout.addLayout(row)
+            self.lines[name] = line
+            self.values[name] = value
+        layout.addStretch()
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.btn_export = QPushButton("Export CSV...")
+        self.btn_export.clicked.connect(self.export_requested)
+        btn_layout.addWidget(self.btn_export)
+        layout.addLayout(btn_layout)
+        self.update_series(None)
+
+    def update_series(self, metrics):
+        """Shows a MetricsSeries, or a hint if there is none."""
+        if metrics is None:
+            self.status.setText(
+                "Enable Prometheus Metrics (--metrics) in the profile to chart throughput."
+            )
+        elif metrics.available is False:
+            self.status.setText("The server does not serve /metrics.")
+        else:
+            self.status.setText("")
+        self.btn_export.setEnabled(metrics is not None and len(metrics.times) > 0)
+        for name, _ in SERIES:
+            values = metrics.values(name) if metrics is not None else []
+            self.lines[name].set_values(values)
+            last = metrics.last(name) if metrics is not None else None
+            self.values[name].setText("" if last is None else f"{last:.1f}")
+
+
+class GpuPanel(QWidget):
+    """Sparklines of each GPU's sampled memory, utilization, power and clocks."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.status = QLabel()
+        self.status.setWordWrap(True)
+        layout.addWidget(self.status)
+        self.rows = QVBoxLayout()
+        layout.addLayout(self.rows)
+        layout.addStretch()
+        # GPU index -> (title label, {field: (sparkline, value label)})
+        self.gpu_widgets = {}
+
+    def _add_gpu(self, gpu):
+        title = QLabel(f"GPU {gpu.index}: {gpu.name}")
+        self.rows.addWidget(title)
+        widgets = {}
+        for field, label in GPU_SERIES:
+            row = QHBoxLayout()
+            name = QLabel(label)
+            name.setMinimumWidth(90)
+            value = QLabel()
+            value.setMinimumWidth(70)
+            value.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            line = Sparkline()
+            row.addWidget(name)
+            row.addWidget(line, 1)
+            row.addWidget(value)
+            self.rows.addLayout(row)
+            widgets[field] = (line, value)
+        self.gpu_widgets[gpu.index] = (title, widgets)
+
+    def update_gpus(self, telemetry):
+        """Shows the series of a GpuTelemetry."""
+        if telemetry.available is False:
+            self.status.setText("No GPU found (nvidia-smi or NVML is not available).")
+        elif telemetry.available is None:
+            self.status.setText("Waiting for the first GPU sample...")
+        else:
+            self.status.setText(f"Sampled every {telemetry.interval:g}s")
+        for gpu in telemetry.snapshot():
+            if gpu.index not in self.gpu_widgets:
+                self._add_gpu(gpu)
+            title, widgets = self.gpu_widgets[gpu.index]
+            text = f"GPU {gpu.index}: {gpu.name}"
+            if gpu.free is not None:
+                text += f" - {gpu.free / 1024:.2f} of {gpu.total / 1024:.2f} GiB free"
+            title.setText(text)
+            for field, (line, value) in widgets.items():
+                line.set_values(gpu.values(field))
+                last = gpu.last(field)
+                value.setText("" if last is None else f"{last:.0f}")
+
+
+def _format_bytes(n):
+    if n is None:
+        return ""
+    return f"{n / 1024**3:.2f} GiB"
+
+
+def _format_idle(inst):
+    if inst.params.get("pin-resident"):
+        return "pinned"
+    if not inst.is_live:
+        return ""
+    return "busy" if inst.busy else _format_duration(inst.idle_seconds)
+
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
@@ -0,0 +1,322 @@
+import os
+import time
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QThread, QTimer, pyqtSignal
+
+from core.prewarm import Prewarmer
+from core.scan_index import ScanIndex
+
+
+class ModelScanWorker(QThread):
+    """Runs ModelScanner.iter_scan() off the GUI thread.
+
+    Models are streamed out through model_found as they are discovered, so
+    the model combo fills in while slow storage is still being walked.
+    """
+
+    model_found = pyqtSignal(str)
+    progress = pyqtSignal(int, str)
+    scan_finished = pyqtSignal(list, bool)
+
+    def __init__(self, scanner, full=False, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.full = full
+        # Set when the scan stopped on an error; it then finishes as cancelled
+        self.error = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        models = []
+        try:
+            for event in self.scanner.iter_scan(
+                self.full, should_stop=lambda: self._cancelled
+            ):
+                if event[0] == "model":
+                    models.append(event[1])
+                    self.model_found.emit(event[1])
+                else:
+                    self.progress.emit(event[2], event[1])
+        except Exception as e:
+            print(f"Error scanning models: {e}")
+            self.error = str(e)
+        # A partial list must not drop the models it didn't get to
+        self.scan_finished.emit(models, self._cancelled or self.error is not None)
+
+
+class ModelDirWatcher(QObject):
+    """Watches the models folder tree and asks for an incremental rescan.
+
+    Uses QFileSystemWatcher (inotify on Linux, ReadDirectoryChangesW on
+    Windows). Bursts of events, e.g. while a large file is being copied,
+    are debounced: changed fires once things have been quiet for
+    DEBOUNCE_MS, or at most MAX_DELAY_MS after the first event. If some
+    folders can't be watched (watch limits, network shares) it falls back
+    to polling every POLL_MS.
+
+    Files the scanner reports as incomplete are re-stat'ed every
+    SETTLE_CHECK_MS. Once one stops changing, its header is re-read and the
+    index saved on a FileRefreshWorker; completeness_changed fires when any
+    of them turns out complete.
+    """
+
+    changed = pyqtSignal()
+    completeness_changed = pyqtSignal()
+
+    DEBOUNCE_MS = 1000
+    MAX_DELAY_MS = 5000
+    POLL_MS = 5000
+    SETTLE_CHECK_MS = 2000
+
+    def __init__(self, scanner, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self._incomplete = set()
+        # Stamp of each incomplete file at the last check / last refresh
+        self._stamps = {}
+        self._refreshed = {}
+        self._refresh_worker = None
+        self._first_event = None
+
+        self._fs = QFileSystemWatcher(self)
+        self._fs.directoryChanged.connect(self._on_fs_event)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._emit_changed)
+
+        self._poll = QTimer(self)
+        self._poll.timeout.connect(self.changed.emit)
+
+        self._settle = QTimer(self)
+        self._settle.timeout.connect(self._check_incomplete)
+
+    def set_scanner(self, scanner):
+        self.scanner = scanner
+        self.stop()
+
+    def stop(self):
+        dirs = self._fs.directories()
+        if dirs:
+            self._fs.removePaths(dirs)
+        self._debounce.stop()
+        self._poll.stop()
+        self._settle.stop()
+        self._incomplete = set()
+        self._stamps = {}
+        self._refreshed = {}
+        # A running refresh finishes on its own; its result is ignored
+        self._refresh_worker = None
+        self._first_event = None
+
+    def update_paths(self):
+        """Sync watched folders with the scanner's index after a scan."""
+        wanted = set(self.scanner.get_directories())
+        current = set(self._fs.directories())
+        stale = list(current - wanted)
+        if stale:
+            self._fs.removePaths(stale)
+        new = list(wanted - current)
+        if new:
+            self._fs.addPaths(new)
+
+        unwatched = wanted - set(self._fs.directories())
+        if not unwatched:
+            self._poll.stop()
+        elif not self._poll.isActive():
+            print(f"Cannot watch {len(unwatched)} model folders, polling instead")
+            self._poll.start(self.POLL_MS)
+
+        self._incomplete = set(self.scanner.incomplete_files())
+        if self._incomplete and not self._settle.isActive():
+            self._settle.start(self.SETTLE_CHECK_MS)
+
+    def _on_fs_event(self, path):
+        now = time.monotonic()
+        if self._first_event is None:
+            self._first_event = now
+        if (now - self._first_event) * 1000 >= self.MAX_DELAY_MS:
+            self._emit_changed()
+        else:
+            self._debounce.start(self.DEBOUNCE_MS)
+
+    def _emit_changed(self):
+        self._debounce.stop()
+        self._first_event = None
+        self.changed.emit()
+
+    def _check_incomplete(self):
+        if not self._incomplete:
+            self._settle.stop()
+            return
+        if self._refresh_worker is not None:
+            return
+        # Only stat here: re-reading headers and saving the index can take a
+        # while on slow storage, so that happens on a worker
+        stable = {}
+        now = time.time_ns()
+        for rel_path in list(self._incomplete):
+            try:
+                st = os.stat(self.scanner.get_full_path(rel_path))
+            except OSError:
+                self._incomplete.discard(rel_path)
+                continue
+            stamp = ScanIndex.file_stamp(st)
+            previous = self._stamps.get(rel_path)
+            self._stamps[rel_path] = stamp
+            if (
+                stamp != previous
+                or now - st.st_mtime_ns < self.scanner.SETTLE_SECONDS * 1e9
+            ):
+                continue  # Still being written
+            if stamp != self._refreshed.get(rel_path):
+                stable[rel_path] = stamp
+        if stable:
+            self._refresh_worker = FileRefreshWorker(self.scanner, stable, self)
+            self._refresh_worker.refreshed.connect(self._on_refreshed)
+            self._refresh_worker.finished.connect(self._refresh_worker.deleteLater)
+            self._refresh_worker.start()
+        elif not self._incomplete:
+            self._settle.stop()
+
+    def _on_refreshed(self, stamps):
+        if self.sender() is not self._refresh_worker:
+            return
+        self._refresh_worker = None
+        self._refreshed.update(stamps)
+        settled = {p for p in stamps if not self.scanner.is_incomplete(p)}
+        if settled:
+            self._incomplete -= settled
+            self.completeness_changed.emit()
+        if not self._incomplete:
+            self._settle.stop()
+
+
+class FileRefreshWorker(QThread):
+    """Re-reads the headers of settled files off the GUI thread.
+
+    files maps relative paths to the stamp they settled at; refreshed
+    carries it back once ModelScanner.refresh_files() is done.
+    """
+
+    refreshed = pyqtSignal(dict)
+
+    def __init__(self, scanner, files, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.files = files
+
+    def run(self):
+        try:
+            self.scanner.refresh_files(list(self.files))
+        except Exception as e:
+            print(f"Error refreshing model files: {e}")
+        self.refreshed.emit(self.files)
+
+
+class PrewarmWorker(QThread):
+    """Runs a Prewarmer off the GUI thread, reporting progress via signals."""
+
+    progress = pyqtSignal(float, float, float)
+    prewarm_finished = pyqtSignal(dict)
+
+    def __init__(self, paths, workers=4, max_bytes=None, parent=None):
+        super().__init__(parent)
+        self.prewarmer = Prewarmer(
+            paths, workers, max_bytes, progress=self._on_progress
+        )
+
+    def _on_progress(self, done, total, rate):
+        self.progress.emit(done, total, rate)
+
+    def cancel(self):
+        self.prewarmer.cancel()
+
+    def run(self):
+        self.prewarm_finished.emit(self.prewarmer.run())
+
+
+class MakeRoomWorker(QThread):
+    """Stops instances to free VRAM for a launch and waits for them to exit."""
+
+    room_made = pyqtSignal(list)
+
+    def __init__(self, residency, key, params, parent=None):
+        super().__init__(parent)
+        self.residency = residency
+        self.key = key
+        self.params = params
+
+    def run(self):
+        try:
+            evicted = self.residency.make_room(self.key, self.params)
+        except Exception as e:
+            print(f"Error making room for {self.key}: {e}")
+            evicted = []
+        self.room_made.emit(evicted)
+
+
+class BenchmarkWorker(QThread):
+    """Runs a BenchmarkRunner off the GUI thread."""
+
+    progress = pyqtSignal(int, int, dict)
+    benchmark_finished = pyqtSignal(list)
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        # Set when the run stopped on an error; it then finishes with no results
+        self.error = None
+        runner.progress = self._on_progress
+
+    def _on_progress(self, done, total, result):
+        self.progress.emit(done, total, result)
+
+    def cancel(self):
+        self.runner.cancel()
+
+    def run(self):
+        try:
+            results = self.runner.run()
+        except Exception as e:
+            print(f"Error running benchmark: {e}")
+            self.error = str(e)
+            results = []
+        self.benchmark_finished.emit(results)
+
+
+class AutotuneWorker(QThread):
+    """Runs an Autotuner off the GUI thread."""
+
+    progress = pyqtSignal(dict, int, int)
+    autotune_finished = pyqtSignal(dict)
+
+    def __init__(self, tuner, parent=None):
+        super().__init__(parent)
+        self.tuner = tuner
+        tuner.progress = self._on_progress
+
+    def _on_progress(self, trial, done, total):
+        self.progress.emit(trial, done, total)
+
+    def cancel(self):
+        self.tuner.cancel()
+
+    def run(self):
+        try:
+            result = self.tuner.run()
+        except Exception as e:
+            print(f"Error running autotune: {e}")
+            result = {
+                "trials": self.tuner.trials,
+                "front": [],
+                "best": None,
+                "profile": None,
+                "cancelled": False,
+                "out_of_time": False,
+                "error": str(e),
+            }
+        self.autotune_finished.emit(result)